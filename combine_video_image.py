@@ -4,17 +4,42 @@
 Usage:
     Folder mode (new):
         python combine_video_image.py --input test/ --constraint width
+        python combine_video_image.py --input test/ --layout grid --columns 2
 
     Legacy mode:
         python combine_video_image.py --video input/video.mp4 --image input/image.png
+
+    Batch mode:
+        python combine_video_image.py --batch jobs.json --workers 8
+
+    Daemon mode:
+        python combine_video_image.py --watch incoming/ --spool spool/ --output-dir output/ --workers 4
+
+    Probing inputs:
+        python combine_video_image.py --input test/ --probe
+
+    Streaming to stdout:
+        python combine_video_image.py --input test/ --output - | ffmpeg -i - output.mkv
 """
 
+import argparse
+import json
 import os
 import sys
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Any, Dict, TextIO
 
-from src.cli import parse_args, get_mode
-from src.combiner import VideoCombiner
-from src.config import SETTINGS
+from src.cli import get_mode, parse_args
+from src.config import SETTINGS, STREAM_FORMATS
+from src.output_cache import OutputCache
+from src.stats import Progress, RenderStats
+from src.utils import DiscoveryOptions, discover_assets
+
+# Modules that load OpenCV are imported by the modes that render, so --help,
+# argument errors and --probe return without paying for the import
+if TYPE_CHECKING:
+    from src.batch import JobResult
+    from src.combiner import VideoCombiner
 
 
 def main() -> None:
@@ -25,15 +50,62 @@ def main() -> None:
         print(f"Error: {error}")
         sys.exit(1)
 
+    if mode == 'probe':
+        run_probe_mode(args)
+        return
+
+    if mode == 'batch':
+        run_batch_mode(args)
+        return
+
+    if mode == 'daemon':
+        run_daemon_mode(args)
+        return
+
+    from src.combiner import VideoCombiner
+    from src.encoders import EncoderOptions
+    from src.frame_cache import FrameCache
+    from src.media_index import MediaIndex
+    from src.overlay_cache import OverlayCache
+
+    streaming = args.output == '-'
+    # Frames go to stdout when streaming, so status messages go to stderr
+    log = sys.stderr if streaming else sys.stdout
+
     # Create output directory if it doesn't exist
-    output_dir = os.path.dirname(args.output)
+    output_dir = '' if streaming else os.path.dirname(args.output)
     if output_dir:
         os.makedirs(output_dir, exist_ok=True)
 
-    combiner = VideoCombiner(constraint=args.constraint)
+    encoder = EncoderOptions(backend=args.encoder, codec=args.codec, preset=args.preset, crf=args.crf)
+    overlay_cache = None
+    if args.overlay_cache:
+        overlay_cache = OverlayCache(SETTINGS.overlay_cache_dir, args.overlay_cache_mb * 1024 * 1024)
+    frame_cache = None
+    if args.frame_cache:
+        frame_cache = FrameCache(SETTINGS.frame_cache_dir, args.frame_cache_mb * 1024 * 1024)
+    output_cache = None
+    if not args.no_cache and not streaming:
+        output_cache = OutputCache(SETTINGS.output_cache_dir, args.output_cache_mb * 1024 * 1024,
+                                   args.cache_contents)
+    stats = None
+    if args.stats or args.progress:
+        stats = RenderStats(progress=print_progress if args.progress else None)
+    combiner = VideoCombiner(constraint=args.constraint, layout=args.layout, columns=args.columns,
+                             max_width=args.max_width, max_height=args.max_height,
+                             memory_budget_mb=args.memory_budget_mb, pipeline=args.pipeline,
+                             dedup_stride=args.dedup, yuv=args.yuv, audio=args.audio, encoder=encoder,
+                             segments=args.segments, overlay_cache=overlay_cache, fps=args.fps,
+                             start_time=args.start, end_time=args.end, frame_cache=frame_cache,
+                             length=args.length, stats=stats, resumable=args.resumable,
+                             checkpoint_seconds=args.checkpoint_seconds, output_cache=output_cache,
+                             discovery=discovery_options(args),
+                             media_index=MediaIndex(SETTINGS.media_index_path) if args.media_index else None)
 
     try:
-        if mode == 'folder':
+        if streaming:
+            stream_to_stdout(args, combiner, mode)
+        elif mode == 'folder':
             print(f"Combining assets from folder: {args.input}")
             combiner.combine_from_folder(args.input, args.output)
         elif mode == 'legacy':
@@ -58,13 +130,186 @@ def main() -> None:
                 args.image_position
             )
 
-        print(f"Video processing completed successfully!")
-        print(f"Output saved to: {args.output}")
+        if not streaming:
+            print(f"Video processing completed successfully!")
+            print(f"Output saved to: {args.output}")
+        if args.stats and stats is not None:
+            write_stats(stats, args.stats, log)
+
+    except Exception as e:
+        print(f"An error occurred: {str(e)}", file=log)
+        sys.exit(1)
+
+
+def stream_to_stdout(args: argparse.Namespace, combiner: 'VideoCombiner', mode: str) -> None:
+    """Composite frames and stream them to stdout instead of encoding a file."""
+    from src.streaming import write_stream
+
+    if mode == 'folder':
+        print(f"Streaming assets from folder: {args.input}", file=sys.stderr)
+        stream = combiner.iter_composited_frames(args.input)
+    else:
+        video_path = args.video if mode == 'legacy' else SETTINGS.default_video
+        image_path = args.image if mode == 'legacy' else SETTINGS.default_image
+        print("Streaming video and image (legacy mode)", file=sys.stderr)
+        stream = combiner.iter_composited_single(video_path, image_path, args.crop_bottom, args.image_position)
+
+    with stream:
+        if args.stream_format == STREAM_FORMATS.RAW:
+            print(f"Raw {stream.pix_fmt} frames: {stream.width}x{stream.height} at {stream.fps:g} fps",
+                  file=sys.stderr)
+        try:
+            frames = write_stream(stream, sys.stdout.buffer, args.stream_format)
+        except BrokenPipeError:
+            # The reader closed the pipe early (e.g. head); stop quietly and keep
+            # the interpreter from failing to flush stdout on exit
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            print("Output pipe closed, streaming stopped", file=sys.stderr)
+            return
+    print(f"Streamed {frames} frames to stdout", file=sys.stderr)
+
+
+def print_progress(progress: Progress) -> None:
+    """Print a progress line on stderr, overwriting the previous one."""
+    total = f"/{progress.total_frames}" if progress.total_frames is not None else ''
+    eta = f", ETA {progress.eta:.0f}s" if progress.eta is not None else ''
+    end = '\n' if progress.total_frames is not None and progress.frames >= progress.total_frames else ''
+    print(f"\rFrame {progress.frames}{total} ({progress.fps:.1f} fps{eta})   ", end=end, file=sys.stderr, flush=True)
+
+
+def write_stats(stats: RenderStats, path: str, log: TextIO) -> None:
+    """Write render statistics as JSON to a file, or to the log stream for '-'."""
+    data = json.dumps(stats.as_dict(), indent=2)
+    if path == '-':
+        print(data, file=log)
+        return
+    stats_dir = os.path.dirname(path)
+    if stats_dir:
+        os.makedirs(stats_dir, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    print(f"Statistics saved to: {path}", file=log)
+
+
+def run_probe_mode(args: argparse.Namespace) -> None:
+    """Print the properties of the input media as JSON."""
+    from src.media_index import MediaIndex
+    from src.probe import probe
+
+    try:
+        if args.input:
+            paths = [path for path, _ in discover_assets(args.input, discovery_options(args))]
+        else:
+            paths = [path for path in (args.video, args.image) if path]
+        if args.media_index:
+            with MediaIndex(SETTINGS.media_index_path) as index:
+                media = index.probe_all(paths)
+        else:
+            media = [probe(path) for path in paths]
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps([asdict(info) for info in media], indent=2))
+
+
+def discovery_options(args: argparse.Namespace) -> DiscoveryOptions:
+    """Return how input folders are searched."""
+    return DiscoveryOptions(args.recursive, tuple(args.include or ()), tuple(args.exclude or ()), args.natural_sort)
+
+
+def job_defaults(args: argparse.Namespace) -> Dict[str, Any]:
+    """Return the job options set on the command line, used where a job does not set its own."""
+    return {
+        'constraint': args.constraint,
+        'layout': args.layout,
+        'columns': args.columns,
+        'max_width': args.max_width,
+        'max_height': args.max_height,
+        'memory_budget_mb': args.memory_budget_mb,
+        'crop_bottom': args.crop_bottom,
+        'image_position': args.image_position,
+        'fps': args.fps,
+        'start': args.start,
+        'end': args.end,
+        'length': args.length,
+        'pipeline': args.pipeline,
+        'dedup': args.dedup,
+        'yuv': args.yuv,
+        'audio': args.audio,
+        'encoder': args.encoder,
+        'codec': args.codec,
+        'preset': args.preset,
+        'crf': args.crf,
+        'overlay_cache': args.overlay_cache,
+        'overlay_cache_mb': args.overlay_cache_mb,
+        'frame_cache': args.frame_cache,
+        'frame_cache_mb': args.frame_cache_mb,
+        'cache': not args.no_cache,
+        'cache_contents': args.cache_contents,
+        'output_cache_mb': args.output_cache_mb,
+        'recursive': args.recursive,
+        'include': tuple(args.include or ()),
+        'exclude': tuple(args.exclude or ()),
+        'natural_sort': args.natural_sort,
+        'media_index': args.media_index,
+    }
+
+
+def print_result(result: 'JobResult') -> None:
+    """Print one line for a finished job."""
+    status = 'ok' if result.success else f"FAILED ({result.error})"
+    print(f"[{result.seconds:7.2f}s] {result.output}: {status}", flush=True)
+
+
+def run_batch_mode(args: argparse.Namespace) -> None:
+    """Run every job of a manifest or parent directory and write a report."""
+    from src.batch import load_jobs, run_batch, write_report
+
+    defaults = job_defaults(args)
+    output_dir = args.output_dir or os.path.dirname(args.output) or '.'
 
+    try:
+        jobs = load_jobs(args.batch, output_dir, defaults)
     except Exception as e:
-        print(f"An error occurred: {str(e)}")
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+    print(f"Running {len(jobs)} jobs from: {args.batch}")
+
+    results = run_batch(jobs, workers=args.workers, threads=args.threads, on_result=print_result,
+                        shared_overlays=args.shared_overlays)
+
+    report_dir = os.path.dirname(args.report)
+    if report_dir:
+        os.makedirs(report_dir, exist_ok=True)
+    write_report(results, args.report)
+
+    failed = sum(1 for r in results if not r.success)
+    print(f"{len(results) - failed} succeeded, {failed} failed. Report saved to: {args.report}")
+    if failed:
         sys.exit(1)
 
 
+def run_daemon_mode(args: argparse.Namespace) -> None:
+    """Render jobs from watched folders and the spool directory until SIGTERM or Ctrl+C."""
+    from src.daemon import HotFolderDaemon
+
+    output_dir = args.output_dir or os.path.dirname(args.output) or '.'
+    try:
+        daemon = HotFolderDaemon(args.watch or [], output_dir, spool_dir=args.spool,
+                                 defaults=job_defaults(args), workers=args.workers, threads=args.threads,
+                                 poll_interval=args.poll_interval, settle_seconds=args.settle_seconds,
+                                 on_result=print_result)
+    except ValueError as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+    watched = ', '.join([*(args.watch or []), *([args.spool] if args.spool else [])])
+    print(f"Watching {watched} with {daemon.workers} workers; SIGTERM or Ctrl+C drains and stops", flush=True)
+    daemon.run()
+    print("Stopped after finishing running jobs")
+
+
 if __name__ == "__main__":
     main()
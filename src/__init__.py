@@ -1,18 +1,48 @@
-from .asset import Asset, ImageAsset, VideoAsset
+import importlib
+from typing import Any
+
 from .cli import parse_args
-from .combiner import VideoCombiner
-from .config import DEFAULTS, FILE_EXTENSIONS, SETTINGS, VIDEO_CODEC
+from .config import DEFAULTS, ENCODERS, FILE_EXTENSIONS, SETTINGS, VIDEO_CODEC
 from .utils import discover_assets, get_file_type
 
+# Names that need OpenCV and NumPy, imported from their module on first access
+# so that parsing arguments and discovering files stay fast
+_LAZY = {
+    'Asset': '.asset',
+    'ImageAsset': '.asset',
+    'VideoAsset': '.asset',
+    'VideoCombiner': '.combiner',
+    'Encoder': '.encoders',
+    'EncoderOptions': '.encoders',
+    'create_encoder': '.encoders',
+    'MediaInfo': '.probe',
+    'probe_folder': '.probe',
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
 __all__ = [
     'Asset',
     'ImageAsset',
     'VideoAsset',
     'VideoCombiner',
+    'Encoder',
+    'EncoderOptions',
+    'create_encoder',
+    'MediaInfo',
+    'probe_folder',
     'discover_assets',
     'get_file_type',
     'parse_args',
     'DEFAULTS',
+    'ENCODERS',
     'FILE_EXTENSIONS',
     'SETTINGS',
     'VIDEO_CODEC',
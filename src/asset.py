@@ -0,0 +1,221 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .utils import read_image_size
+
+
+class Asset(ABC):
+    """Base class for media assets that can be combined into a video."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @property
+    @abstractmethod
+    def width(self) -> int:
+        """Width of the asset in pixels."""
+
+    @property
+    @abstractmethod
+    def height(self) -> int:
+        """Height of the asset in pixels."""
+
+    @abstractmethod
+    def get_frame(self) -> Optional[np.ndarray]:
+        """Return the next frame, or None if no more frames are available."""
+
+    def reset(self) -> None:
+        """Rewind the asset to its first frame."""
+
+    def seek(self, frame_index: int) -> None:
+        """Position the asset so the next frame read is frame_index."""
+
+    def release(self) -> None:
+        """Release any resources held by the asset."""
+
+
+# Reduced decode modes, largest reduction first
+_REDUCED_MODES = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+class ImageAsset(Asset):
+    """A static image asset."""
+
+    def __init__(self, path: str, size: Optional[Tuple[int, int]] = None):
+        """Load an image.
+
+        Decoding is deferred until the pixels are first needed whenever the
+        size is known up front, from the size argument or the file header.
+
+        Args:
+            path: Path to the image file
+            size: Known (width, height) of the image
+        """
+        super().__init__(path)
+        self._image: Optional[np.ndarray] = None
+        if size is None:
+            size = read_image_size(path)
+        if size is None:
+            self._size = self._load().shape[1::-1]
+        elif not os.path.isfile(path):
+            raise ValueError(f"Error loading image: {path}")
+        else:
+            self._size = size
+
+    def _load(self) -> np.ndarray:
+        image = cv2.imread(self.path)
+        if image is None:
+            raise ValueError(f"Error loading image: {self.path}")
+        self._image = image
+        return image
+
+    @property
+    def image(self) -> np.ndarray:
+        """The decoded image pixels."""
+        if self._image is None:
+            return self._load()
+        return self._image
+
+    @property
+    def width(self) -> int:
+        return int(self._size[0])
+
+    @property
+    def height(self) -> int:
+        return int(self._size[1])
+
+    def get_frame(self) -> Optional[np.ndarray]:
+        """Return the image itself; images never run out of frames."""
+        return self.image
+
+    def get_scaled(self, target_width: Optional[int] = None,
+                   target_height: Optional[int] = None, dst: Optional[np.ndarray] = None,
+                   interpolation: int = cv2.INTER_LINEAR) -> np.ndarray:
+        """Return the image scaled to a target size.
+
+        If only one dimension is given, the other is derived from the aspect ratio.
+        When the image has not been decoded yet and is much larger than the
+        target, it is decoded at a reduced resolution (1/2, 1/4 or 1/8) that
+        still covers the target, which saves decode time and memory.
+
+        Args:
+            target_width: Desired width in pixels
+            target_height: Desired height in pixels
+            dst: Optional preallocated buffer of the target size to resize into
+            interpolation: OpenCV interpolation flag
+        """
+        if target_width is None and target_height is None:
+            return self.image
+
+        aspect_ratio = self.width / self.height
+        if target_width is None:
+            assert target_height is not None
+            target_width = int(target_height * aspect_ratio)
+        elif target_height is None:
+            target_height = int(target_width / aspect_ratio)
+
+        source = self._image
+        if source is None:
+            source = self._load_reduced(target_width, target_height)
+        return cv2.resize(source, (target_width, target_height), dst=dst, interpolation=interpolation)
+
+    def decoded_size(self, target_width: int, target_height: int) -> Tuple[int, int]:
+        """Return the (width, height) get_scaled decodes the image at for a target size."""
+        factor = self._reduction(target_width, target_height)
+        return -(-self.width // factor), -(-self.height // factor)
+
+    def _reduction(self, target_width: int, target_height: int) -> int:
+        """Return the largest reduction factor whose result still covers the target size, or 1."""
+        if self._image is not None:
+            return 1
+        for factor, _ in _REDUCED_MODES:
+            if -(-self.width // factor) >= target_width and -(-self.height // factor) >= target_height:
+                return factor
+        return 1
+
+    def _load_reduced(self, target_width: int, target_height: int) -> np.ndarray:
+        """Decode at the largest reduction factor whose result still covers the target size."""
+        factor = self._reduction(target_width, target_height)
+        if factor == 1:
+            return self._load()
+        image = cv2.imread(self.path, dict(_REDUCED_MODES)[factor])
+        if image is None:
+            raise ValueError(f"Error loading image: {self.path}")
+        return image
+
+
+class VideoAsset(Asset):
+    """A video asset read frame by frame through OpenCV."""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Error opening video: {path}")
+
+        self._width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self._height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps: float = self.cap.get(cv2.CAP_PROP_FPS)
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    @property
+    def width(self) -> int:
+        return self._width
+
+    @property
+    def height(self) -> int:
+        return self._height
+
+    def get_frame(self, dst: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """Read the next frame.
+
+        Args:
+            dst: Optional preallocated (height, width, 3) uint8 buffer to decode into.
+                 It may be a row slice of a larger frame.
+
+        Returns:
+            The decoded frame (``dst`` itself when given), or None at end of video.
+        """
+        ret, frame = self.cap.read(dst)
+        if not ret:
+            return None
+        return frame
+
+    def grab(self) -> bool:
+        """Skip the next frame without retrieving or colour-converting it.
+
+        Returns:
+            False at end of video.
+        """
+        return bool(self.cap.grab())
+
+    def frames(self) -> Iterator[np.ndarray]:
+        """Iterate over the remaining frames of the video."""
+        while True:
+            frame = self.get_frame()
+            if frame is None:
+                break
+            yield frame
+
+    def reset(self) -> None:
+        """Rewind the video to its first frame."""
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def seek(self, frame_index: int) -> None:
+        """Position the video so the next frame read is frame_index.
+
+        Seeking past the end leaves the video ended.
+        """
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+
+    def release(self) -> None:
+        """Release the underlying video capture."""
+        self.cap.release()
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Generator, Optional, Tuple
+
+from .config import DEFAULTS
+from .stats import Progress
+
+# Renders are given the event that cancels them and a callback for progress
+Render = Callable[[threading.Event, Callable[[Progress], None]], None]
+
+_default_pool: Optional['RenderPool'] = None
+_default_pool_lock = threading.Lock()
+
+
+class RenderPool:
+    """Bounded pool of render threads shared by async jobs.
+
+    OpenCV releases the GIL while decoding, resizing and encoding, so renders
+    on separate threads run in parallel. Jobs beyond max_workers wait for a
+    free thread; a waiting job that is cancelled never starts.
+    """
+
+    def __init__(self, max_workers: int = DEFAULTS.ASYNC_WORKERS):
+        """Initialize the pool.
+
+        Args:
+            max_workers: Number of renders that run at the same time
+        """
+        if max_workers < 1:
+            raise ValueError(f"Invalid worker count: {max_workers}. Must be at least 1")
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='render')
+
+    def submit(self, render: Render, cancel: threading.Event, progress: Callable[[Progress], None]) -> Future[None]:
+        """Queue a render."""
+        return self._executor.submit(render, cancel, progress)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs; with wait, block until the running ones finish."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def __enter__(self) -> 'RenderPool':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.shutdown()
+
+
+def default_pool() -> RenderPool:
+    """Return the pool shared by jobs that are not given one, creating it on first use."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = RenderPool()
+        return _default_pool
+
+
+class RenderJob:
+    """A render running on a RenderPool, awaited and cancelled from asyncio.
+
+    Awaiting the job returns when the output is written and re-raises render
+    errors. Cancelling the job, or a task awaiting it, stops the render at
+    the next frame: its inputs and encoder are released and the partial
+    output is removed before the cancellation propagates.
+
+    Progress is delivered as an async iterator of Progress events that ends
+    with the job; it is meant for a single consumer.
+    """
+
+    def __init__(self, render: Render, output_path: str, pool: Optional[RenderPool] = None):
+        """Start a render; must be called from a running event loop.
+
+        Args:
+            render: Blocking render, called on a pool thread
+            output_path: Path the render writes, removed if it is cancelled
+            pool: Pool to run on (default: a pool shared by all jobs)
+        """
+        self.output_path = output_path
+        self._pool = pool or default_pool()
+        self._loop = asyncio.get_running_loop()
+        self._cancel = threading.Event()
+        self._events: asyncio.Queue[Optional[Progress]] = asyncio.Queue()
+        self._task = self._loop.create_task(self._run(render))
+
+    def __await__(self) -> Generator[Any, None, None]:
+        return self._task.__await__()
+
+    def cancel(self) -> bool:
+        """Request cancellation; await the job to wait until its cleanup is done."""
+        return self._task.cancel()
+
+    def done(self) -> bool:
+        """Return whether the job finished, failed or was cancelled."""
+        return self._task.done()
+
+    async def __aiter__(self) -> AsyncIterator[Progress]:
+        while True:
+            event = await self._events.get()
+            if event is None:
+                return
+            yield event
+
+    def _report(self, progress: Progress) -> None:
+        """Progress callback, called on the render thread."""
+        self._loop.call_soon_threadsafe(self._events.put_nowait, progress)
+
+    async def _run(self, render: Render) -> None:
+        before = _identity(self.output_path)
+        future = self._pool.submit(render, self._cancel, self._report)
+        try:
+            await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            self._cancel.set()
+            if not future.cancel():
+                await _settled(future)
+                if _identity(self.output_path) != before:
+                    _remove(self.output_path)
+            raise
+        finally:
+            self._events.put_nowait(None)
+
+
+async def _settled(future: Future[None]) -> None:
+    """Wait until a running render has stopped, whatever its outcome and however often we are cancelled."""
+    while not future.done():
+        try:
+            await asyncio.wrap_future(future)
+        except (Exception, asyncio.CancelledError):
+            continue
+
+
+def _identity(path: str) -> Optional[Tuple[int, int, int]]:
+    """Return what identifies a file's current version, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def _remove(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
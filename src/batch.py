@@ -0,0 +1,314 @@
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+
+from .combiner import VideoCombiner
+from .config import DEFAULTS, SETTINGS
+from .encoders import EncoderOptions
+from .frame_cache import FrameCache
+from .media_index import MediaIndex
+from .output_cache import OutputCache
+from .overlay_cache import OverlayCache
+from .shared_overlays import OverlayKey, SharedOverlay, SharedOverlayPool, overlay_key
+from .utils import DiscoveryOptions, discover_assets
+
+_PATH_FIELDS = ('output', 'input', 'video', 'image')
+_INT_FIELDS = ('columns', 'max_width', 'max_height', 'memory_budget_mb', 'crop_bottom', 'crf', 'threads',
+               'overlay_cache_mb', 'frame_cache_mb', 'output_cache_mb', 'dedup')
+_FLOAT_FIELDS = ('fps', 'start', 'end')
+_BOOL_FIELDS = ('pipeline', 'yuv', 'audio', 'overlay_cache', 'frame_cache', 'cache', 'cache_contents', 'recursive',
+                'natural_sort', 'media_index')
+# Lists of glob patterns, separated by ; in CSV manifests
+_LIST_FIELDS = ('include', 'exclude')
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    """One combine job: a folder, or a video/image pair, and its options.
+
+    Field names match the command-line options.
+    """
+
+    output: str
+    input: Optional[str] = None
+    video: Optional[str] = None
+    image: Optional[str] = None
+    constraint: str = SETTINGS.default_constraint
+    layout: str = DEFAULTS.LAYOUT
+    columns: Optional[int] = None
+    max_width: Optional[int] = None
+    max_height: Optional[int] = None
+    memory_budget_mb: Optional[int] = None
+    crop_bottom: int = SETTINGS.default_crop_bottom
+    image_position: str = SETTINGS.default_image_position
+    fps: Optional[float] = None
+    start: float = 0.0
+    end: Optional[float] = None
+    length: str = DEFAULTS.LENGTH_POLICY
+    pipeline: bool = False
+    dedup: Optional[int] = None
+    yuv: bool = False
+    audio: bool = False
+    encoder: str = SETTINGS.default_encoder
+    codec: Optional[str] = None
+    preset: str = DEFAULTS.FFMPEG_PRESET
+    crf: int = DEFAULTS.FFMPEG_CRF
+    threads: Optional[int] = None
+    overlay_cache: bool = False
+    overlay_cache_mb: int = DEFAULTS.OVERLAY_CACHE_MB
+    frame_cache: bool = False
+    frame_cache_mb: int = DEFAULTS.FRAME_CACHE_MB
+    cache: bool = False
+    cache_contents: bool = False
+    output_cache_mb: int = DEFAULTS.OUTPUT_CACHE_MB
+    recursive: bool = False
+    include: Tuple[str, ...] = ()
+    exclude: Tuple[str, ...] = ()
+    natural_sort: bool = False
+    media_index: bool = False
+
+    def __post_init__(self) -> None:
+        if self.input:
+            if self.video or self.image:
+                raise ValueError(f"Job for {self.output}: input cannot be combined with video or image")
+        elif not (self.video and self.image):
+            raise ValueError(f"Job for {self.output}: needs input, or video and image")
+
+    @property
+    def discovery(self) -> DiscoveryOptions:
+        """How the media files of the job's input folder are found."""
+        return DiscoveryOptions(self.recursive, tuple(self.include), tuple(self.exclude), self.natural_sort)
+
+
+@dataclass(frozen=True)
+class JobResult:
+    """Outcome of one batch job."""
+
+    output: str
+    success: bool
+    seconds: float
+    error: Optional[str] = None
+
+
+def _job_from_record(record: Dict[str, Any], base_dir: str, defaults: Dict[str, Any]) -> BatchJob:
+    """Build a job from a manifest record, resolving paths against base_dir."""
+    known = {f.name for f in fields(BatchJob)}
+    unknown = set(record) - known
+    if unknown:
+        raise ValueError(f"Unknown manifest fields: {', '.join(sorted(unknown))}")
+
+    values = dict(defaults)
+    for key, value in record.items():
+        if value is None or value == '':
+            continue
+        if key in _INT_FIELDS:
+            value = int(value)
+        elif key in _FLOAT_FIELDS:
+            value = float(value)
+        elif key in _BOOL_FIELDS and isinstance(value, str):
+            value = value.strip().lower() in ('1', 'true', 'yes')
+        elif key in _LIST_FIELDS:
+            if isinstance(value, str):
+                value = [pattern.strip() for pattern in value.split(';') if pattern.strip()]
+            value = tuple(value)
+        elif key in _PATH_FIELDS:
+            value = os.path.join(base_dir, value)
+        values[key] = value
+
+    if 'output' not in values:
+        raise ValueError(f"Manifest record has no output: {record}")
+    return BatchJob(**values)
+
+
+def load_jobs(source: str, output_dir: Optional[str] = None,
+              defaults: Optional[Dict[str, Any]] = None) -> List[BatchJob]:
+    """Load batch jobs from a manifest file or a parent directory.
+
+    Args:
+        source: A .json manifest (list of job objects), a .csv manifest (one job
+                per row, header row of field names), or a directory whose
+                subfolders each become a folder-mode job. Relative paths in a
+                manifest are resolved against the manifest's directory.
+        output_dir: Directory for outputs of directory jobs, written as
+                    <subfolder name>.mp4 (default: the default output directory)
+        defaults: Job options used where a job does not set its own
+    """
+    defaults = defaults or {}
+    if os.path.isdir(source):
+        if output_dir is None:
+            output_dir = os.path.dirname(SETTINGS.default_output) or '.'
+        jobs = []
+        for entry in sorted(os.scandir(source), key=lambda e: e.name.lower()):
+            if entry.is_dir():
+                output = os.path.join(output_dir, entry.name + '.mp4')
+                job = BatchJob(**{**defaults, 'input': entry.path, 'output': output})
+                if discover_assets(entry.path, job.discovery):
+                    jobs.append(job)
+        return jobs
+
+    ext = os.path.splitext(source)[1].lower()
+    if ext not in ('.json', '.csv'):
+        raise ValueError(f"Unsupported manifest type: {source}. Must be .json, .csv or a directory")
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, newline='', encoding='utf-8') as f:
+        if ext == '.json':
+            records = json.load(f)
+            if not isinstance(records, list):
+                raise ValueError(f"JSON manifest must contain a list of jobs: {source}")
+        else:
+            records = list(csv.DictReader(f))
+
+    return [_job_from_record(record, base_dir, defaults) for record in records]
+
+
+def run_job(job: BatchJob, threads: int = DEFAULTS.BATCH_THREADS,
+            shared_overlays: Optional[Dict[OverlayKey, SharedOverlay]] = None) -> JobResult:
+    """Run one job, capturing any error in the result instead of raising.
+
+    Args:
+        job: Job to run
+        threads: OpenCV worker threads, unless the job sets its own
+        shared_overlays: Scaled images of this job published in shared memory
+    """
+    start = time.perf_counter()
+    try:
+        cv2.setNumThreads(job.threads if job.threads is not None else threads)
+
+        output_dir = os.path.dirname(job.output)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        encoder = EncoderOptions(backend=job.encoder, codec=job.codec, preset=job.preset, crf=job.crf)
+        overlay_cache = None
+        if job.overlay_cache:
+            # Shared per worker process, so its in-memory layer carries over between jobs
+            overlay_cache = OverlayCache.shared(SETTINGS.overlay_cache_dir, job.overlay_cache_mb * 1024 * 1024)
+        frame_cache = None
+        if job.frame_cache:
+            frame_cache = FrameCache(SETTINGS.frame_cache_dir, job.frame_cache_mb * 1024 * 1024)
+        output_cache = None
+        if job.cache:
+            output_cache = OutputCache(SETTINGS.output_cache_dir, job.output_cache_mb * 1024 * 1024,
+                                       job.cache_contents)
+        # Shared per worker process, so its connection carries over between jobs
+        media_index = MediaIndex.shared(SETTINGS.media_index_path) if job.media_index else None
+        combiner = VideoCombiner(constraint=job.constraint, layout=job.layout, columns=job.columns,
+                                 max_width=job.max_width, max_height=job.max_height,
+                                 memory_budget_mb=job.memory_budget_mb, pipeline=job.pipeline, encoder=encoder,
+                                 overlay_cache=overlay_cache, fps=job.fps, length=job.length,
+                                 shared_overlays=shared_overlays, output_cache=output_cache,
+                                 discovery=job.discovery, media_index=media_index, dedup_stride=job.dedup,
+                                 yuv=job.yuv, audio=job.audio,
+                                 start_time=job.start, end_time=job.end, frame_cache=frame_cache)
+        if job.input:
+            combiner.combine_from_folder(job.input, job.output)
+        else:
+            assert job.video is not None and job.image is not None
+            combiner.combine_single(job.video, job.image, job.output, job.crop_bottom, job.image_position)
+    except Exception as e:
+        return JobResult(job.output, False, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+    return JobResult(job.output, True, time.perf_counter() - start)
+
+
+def plan_overlays(job: BatchJob) -> List[Tuple[str, Tuple[int, int]]]:
+    """Return the path and scaled (width, height) of every image a job paints.
+
+    Jobs whose inputs cannot be read have no overlays; they fail when they run.
+    """
+    combiner = VideoCombiner(constraint=job.constraint, layout=job.layout, columns=job.columns,
+                             max_width=job.max_width, max_height=job.max_height, discovery=job.discovery)
+    try:
+        if job.input:
+            return combiner.plan_overlays(job.input)
+        assert job.video is not None and job.image is not None
+        return [combiner.plan_single_overlay(job.video, job.image, job.crop_bottom)]
+    except Exception:
+        return []
+
+
+def run_batch(jobs: List[BatchJob], workers: Optional[int] = None, threads: int = DEFAULTS.BATCH_THREADS,
+              on_result: Optional[Callable[[JobResult], None]] = None,
+              shared_overlays: bool = False) -> List[JobResult]:
+    """Run jobs on a process pool.
+
+    Worker processes are reused across jobs, so interpreter startup and the
+    OpenCV import are paid once per worker. A failing job does not stop the
+    others.
+
+    Args:
+        jobs: Jobs to run
+        workers: Number of worker processes (default: number of CPU cores)
+        threads: OpenCV threads per job; keep workers * threads near the core count
+        on_result: Called with each result as soon as its job finishes
+        shared_overlays: Decode and resize the images of each job in this
+                         process just before it is submitted and share them
+                         with the workers through shared memory; only as
+                         many jobs as there are workers are in flight, and
+                         their images are freed as they finish, so overlay
+                         memory grows with neither the worker count nor the
+                         batch
+
+    Returns:
+        One result per job, in job order.
+    """
+    results: List[Optional[JobResult]] = [None] * len(jobs)
+    # With shared overlays, only the jobs in flight have their images published,
+    # so shared memory follows the worker count rather than the batch
+    in_flight = (workers or os.cpu_count() or 1) if shared_overlays else len(jobs)
+    with SharedOverlayPool() as overlays, ProcessPoolExecutor(max_workers=workers) as pool:
+        running: Dict[Future[JobResult], Tuple[int, Dict[OverlayKey, SharedOverlay]]] = {}
+
+        def submit(i: int) -> None:
+            published: Dict[OverlayKey, SharedOverlay] = {}
+            if shared_overlays:
+                for path, size in plan_overlays(jobs[i]):
+                    try:
+                        published[overlay_key(path, size)] = overlays.publish(path, size)
+                    except Exception:
+                        # The job decodes the image itself and reports the error
+                        continue
+            running[pool.submit(run_job, jobs[i], threads, published or None)] = (i, published)
+
+        queued = iter(range(len(jobs)))
+        for i in itertools.islice(queued, in_flight):
+            submit(i)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                i, published = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # The worker process itself died (e.g. killed for memory)
+                    result = JobResult(jobs[i].output, False, 0.0, f"{type(e).__name__}: {e}")
+                # Blocks no job still needs are freed right away
+                for overlay in published.values():
+                    overlays.release(overlay)
+                results[i] = result
+                if on_result is not None:
+                    on_result(result)
+                following = next(queued, None)
+                if following is not None:
+                    submit(following)
+
+    return [result for result in results if result is not None]
+
+
+def write_report(results: List[JobResult], path: str) -> None:
+    """Write a JSON report of job results."""
+    report = {
+        'succeeded': sum(1 for r in results if r.success),
+        'failed': sum(1 for r in results if not r.success),
+        'seconds': sum(r.seconds for r in results),
+        'jobs': [asdict(r) for r in results],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,256 @@
+import json
+import multiprocessing
+import os
+import platform
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .combiner import VideoCombiner
+from .config import DEFAULTS
+from .stats import peak_rss_mb
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """One benchmark input and the way it is combined.
+
+    Attributes:
+        name: Unique name, used to match results against a baseline
+        mode: 'folder' (combine_from_folder) or 'single' (combine_single)
+        width: Video width in pixels
+        height: Video height in pixels
+        frames: Frames per video
+        fps: Video frame rate
+        videos: Number of stacked videos (folder mode)
+        images: Number of stacked images
+        image_width: Image width in pixels
+        image_height: Image height in pixels
+    """
+
+    name: str
+    mode: str = 'folder'
+    width: int = 1280
+    height: int = 720
+    frames: int = 150
+    fps: float = 30.0
+    videos: int = 1
+    images: int = 1
+    image_width: int = 1280
+    image_height: int = 360
+
+    def __post_init__(self) -> None:
+        if self.mode not in ('folder', 'single'):
+            raise ValueError(f"Invalid scenario mode: {self.mode}. Must be 'folder' or 'single'")
+        if self.mode == 'single' and (self.videos, self.images) != (1, 1):
+            raise ValueError(f"Scenario {self.name}: single mode needs one video and one image")
+
+    @property
+    def media_key(self) -> str:
+        """Name of the folder holding this scenario's generated inputs."""
+        return (f"{self.videos}v{self.width}x{self.height}x{self.frames}@{self.fps:g}"
+                f"_{self.images}i{self.image_width}x{self.image_height}")
+
+
+SCENARIOS = (
+    Scenario('single_sd', mode='single', width=640, height=480, frames=300, image_width=640, image_height=200),
+    Scenario('single_hd', mode='single'),
+    Scenario('folder_hd', videos=2, images=1),
+    Scenario('folder_fhd_stack', width=1920, height=1080, frames=120, videos=3, images=2,
+             image_width=1920, image_height=540),
+    Scenario('folder_large_image', frames=60, images=1, image_width=8000, image_height=3000),
+    Scenario('folder_long_sd', width=640, height=360, frames=1800, videos=1, images=1,
+             image_width=640, image_height=160),
+)
+
+
+@dataclass(frozen=True)
+class BenchResult:
+    """Measurements of one scenario."""
+
+    name: str
+    frames: int
+    seconds: float
+    fps: float
+    peak_rss_mb: Optional[float]
+
+
+@dataclass(frozen=True)
+class Regression:
+    """A metric that got worse than the baseline allows."""
+
+    name: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        """Relative change from the baseline (0.1 is 10% higher)."""
+        return self.current / self.baseline - 1
+
+
+def write_synthetic_video(path: str, width: int, height: int, frames: int, fps: float) -> None:
+    """Write a video of a scrolling noise pattern.
+
+    Noise does not compress away, so decoding costs about as much as for
+    camera footage of the same size.
+    """
+    rng = np.random.default_rng(0)
+    # Smooth the noise a little so the encoder finds some motion to exploit
+    pattern = cv2.GaussianBlur(rng.integers(0, 256, (height, width * 2, 3), dtype=np.uint8), (5, 5), 0)
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    if not out.isOpened():
+        raise ValueError(f"Error opening video writer: {path}")
+    try:
+        step = max(1, width // max(1, frames))
+        for i in range(frames):
+            offset = (i * step) % width
+            out.write(np.ascontiguousarray(pattern[:, offset:offset + width]))
+    finally:
+        out.release()
+
+
+def write_synthetic_image(path: str, width: int, height: int) -> None:
+    """Write an image with a gradient and some detail."""
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[..., 0] = x
+    image[..., 1] = y
+    image[..., 2] = (x + y) / 2
+    cv2.putText(image, 'benchmark', (width // 10, height // 2), cv2.FONT_HERSHEY_SIMPLEX,
+                max(1.0, width / 400), (255, 255, 255), max(1, width // 400))
+    if not cv2.imwrite(path, image):
+        raise ValueError(f"Error writing image: {path}")
+
+
+def prepare_media(scenario: Scenario, media_dir: str) -> str:
+    """Generate a scenario's inputs, reusing them if they already exist.
+
+    Returns:
+        Folder containing the inputs, named so discover_assets stacks the
+        videos first and the images after them.
+    """
+    folder = os.path.join(media_dir, scenario.media_key)
+    done = os.path.join(folder, '.complete')
+    if os.path.exists(done):
+        return folder
+
+    os.makedirs(folder, exist_ok=True)
+    for i in range(scenario.videos):
+        write_synthetic_video(os.path.join(folder, f'{i:02d}_video.mp4'),
+                              scenario.width, scenario.height, scenario.frames, scenario.fps)
+    for i in range(scenario.images):
+        write_synthetic_image(os.path.join(folder, f'{scenario.videos + i:02d}_image.png'),
+                              scenario.image_width, scenario.image_height)
+    open(done, 'w').close()
+    return folder
+
+
+def _run_in_process(scenario: Scenario, folder: str, output_path: str,
+                    options: Dict[str, Any]) -> Tuple[float, Optional[float]]:
+    """Combine one scenario and return (seconds, peak RSS in MB)."""
+    combiner = VideoCombiner(**options)
+    start = time.perf_counter()
+    if scenario.mode == 'single':
+        combiner.combine_single(os.path.join(folder, '00_video.mp4'), os.path.join(folder, '01_image.png'),
+                                output_path)
+    else:
+        combiner.combine_from_folder(folder, output_path)
+    seconds = time.perf_counter() - start
+    return seconds, peak_rss_mb()
+
+
+def run_scenario(scenario: Scenario, media_dir: str = DEFAULTS.BENCH_MEDIA_DIR, repeat: int = 1,
+                 options: Optional[Dict[str, Any]] = None) -> BenchResult:
+    """Run a scenario and measure it.
+
+    Every run happens in a fresh process, so the peak RSS belongs to that
+    scenario alone. The fastest of several runs is reported.
+
+    Args:
+        scenario: Scenario to run
+        media_dir: Directory for the generated inputs
+        repeat: Number of runs
+        options: VideoCombiner keyword arguments
+    """
+    if repeat < 1:
+        raise ValueError(f"Invalid repeat count: {repeat}. Must be at least 1")
+    folder = prepare_media(scenario, media_dir)
+
+    best: Optional[Tuple[float, Optional[float]]] = None
+    with tempfile.TemporaryDirectory() as tmpdir:
+        output_path = os.path.join(tmpdir, 'output.mp4')
+        for _ in range(repeat):
+            # Spawned rather than forked, so the parent's memory does not count
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                run = pool.submit(_run_in_process, scenario, folder, output_path, options or {}).result()
+            if best is None or run[0] < best[0]:
+                best = run
+
+    assert best is not None
+    seconds, rss = best
+    return BenchResult(scenario.name, scenario.frames, seconds, scenario.frames / seconds, rss)
+
+
+def environment() -> Dict[str, Any]:
+    """Describe the machine and library versions, stored with the results."""
+    return {
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def write_results(results: List[BenchResult], path: str) -> None:
+    """Write results and the environment they were measured in as JSON."""
+    data = {
+        'environment': environment(),
+        'results': [asdict(result) for result in results],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+
+
+def load_results(path: str) -> List[BenchResult]:
+    """Load results written by write_results."""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return [BenchResult(**result) for result in data['results']]
+
+
+def compare(baseline: List[BenchResult], current: List[BenchResult],
+            tolerance: float = DEFAULTS.BENCH_TOLERANCE) -> List[Regression]:
+    """Find scenarios that got slower or use more memory than the baseline.
+
+    Args:
+        baseline: Stored results
+        current: New results; scenarios missing from the baseline are ignored
+        tolerance: Allowed relative change, e.g. 0.1 for 10%
+
+    Returns:
+        Regressions: throughput lower than baseline * (1 - tolerance), or peak
+        RSS higher than baseline * (1 + tolerance).
+    """
+    if tolerance < 0:
+        raise ValueError(f"Invalid tolerance: {tolerance}. Must not be negative")
+    previous = {result.name: result for result in baseline}
+    regressions = []
+    for result in current:
+        old = previous.get(result.name)
+        if old is None:
+            continue
+        if result.fps < old.fps * (1 - tolerance):
+            regressions.append(Regression(result.name, 'fps', old.fps, result.fps))
+        if (old.peak_rss_mb is not None and result.peak_rss_mb is not None
+                and result.peak_rss_mb > old.peak_rss_mb * (1 + tolerance)):
+            regressions.append(Regression(result.name, 'peak_rss_mb', old.peak_rss_mb, result.peak_rss_mb))
+    return regressions
@@ -0,0 +1,122 @@
+import json
+import os
+import re
+import tempfile
+from typing import Any, Dict, List
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_FILE = 'checkpoint.json'
+_SEGMENT_PATTERN = re.compile(r'^segment_\d{5}(\.part)?\.\w+$')
+
+
+def input_fingerprint(paths: List[str]) -> List[List[Any]]:
+    """Return the absolute path, size and modification time of each input file."""
+    fingerprint = []
+    for path in paths:
+        stat = os.stat(path)
+        fingerprint.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+
+class Checkpoint:
+    """Completed segments of a resumable render, recorded next to the segment files.
+
+    The checkpoint belongs to one set of render parameters (inputs, options and
+    segment length). Opening it with different parameters discards the old
+    segments, so a changed input or option never reuses stale frames.
+    """
+
+    def __init__(self, directory: str, params: Dict[str, Any], extension: str):
+        """Initialize an empty checkpoint; use open() to load a saved one.
+
+        Args:
+            directory: Directory holding the checkpoint and the segment files
+            params: JSON-serializable render parameters
+            extension: Extension of the segment files, e.g. '.mp4'
+        """
+        self.directory = directory
+        # Normalized through JSON so tuples compare equal to the saved lists
+        self.params: Dict[str, Any] = json.loads(json.dumps(params))
+        self.extension = extension
+        # Segment file name -> size in bytes
+        self.completed: Dict[str, int] = {}
+
+    @classmethod
+    def open(cls, directory: str, params: Dict[str, Any], extension: str) -> 'Checkpoint':
+        """Load the checkpoint in directory, or start a new one.
+
+        A new checkpoint is started if none exists or the saved one was written
+        for other parameters.
+        """
+        os.makedirs(directory, exist_ok=True)
+        checkpoint = cls(directory, params, extension)
+        try:
+            with open(checkpoint.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = None
+
+        if (isinstance(data, dict) and data.get('version') == CHECKPOINT_VERSION
+                and data.get('params') == checkpoint.params):
+            checkpoint.completed = {str(name): int(size) for name, size in data.get('completed', {}).items()}
+        else:
+            checkpoint._clear()
+        checkpoint.save()
+        return checkpoint
+
+    @property
+    def path(self) -> str:
+        """Path of the checkpoint file."""
+        return os.path.join(self.directory, CHECKPOINT_FILE)
+
+    def segment_path(self, index: int) -> str:
+        """Return the path of a finished segment."""
+        return os.path.join(self.directory, f'segment_{index:05d}{self.extension}')
+
+    def partial_path(self, index: int) -> str:
+        """Return the path a segment is written to until it is finished."""
+        return os.path.join(self.directory, f'segment_{index:05d}.part{self.extension}')
+
+    def is_complete(self, index: int) -> bool:
+        """Return whether a segment was finished and its file is still intact."""
+        path = self.segment_path(index)
+        size = self.completed.get(os.path.basename(path))
+        try:
+            return size is not None and os.path.getsize(path) == size
+        except OSError:
+            return False
+
+    def mark_complete(self, index: int) -> None:
+        """Move a finished partial segment into place and record it."""
+        path = self.segment_path(index)
+        os.replace(self.partial_path(index), path)
+        self.completed[os.path.basename(path)] = os.path.getsize(path)
+        self.save()
+
+    def save(self) -> None:
+        """Write the checkpoint atomically."""
+        data = {'version': CHECKPOINT_VERSION, 'params': self.params, 'completed': self.completed}
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def remove(self) -> None:
+        """Delete the checkpoint and every segment file."""
+        self._clear()
+        try:
+            os.unlink(self.path)
+            os.rmdir(self.directory)
+        except OSError:
+            pass
+
+    def _clear(self) -> None:
+        """Delete the segment files and forget the completed segments."""
+        self.completed = {}
+        for entry in os.scandir(self.directory):
+            if _SEGMENT_PATTERN.match(entry.name):
+                os.unlink(entry.path)
@@ -0,0 +1,196 @@
+import argparse
+from typing import Optional, Tuple
+
+from .config import DEFAULTS, ENCODERS, LAYOUTS, LENGTH_POLICIES, SETTINGS, STREAM_FORMATS
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description='Combine video and image assets into a single video.')
+
+    parser.add_argument('--input', type=str, default=None,
+                        help='Path to folder containing media files (folder mode)')
+    parser.add_argument('--batch', type=str, default=None,
+                        help='Run many jobs from a .json/.csv manifest or every subfolder of a directory')
+    parser.add_argument('--probe', action='store_true',
+                        help='Print width, height, fps, frame count and duration of the media in --input, '
+                             'or of --video and --image, as JSON without rendering')
+    parser.add_argument('--video', type=str, default=None,
+                        help=f'Path to input video file (default: {SETTINGS.default_video})')
+    parser.add_argument('--image', type=str, default=None,
+                        help=f'Path to input image file (default: {SETTINGS.default_image})')
+    parser.add_argument('--output', type=str, default=SETTINGS.default_output,
+                        help=f'Path to output video file, or - to stream frames to stdout '
+                             f'(default: {SETTINGS.default_output})')
+    parser.add_argument('--stream-format', type=str, choices=[STREAM_FORMATS.Y4M, STREAM_FORMATS.RAW],
+                        default=DEFAULTS.STREAM_FORMAT,
+                        help='Format of frames streamed with --output -: YUV4MPEG2 or raw BGR24 '
+                             '(default: %(default)s)')
+    parser.add_argument('--constraint', type=str, choices=['width', 'height'],
+                        default=SETTINGS.default_constraint,
+                        help='Scaling constraint for folder mode (default: %(default)s)')
+    parser.add_argument('--recursive', action='store_true',
+                        help='Also use media files in subfolders of the input folder')
+    parser.add_argument('--include', type=str, action='append', default=None, metavar='GLOB',
+                        help='Only use files whose path relative to the input folder matches this pattern '
+                             '(repeatable)')
+    parser.add_argument('--exclude', type=str, action='append', default=None, metavar='GLOB',
+                        help='Skip files and subfolders whose relative path matches this pattern (repeatable)')
+    parser.add_argument('--natural-sort', action='store_true',
+                        help='Order numbers in file names by value, so clip2 comes before clip10')
+    parser.add_argument('--media-index', action='store_true',
+                        help='Keep media properties in a persistent index and probe only new or changed files '
+                             f'(path: {SETTINGS.media_index_path}, set MEDIA_INDEX_PATH)')
+    parser.add_argument('--layout', type=str, choices=[LAYOUTS.VSTACK, LAYOUTS.HSTACK, LAYOUTS.GRID],
+                        default=DEFAULTS.LAYOUT,
+                        help='Arrangement of the assets in folder mode: top to bottom, left to right or a grid '
+                             '(default: %(default)s)')
+    parser.add_argument('--columns', type=int, default=None,
+                        help='Number of columns of the grid layout (default: as many as rows)')
+    parser.add_argument('--max-width', type=int, default=None,
+                        help='Scale the output down to at most this width; videos are scaled as they are decoded')
+    parser.add_argument('--max-height', type=int, default=None,
+                        help='Scale the output down to at most this height')
+    parser.add_argument('--memory-budget-mb', type=int, default=None,
+                        help='Fail before rendering if the estimated frame memory exceeds this many MB')
+    parser.add_argument('--fps', type=float, default=None,
+                        help='Output frame rate; videos are resampled to it (default: frame rate of the first video)')
+    parser.add_argument('--start', type=float, default=0.0,
+                        help='Start the output this many seconds into the inputs; the decoders seek to it '
+                             '(default: %(default)s)')
+    parser.add_argument('--end', type=float, default=None,
+                        help='End the output this many seconds into the inputs (default: end of the output)')
+    parser.add_argument('--length', type=str,
+                        choices=[LENGTH_POLICIES.FIRST, LENGTH_POLICIES.SHORTEST, LENGTH_POLICIES.LONGEST,
+                                 LENGTH_POLICIES.LOOP],
+                        default=DEFAULTS.LENGTH_POLICY,
+                        help='Output length in folder mode: first, shortest or longest video, or loop shorter '
+                             'videos until the longest ends (default: %(default)s)')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Decode, composite and encode on separate threads')
+    parser.add_argument('--dedup', type=int, nargs='?', const=DEFAULTS.DEDUP_STRIDE, default=None, metavar='STRIDE',
+                        help='Skip resizing and compositing video frames that repeat the previous one, detected '
+                             'by comparing every STRIDE-th pixel (default stride: %(const)s; 1 compares all pixels)')
+    parser.add_argument('--yuv', action='store_true',
+                        help='Composite in planar YUV 4:2:0: images are converted once, videos per region, and '
+                             'frames reach ffmpeg or the stream without a BGR conversion; odd sizes are padded')
+    parser.add_argument('--audio', action='store_true',
+                        help='Copy the audio of the first video (or --video) into the output without re-encoding '
+                             'it, cut to the rendered frames (needs ffmpeg)')
+    parser.add_argument('--segments', type=int, default=1,
+                        help='Render this many frame ranges in parallel processes and join them '
+                             'without re-encoding (needs ffmpeg, default: %(default)s)')
+    parser.add_argument('--resumable', action='store_true',
+                        help='Render checkpointed segments next to the output; rerunning the same command '
+                             'after a crash skips finished segments (needs ffmpeg)')
+    parser.add_argument('--checkpoint-seconds', type=float, default=DEFAULTS.CHECKPOINT_SECONDS,
+                        help='Length of a resumable segment in seconds (default: %(default)s)')
+    parser.add_argument('--encoder', type=str,
+                        choices=[ENCODERS.OPENCV, ENCODERS.FFMPEG, ENCODERS.MJPG, ENCODERS.FFV1],
+                        default=SETTINGS.default_encoder,
+                        help='Encoder backend (default: %(default)s)')
+    parser.add_argument('--codec', type=str, default=None,
+                        help='FourCC for the opencv encoder or codec name for the ffmpeg encoder')
+    parser.add_argument('--preset', type=str, default=DEFAULTS.FFMPEG_PRESET,
+                        help='ffmpeg encoder preset (default: %(default)s)')
+    parser.add_argument('--crf', type=int, default=DEFAULTS.FFMPEG_CRF,
+                        help='ffmpeg constant rate factor, lower is better quality (default: %(default)s)')
+    parser.add_argument('--overlay-cache', action='store_true',
+                        help='Reuse resized images across runs from an on-disk cache '
+                             f'(directory: {SETTINGS.overlay_cache_dir}, set OVERLAY_CACHE_DIR)')
+    parser.add_argument('--overlay-cache-mb', type=int, default=DEFAULTS.OVERLAY_CACHE_MB,
+                        help='Maximum overlay cache size in MB (default: %(default)s)')
+    parser.add_argument('--frame-cache', action='store_true',
+                        help='Decode each video once into an on-disk cache of scaled frames and read later runs '
+                             f'from it (directory: {SETTINGS.frame_cache_dir}, set FRAME_CACHE_DIR)')
+    parser.add_argument('--frame-cache-mb', type=int, default=DEFAULTS.FRAME_CACHE_MB,
+                        help='Maximum frame cache size in MB (default: %(default)s)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always render, without looking up or storing finished outputs in the output cache '
+                             f'(directory: {SETTINGS.output_cache_dir}, set OUTPUT_CACHE_DIR)')
+    parser.add_argument('--output-cache-mb', type=int, default=DEFAULTS.OUTPUT_CACHE_MB,
+                        help='Maximum output cache size in MB (default: %(default)s)')
+    parser.add_argument('--cache-contents', action='store_true',
+                        help='Identify inputs in the output cache by their contents instead of size and '
+                             'modification time')
+    parser.add_argument('--stats', type=str, nargs='?', const='-', default=None,
+                        help='Write render statistics (per-stage times, fps, peak memory) as JSON '
+                             'to this path, or to stdout without a path')
+    parser.add_argument('--progress', action='store_true',
+                        help='Show progress with frames per second and ETA')
+    parser.add_argument('--crop-bottom', type=int, default=SETTINGS.default_crop_bottom,
+                        help='Number of pixels to crop from bottom of video (default: %(default)s)')
+    parser.add_argument('--image-position', type=str, choices=['top', 'bottom'],
+                        default=SETTINGS.default_image_position,
+                        help='Position of image relative to video (default: %(default)s)')
+
+    batch = parser.add_argument_group('batch mode')
+    batch.add_argument('--output-dir', type=str, default=None,
+                       help='Output directory for subfolder jobs (default: directory of --output)')
+    batch.add_argument('--workers', type=int, default=None,
+                       help='Number of worker processes (default: number of CPU cores)')
+    batch.add_argument('--threads', type=int, default=DEFAULTS.BATCH_THREADS,
+                       help='OpenCV threads per job unless the job sets its own (default: %(default)s)')
+    batch.add_argument('--shared-overlays', action='store_true',
+                       help='Resize each image once and share it with all workers through shared memory')
+    batch.add_argument('--report', type=str, default=DEFAULTS.REPORT_PATH,
+                       help='Path for the JSON job report (default: %(default)s)')
+
+    daemon = parser.add_argument_group('daemon mode')
+    daemon.add_argument('--watch', type=str, nargs='+', default=None, metavar='DIR',
+                        help='Keep running and render every subfolder of these folders to --output-dir '
+                             'once its files stop changing')
+    daemon.add_argument('--spool', type=str, default=None, metavar='DIR',
+                        help='Keep running and render every .json/.csv manifest dropped into this folder; '
+                             'manifests are moved to done/ or failed/ with a report')
+    daemon.add_argument('--poll-interval', type=float, default=DEFAULTS.POLL_INTERVAL,
+                        help='Seconds between scans for new jobs (default: %(default)s)')
+    daemon.add_argument('--settle-seconds', type=float, default=DEFAULTS.SETTLE_SECONDS,
+                        help='Seconds files must stay unchanged before they are read (default: %(default)s)')
+
+    return parser.parse_args(argv)
+
+
+def get_mode(args: argparse.Namespace) -> Tuple[str, Optional[str]]:
+    """Determine the operating mode from parsed arguments.
+
+    Returns:
+        Tuple of (mode, error). mode is 'probe', 'daemon', 'batch', 'folder', 'legacy', 'legacy_default' or 'error';
+        error is a message when mode is 'error', otherwise None.
+    """
+    daemon = args.watch or args.spool
+    if args.probe:
+        if args.batch or daemon:
+            return 'error', "--probe cannot be combined with --batch, --watch or --spool"
+        if args.input and (args.video or args.image):
+            return 'error', "--input cannot be combined with --video or --image"
+        if not (args.input or args.video or args.image):
+            return 'error', "--probe needs --input, --video or --image"
+        return 'probe', None
+
+    if args.output == '-' and (args.batch or daemon or args.segments > 1 or args.resumable or args.audio):
+        return 'error', ("--output - cannot be combined with --batch, --watch, --spool, --segments, --resumable "
+                         "or --audio")
+
+    if daemon:
+        if args.input or args.video or args.image or args.batch:
+            return 'error', "--watch and --spool cannot be combined with --input, --video, --image or --batch"
+        return 'daemon', None
+
+    if args.batch:
+        if args.input or args.video or args.image:
+            return 'error', "--batch cannot be combined with --input, --video or --image"
+        return 'batch', None
+
+    if args.input:
+        if args.video or args.image:
+            return 'error', "--input cannot be combined with --video or --image"
+        return 'folder', None
+
+    if args.video and args.image:
+        return 'legacy', None
+
+    if args.video or args.image:
+        return 'error', "--video and --image must be given together"
+
+    return 'legacy_default', None
@@ -1,26 +1,178 @@
-import cv2
-import numpy as np
+import copy
 import os
-from typing import List, Optional
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, ContextManager, Dict, Generator, Iterator, List, Optional, Tuple
+
+import numpy as np
 
 from .asset import Asset, ImageAsset, VideoAsset
-from .config import VIDEO_CODEC
-from .utils import discover_assets
+from .async_render import RenderJob, RenderPool
+from .checkpoint import Checkpoint, input_fingerprint
+from .config import DEFAULTS, LAYOUTS, LENGTH_POLICIES, PIX_FMTS
+from .encoders import AudioSource, EncoderOptions, create_encoder, find_ffmpeg
+from .frame_cache import FrameCache
+from .layout import ARRANGEMENTS, LayoutPlan, Rect, fit_layout, plan_layout
+from .media_index import MediaIndex
+from .memory import estimate_memory
+from .output_cache import OutputCache
+from .overlay_cache import OverlayCache
+from .pipeline import FrameFingerprint, FramePipeline, VideoRegion, copy_into
+from .segments import chunk_frames, concat_segments, split_frames
+from .shared_overlays import OverlayKey, SharedOverlay, overlay_key
+from .stats import Progress, RenderStats
+from .streaming import FrameStream
+from .timeline import POLICIES, TimedVideo, timeline_length
+from .utils import DiscoveryOptions, discover_assets
+from .yuv import I420Frame, I420Region, even_size
+
+
+class RenderCancelledError(Exception):
+    """Raised by a render whose cancel event was set."""
 
 
 class VideoCombiner:
     """Combines multiple assets into a single video by stacking them spatially."""
 
-    def __init__(self, constraint: str = 'width'):
+    def __init__(self, constraint: str = 'width', pipeline: bool = False,
+                 queue_size: int = DEFAULTS.QUEUE_SIZE, encoder: Optional[EncoderOptions] = None,
+                 segments: int = 1, overlay_cache: Optional[OverlayCache] = None,
+                 fps: Optional[float] = None, length: str = DEFAULTS.LENGTH_POLICY,
+                 stats: Optional[RenderStats] = None,
+                 shared_overlays: Optional[Dict[OverlayKey, SharedOverlay]] = None,
+                 resumable: bool = False, checkpoint_seconds: float = DEFAULTS.CHECKPOINT_SECONDS,
+                 output_cache: Optional[OutputCache] = None, layout: str = DEFAULTS.LAYOUT,
+                 columns: Optional[int] = None, max_width: Optional[int] = None,
+                 max_height: Optional[int] = None, memory_budget_mb: Optional[int] = None,
+                 cancel: Optional[threading.Event] = None, discovery: Optional[DiscoveryOptions] = None,
+                 media_index: Optional[MediaIndex] = None, dedup_stride: Optional[int] = None,
+                 yuv: bool = False, audio: bool = False, start_time: float = 0.0,
+                 end_time: Optional[float] = None, frame_cache: Optional[FrameCache] = None):
         """Initialize the combiner.
 
         Args:
             constraint: 'width' to scale all to same width,
                        'height' to scale images to match video height
+            pipeline: Run decoding, compositing and encoding on separate threads
+            queue_size: Frames buffered between pipeline stages
+            encoder: Encoder backend and quality settings (default: OpenCV mp4v)
+            segments: Number of frame ranges rendered in parallel processes and
+                      joined by stream copy (needs ffmpeg); 1 renders sequentially
+            overlay_cache: Cache of resized images reused across jobs
+            fps: Output frame rate (default: frame rate of the first video)
+            length: Output length in folder mode: 'first', 'shortest' or
+                    'longest' video, or 'loop' to loop shorter videos until
+                    the longest one ends
+            stats: Collects per-stage timings and reports progress; None
+                   renders without instrumentation
+            shared_overlays: Scaled images already published in shared memory,
+                             painted instead of decoding and resizing them
+            resumable: Render fixed-length segments with a checkpoint next to
+                       the output, so a rerun after a crash skips finished
+                       segments (needs ffmpeg to join them); with segments > 1
+                       that many segments are rendered in parallel
+            checkpoint_seconds: Length of a resumable segment in seconds
+            output_cache: Store of finished outputs; a job rendered before with
+                          the same inputs and options is placed from the cache
+                          instead of rendered
+            layout: How folder assets are arranged: 'vstack' (top to bottom),
+                    'hstack' (left to right) or 'grid'
+            columns: Number of grid columns (default: as many as rows)
+            max_width: Maximum output width; larger layouts are scaled down,
+                       keeping their aspect ratio, and videos are scaled as
+                       they are decoded
+            max_height: Maximum output height
+            memory_budget_mb: Frame memory a render may allocate; a render
+                              estimated to need more fails before it starts
+            cancel: Event that stops a render when set; the render releases
+                    its inputs and encoder and raises RenderCancelledError.
+                    Checked once per frame, in this process only
+            discovery: How media files are found in input folders (default:
+                       files directly in the folder, sorted by name)
+            media_index: Index of media properties; timelines and image
+                         sizes are read from it instead of opening files
+            dedup_stride: Detect video frames that repeat the previous one by
+                          comparing every dedup_stride-th pixel, and skip
+                          resizing and copying them; when every video
+                          repeats, the previous frame is written again.
+                          None composites every frame
+            yuv: Composite in planar YUV 4:2:0 instead of BGR: the painted
+                 images are converted once, each video frame is converted at
+                 its region size, and frames reach the ffmpeg encoders and
+                 the stream in yuv420p with half the bytes. Odd output sizes
+                 are padded to even. Not available with the pipeline
+            audio: Copy the audio track of the reference video (the first
+                   video of a folder, or the video of a single render) into
+                   the output without re-encoding it, cut to the rendered
+                   frames. Needs ffmpeg; frame streams carry no audio
+            start_time: Seconds of the output timeline to skip. Videos seek
+                        to the first frame needed instead of decoding the
+                        frames before it
+            end_time: Second of the output timeline to stop at (default: the
+                      end of the timeline)
+            frame_cache: Cache of decoded video frames reused across jobs;
+                         a video missing from it is decoded into it once,
+                         cropped and scaled to its region, and read from a
+                         memory map from then on
         """
         if constraint not in ('width', 'height'):
             raise ValueError(f"Invalid constraint: {constraint}. Must be 'width' or 'height'")
+        if queue_size < 1:
+            raise ValueError(f"Invalid queue size: {queue_size}. Must be at least 1")
+        if segments < 1:
+            raise ValueError(f"Invalid segment count: {segments}. Must be at least 1")
+        if fps is not None and fps <= 0:
+            raise ValueError(f"Invalid frame rate: {fps}. Must be positive")
+        if checkpoint_seconds <= 0:
+            raise ValueError(f"Invalid checkpoint length: {checkpoint_seconds}. Must be positive")
+        if length not in POLICIES:
+            raise ValueError(f"Invalid length policy: {length}. Must be one of {', '.join(POLICIES)}")
+        if layout not in ARRANGEMENTS:
+            raise ValueError(f"Invalid layout: {layout}. Must be one of {', '.join(ARRANGEMENTS)}")
+        if yuv and pipeline:
+            raise ValueError("YUV compositing runs on the sequential renderer only, not with the pipeline")
+        if start_time < 0:
+            raise ValueError(f"Invalid start time: {start_time}. Must not be negative")
+        if end_time is not None and end_time <= start_time:
+            raise ValueError(f"Invalid end time: {end_time}. Must be after the start time ({start_time})")
+        if dedup_stride is not None and dedup_stride < 1:
+            raise ValueError(f"Invalid dedup stride: {dedup_stride}. Must be at least 1")
+        if columns is not None and columns < 1:
+            raise ValueError(f"Invalid column count: {columns}. Must be at least 1")
+        for name, limit in (('maximum width', max_width), ('maximum height', max_height),
+                            ('memory budget', memory_budget_mb)):
+            if limit is not None and limit < 1:
+                raise ValueError(f"Invalid {name}: {limit}. Must be at least 1")
         self.constraint = constraint
+        self.pipeline = pipeline
+        self.queue_size = queue_size
+        self.encoder = encoder or EncoderOptions()
+        self.segments = segments
+        self.overlay_cache = overlay_cache
+        self.fps = fps
+        self.length = length
+        self.stats = stats
+        self.shared_overlays = shared_overlays
+        self.resumable = resumable
+        self.checkpoint_seconds = checkpoint_seconds
+        self.output_cache = output_cache
+        self.layout = layout
+        self.columns = columns
+        self.max_width = max_width
+        self.max_height = max_height
+        self.memory_budget_mb = memory_budget_mb
+        self.cancel = cancel
+        self.discovery = discovery
+        self.media_index = media_index
+        self.dedup_stride = dedup_stride
+        self.yuv = yuv
+        self.audio = audio
+        self.start_time = start_time
+        self.end_time = end_time
+        self.frame_cache = frame_cache
 
     def combine_from_folder(self, folder_path: str, output_path: str) -> None:
         """Combine all assets from a folder into a single video.
@@ -29,23 +181,35 @@ class VideoCombiner:
             folder_path: Path to folder containing media files
             output_path: Path for output video file
         """
-        asset_info = discover_assets(folder_path)
-        if not asset_info:
-            raise ValueError(f"No media files found in: {folder_path}")
+        with self._running():
+            asset_info = self._discover(folder_path)
+            if not asset_info:
+                raise ValueError(f"No media files found in: {folder_path}")
 
-        # Load all assets
-        assets: List[Asset] = []
-        for path, file_type in asset_info:
-            if file_type == 'image':
-                assets.append(ImageAsset(path))
-            else:
-                assets.append(VideoAsset(path))
+            key = self._cache_key([path for path, _ in asset_info], mode='folder',
+                                  file_types=[file_type for _, file_type in asset_info])
+            if self._from_cache(key, output_path):
+                return
 
-        try:
-            self._combine_assets(assets, output_path)
-        finally:
-            for asset in assets:
-                asset.release()
+            if self.resumable or self.segments > 1 or self._trimmed:
+                video_paths = [path for path, file_type in asset_info if file_type == 'video']
+                if not video_paths:
+                    raise ValueError("At least one video asset is required")
+                fps, frame_count = self._timeline(video_paths, self.length)
+                start, end = self._window(fps, frame_count, until_end=False)
+                audio = self._audio_source(video_paths[0], fps, start, end)
+                if self.resumable:
+                    self._combine_resumable('_load_and_combine_assets', (asset_info,),
+                                            [path for path, _ in asset_info], output_path, fps, start, end,
+                                            frame_count, audio)
+                elif self.segments > 1:
+                    self._combine_segmented('_load_and_combine_assets', (asset_info,), output_path, start, end,
+                                            frame_count, audio)
+                else:
+                    self._load_and_combine_assets(asset_info, output_path, start, end)
+            else:
+                self._load_and_combine_assets(asset_info, output_path)
+            self._to_cache(key, output_path)
 
     def combine_single(self, video_path: str, image_path: str, output_path: str,
                        crop_bottom: int = 0, image_position: str = 'bottom') -> None:
@@ -58,142 +222,830 @@ class VideoCombiner:
             crop_bottom: Pixels to crop from bottom of video
             image_position: 'top' or 'bottom' for image placement
         """
+        with self._running():
+            key = self._cache_key([video_path, image_path], mode='single', crop_bottom=crop_bottom,
+                                  image_position=image_position)
+            if self._from_cache(key, output_path):
+                return
+
+            args = (video_path, image_path, crop_bottom, image_position)
+            if self.resumable or self.segments > 1 or self._trimmed:
+                fps, frame_count = self._timeline([video_path], LENGTH_POLICIES.FIRST)
+                # Without an end time, frames are written until the video ends
+                start, end = self._window(fps, frame_count, until_end=True)
+                audio = self._audio_source(video_path, fps, start, end)
+                if self.resumable:
+                    self._combine_resumable('_load_and_combine_single', args, [video_path, image_path],
+                                            output_path, fps, start, end, frame_count, audio)
+                elif self.segments > 1:
+                    self._combine_segmented('_load_and_combine_single', args, output_path, start, end,
+                                            frame_count, audio)
+                else:
+                    self._load_and_combine_single(*args, output_path, start, end)
+            else:
+                self._load_and_combine_single(video_path, image_path, crop_bottom, image_position, output_path)
+            self._to_cache(key, output_path)
+
+    def combine_async(self, folder_path: str, output_path: str, pool: Optional[RenderPool] = None) -> RenderJob:
+        """Start combining all assets from a folder on a render pool; must be called from a running event loop.
+
+        The returned job is awaited for the result, cancelled like a task and
+        iterated with ``async for`` for progress events. Jobs render in this
+        process, so segments are not used: run many jobs on the pool instead.
+
+        Args:
+            folder_path: Path to folder containing media files
+            output_path: Path for output video file
+            pool: Pool to run on (default: a pool shared by all jobs)
+        """
+        return RenderJob(self._async_render('combine_from_folder', folder_path, output_path), output_path, pool)
+
+    def combine_single_async(self, video_path: str, image_path: str, output_path: str, crop_bottom: int = 0,
+                             image_position: str = 'bottom', pool: Optional[RenderPool] = None) -> RenderJob:
+        """Start combining a single video with a single image on a render pool (see combine_async)."""
+        return RenderJob(self._async_render('combine_single', video_path, image_path, output_path, crop_bottom,
+                                            image_position), output_path, pool)
+
+    def _async_render(self, method: str, *args: Any) -> Callable[[threading.Event, Callable[[Progress], None]], None]:
+        """Return a render for a RenderJob that runs method on its own copy of this combiner."""
+        def render(cancel: threading.Event, progress: Callable[[Progress], None]) -> None:
+            # Jobs share this combiner, so each gets its own cancel event and stats
+            job = copy.copy(self)
+            job.segments = 1
+            job.cancel = cancel
+            job.stats = RenderStats(progress=progress)
+            getattr(job, method)(*args)
+
+        return render
+
+    def plan_overlays(self, folder_path: str) -> List[Tuple[str, Tuple[int, int]]]:
+        """Return the path and scaled (width, height) of every image a folder render paints.
+
+        Images are not decoded; only their headers and the video metadata are read.
+
+        Args:
+            folder_path: Path to folder containing media files
+        """
+        assets = self._open_assets(self._discover(folder_path))
+        try:
+            videos = [asset for asset in assets if isinstance(asset, VideoAsset)]
+            if not videos:
+                return []
+            plan = self._plan(assets, assets.index(videos[0]))
+            return [(asset.path, rect.size) for asset, rect in zip(assets, plan.rects)
+                    if isinstance(asset, ImageAsset)]
+        finally:
+            self._release(assets)
+
+    def plan_single_overlay(self, video_path: str, image_path: str,
+                            crop_bottom: int = 0) -> Tuple[str, Tuple[int, int]]:
+        """Return the path and scaled (width, height) of the image a single render paints."""
+        video, image = self._open_assets([(video_path, 'video'), (image_path, 'image')])
+        try:
+            if not isinstance(video, VideoAsset) or not isinstance(image, ImageAsset):
+                raise ValueError(f"Invalid single job: {video_path}, {image_path}. Must be a video and an image")
+            return image.path, self._plan_single(video, image, crop_bottom, 'bottom').rects[1].size
+        finally:
+            self._release([video, image])
+
+    def iter_composited_frames(self, folder_path: str) -> FrameStream:
+        """Composite all assets from a folder frame by frame without encoding them.
+
+        Frames are rendered as they are consumed, so memory stays bounded by the
+        canvas and, with the pipeline, its queues. Segments are not used.
+
+        Args:
+            folder_path: Path to folder containing media files
+
+        Returns:
+            Stream of BGR frames, or I420 frames with yuv; each frame is
+            overwritten by a later one
+        """
+        asset_info = self._discover(folder_path)
+        if not asset_info:
+            raise ValueError(f"No media files found in: {folder_path}")
+
+        assets = self._open_assets(asset_info)
+        try:
+            start, end = 0, None
+            videos = [asset for asset in assets if isinstance(asset, VideoAsset)]
+            if self._trimmed and videos:
+                fps = self.fps or videos[0].fps
+                start, end = self._window(fps, timeline_length(videos, fps, self.length), until_end=False)
+            layout = self._layout_assets(assets, start, end)
+        except Exception:
+            self._release(assets)
+            raise
+        return self._stream(layout, lambda: self._release(assets))
+
+    def iter_composited_single(self, video_path: str, image_path: str, crop_bottom: int = 0,
+                               image_position: str = 'bottom') -> FrameStream:
+        """Composite a single video with a single image frame by frame without encoding them.
+
+        Args:
+            video_path: Path to input video
+            image_path: Path to input image
+            crop_bottom: Pixels to crop from bottom of video
+            image_position: 'top' or 'bottom' for image placement
+
+        Returns:
+            Stream of BGR frames, or I420 frames with yuv; each frame is
+            overwritten by a later one
+        """
+        assets = self._open_assets([(video_path, 'video'), (image_path, 'image')])
+        try:
+            video, image = assets
+            assert isinstance(video, VideoAsset) and isinstance(image, ImageAsset)
+            start, end = 0, None
+            if self._trimmed:
+                fps = self.fps or video.fps
+                start, end = self._window(fps, timeline_length([video], fps, LENGTH_POLICIES.FIRST),
+                                          until_end=True)
+            layout = self._layout_single(video, image, crop_bottom, image_position, start, end)
+        except Exception:
+            self._release(assets)
+            raise
+        return self._stream(layout, lambda: self._release(assets))
+
+    def _stream(self, layout: '_Layout', release: Callable[[], None]) -> FrameStream:
+        """Wrap the rendering of a layout in a frame stream."""
+        size, pix_fmt = self._output_format(layout)
+        return FrameStream(self._stream_frames(layout), layout.fps, size, layout.frame_count, release, pix_fmt)
+
+    def _output_format(self, layout: '_Layout') -> Tuple[Tuple[int, int], str]:
+        """Return the (width, height) and pixel format of the frames rendered from a layout."""
+        if self.yuv:
+            return even_size(*layout.size), PIX_FMTS.YUV420P
+        return layout.size, PIX_FMTS.BGR24
+
+    def _stream_frames(self, layout: '_Layout') -> Generator[np.ndarray, None, None]:
+        """Render a layout frame by frame, counting the frames when collecting stats."""
+        if self.pipeline:
+            pipeline = FramePipeline(layout.canvas, layout.regions, None, self.queue_size, self.stats,
+                                     self.dedup_stride)
+            frames = pipeline.frames(layout.frame_count)
+        elif self.yuv:
+            frames = self._frames_yuv(layout.canvas, layout.regions, layout.frame_count)
+        else:
+            frames = self._frames(layout.canvas, layout.regions, layout.frame_count)
+
+        stats = self.stats
+        if stats is None:
+            yield from frames
+            return
+
+        stats.start(layout.expected_frames)
+        try:
+            for frame in frames:
+                yield frame
+                stats.frames_written()
+        finally:
+            frames.close()
+            stats.finish()
+
+    def _cache_key(self, inputs: List[str], **options: Any) -> Optional[str]:
+        """Return the output cache key of a job, or None without an output cache."""
+        if self.output_cache is None:
+            return None
+        options.update(constraint=self.constraint, fps=self.fps, length=self.length, encoder=asdict(self.encoder),
+                       layout=self.layout, columns=self.columns, max_width=self.max_width,
+                       max_height=self.max_height, dedup_stride=self.dedup_stride, yuv=self.yuv,
+                       audio=self.audio, start_time=self.start_time, end_time=self.end_time)
+        return self.output_cache.key(inputs, options)
+
+    def _from_cache(self, key: Optional[str], output_path: str) -> bool:
+        """Place a cached output at output_path; return False if it has to be rendered."""
+        if self.output_cache is None or key is None:
+            return False
+        with self._stage('cache'):
+            if self.output_cache.fetch(key, output_path):
+                return True
+            self.output_cache.detach(output_path)
+        return False
+
+    def _to_cache(self, key: Optional[str], output_path: str) -> None:
+        """Add a rendered output to the output cache."""
+        if self.output_cache is not None and key is not None:
+            with self._stage('cache'):
+                self.output_cache.store(key, output_path)
+
+    @contextmanager
+    def _running(self) -> Iterator[None]:
+        """Run the wall clock of the stats, if any, around a render."""
+        if self.stats is None:
+            yield
+            return
+        self.stats.start()
+        try:
+            yield
+        finally:
+            self.stats.finish()
+
+    def _stage(self, stage: str) -> ContextManager[None]:
+        """Time a block as part of a stage when collecting stats."""
+        if self.stats is None:
+            return nullcontext()
+        return self.stats.measure(stage)
+
+    def _load_and_combine_assets(self, asset_info: List[Tuple[str, str]], output_path: str,
+                                 start: int = 0, end: Optional[int] = None) -> None:
+        """Load discovered assets and combine frames [start, end) of them."""
+        assets = self._open_assets(asset_info)
+        try:
+            self._combine_assets(assets, output_path, start, end)
+        finally:
+            self._release(assets)
+
+    def _open_assets(self, asset_info: List[Tuple[str, str]]) -> List[Asset]:
+        """Open discovered assets, releasing the ones already open if one fails."""
+        assets: List[Asset] = []
+        try:
+            for path, file_type in asset_info:
+                if file_type == 'image':
+                    assets.append(self._open_image(path))
+                else:
+                    assets.append(VideoAsset(path))
+        except Exception:
+            self._release(assets)
+            raise
+        return assets
+
+    @staticmethod
+    def _release(assets: List[Asset]) -> None:
+        """Release opened assets."""
+        for asset in assets:
+            asset.release()
+
+    def _load_and_combine_single(self, video_path: str, image_path: str, crop_bottom: int,
+                                 image_position: str, output_path: str,
+                                 start: int = 0, end: Optional[int] = None) -> None:
+        """Load a video and an image and combine frames [start, end) of them."""
         video = VideoAsset(video_path)
-        image = ImageAsset(image_path)
+        try:
+            image = self._open_image(image_path)
+        except Exception:
+            video.release()
+            raise
 
         try:
-            self._combine_video_and_image(video, image, output_path, crop_bottom, image_position)
+            self._combine_video_and_image(video, image, output_path, crop_bottom, image_position, start, end)
         finally:
             video.release()
             image.release()
 
+    def _combine_segmented(self, method: str, args: Tuple[Any, ...], output_path: str, start: int,
+                           end: Optional[int], frame_count: int, audio: Optional[AudioSource] = None) -> None:
+        """Render frame ranges of [start, end) in parallel processes and join them into output_path.
+
+        Args:
+            method: Name of the range-aware combine method each worker runs
+            args: Arguments for that method before output_path
+            output_path: Path for output video file
+            start: First frame to render
+            end: Frame to stop at, or None to let the last range run until the
+                 video ends
+            frame_count: Expected length of the timeline, split when end is None
+            audio: Audio track copied into the output when the segments are joined
+        """
+        # Fail before rendering anything if the segments cannot be joined
+        find_ffmpeg()
+
+        stop = frame_count if end is None else end
+        ranges: List[Tuple[int, Optional[int]]] = [
+            (start + first, start + last) for first, last in split_frames(stop - start, self.segments)]
+        if end is None:
+            ranges[-1] = (ranges[-1][0], None)
+
+        worker = copy.copy(self)
+        worker.segments = 1
+        worker.audio = False
+        # Workers run in other processes; progress is counted per finished segment
+        worker.stats = None
+        worker.cancel = None
+        render: Callable[..., None] = getattr(worker, method)
+        read_cached: Callable[..., None] = getattr(self._frame_cache_reader(worker), method)
+        if self.stats is not None:
+            self.stats.start(stop - start)
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        extension = os.path.splitext(output_path)[1]
+
+        with tempfile.TemporaryDirectory(prefix='.segments-', dir=output_dir) as tmpdir:
+            segment_paths = [os.path.join(tmpdir, f'segment_{i:04d}{extension}') for i in range(len(ranges))]
+            with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+                futures = {
+                    pool.submit(render if first == start else read_cached, *args, segment_path, first, last):
+                        (last if last is not None else stop) - first
+                    for segment_path, (first, last) in zip(segment_paths, ranges)
+                }
+                for future in as_completed(futures):
+                    future.result()
+                    if self.stats is not None:
+                        self.stats.frames_written(futures[future])
+            with self._stage('concat'):
+                concat_segments(segment_paths, output_path, audio)
+
+    def _combine_resumable(self, method: str, args: Tuple[Any, ...], inputs: List[str], output_path: str,
+                           fps: float, start: int, end: Optional[int], frame_count: int,
+                           audio: Optional[AudioSource] = None) -> None:
+        """Render fixed-length segments next to output_path, skipping finished ones, and join them.
+
+        Segments and their checkpoint are kept in '<output_path>.resume' until
+        the output is assembled. A segment is recorded only after its file is
+        complete, so a render killed at any point resumes at the first segment
+        that did not finish.
+
+        Args:
+            method: Name of the range-aware combine method that renders a segment
+            args: Arguments for that method before output_path
+            inputs: Input files, fingerprinted so changed inputs start over
+            output_path: Path for output video file
+            fps: Output frame rate
+            start: First frame to render
+            end: Frame to stop at, or None to let the last segment run until
+                 the video ends
+            frame_count: Expected length of the timeline, used when end is None
+            audio: Audio track copied into the output when the segments are joined
+        """
+        # Fail before rendering anything if the segments cannot be joined
+        find_ffmpeg()
+
+        chunk = max(1, round(self.checkpoint_seconds * fps))
+        stop = frame_count if end is None else end
+        ranges: List[Tuple[int, Optional[int]]] = [
+            (start + first, start + last) for first, last in chunk_frames(stop - start, chunk)]
+        if end is None:
+            ranges[-1] = (ranges[-1][0], None)
+        params = {
+            'method': method,
+            'args': args,
+            'inputs': input_fingerprint(inputs),
+            'constraint': self.constraint,
+            'layout': self.layout,
+            'columns': self.columns,
+            'max_width': self.max_width,
+            'max_height': self.max_height,
+            'dedup_stride': self.dedup_stride,
+            'yuv': self.yuv,
+            'fps': fps,
+            'length': self.length,
+            'encoder': asdict(self.encoder),
+            'ranges': ranges,
+        }
+        checkpoint = Checkpoint.open(output_path + '.resume', params, os.path.splitext(output_path)[1])
+        pending = [i for i in range(len(ranges)) if not checkpoint.is_complete(i)]
+
+        worker = copy.copy(self)
+        worker.segments = 1
+        worker.resumable = False
+        worker.audio = False
+        # Progress is counted per finished segment
+        worker.stats = None
+        if self.stats is not None:
+            self.stats.start(sum((last if last is not None else stop) - first
+                                 for first, last in (ranges[i] for i in pending)))
+
+        def finished(i: int) -> None:
+            checkpoint.mark_complete(i)
+            if self.stats is not None:
+                first, last = ranges[i]
+                self.stats.frames_written((last if last is not None else stop) - first)
+
+        if self.segments > 1:
+            # Events cannot be sent to other processes
+            worker.cancel = None
+        render: Callable[..., None] = getattr(worker, method)
+        if self.segments > 1 and len(pending) > 1:
+            errors = []
+            with ProcessPoolExecutor(max_workers=min(self.segments, len(pending))) as pool:
+                reader: Callable[..., None] = getattr(self._frame_cache_reader(worker), method)
+                futures = {pool.submit(render if i == pending[0] else reader, *args, checkpoint.partial_path(i),
+                                       *ranges[i]): i for i in pending}
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        # Keep recording the segments that do finish
+                        errors.append(e)
+                        continue
+                    finished(futures[future])
+            if errors:
+                raise errors[0]
+        else:
+            for i in pending:
+                render(*args, checkpoint.partial_path(i), *ranges[i])
+                finished(i)
+
+        with self._stage('concat'):
+            concat_segments([checkpoint.segment_path(i) for i in range(len(ranges))], output_path, audio)
+        checkpoint.remove()
+
+    @staticmethod
+    def _frame_cache_reader(worker: 'VideoCombiner') -> 'VideoCombiner':
+        """Return a copy of a segment worker that reads the frame cache without filling it.
+
+        Workers run at the same time, so only the first one fills the cache
+        rather than each decoding every video in full.
+        """
+        if worker.frame_cache is None:
+            return worker
+        reader = copy.copy(worker)
+        reader.frame_cache = worker.frame_cache.read_only()
+        return reader
+
     def _combine_video_and_image(self, video: VideoAsset, image: ImageAsset,
                                   output_path: str, crop_bottom: int,
-                                  image_position: str) -> None:
-        """Internal method to combine a video with an image."""
-        video_width = video.width
-        video_height = video.height - crop_bottom
+                                  image_position: str, start: int = 0,
+                                  end: Optional[int] = None) -> None:
+        """Internal method to combine frames [start, end) of a video with an image.
 
-        # Scale image to match video width
-        aspect_ratio = image.width / image.height
-        image_height = int(video_width / aspect_ratio)
-        scaled_image = cv2.resize(image.image, (video_width, image_height))
+        With end None, frames are written until the video ends.
+        """
+        self._write_video(self._layout_single(video, image, crop_bottom, image_position, start, end), output_path)
 
-        # Create video writer
-        combined_height = video_height + image_height
-        fourcc = cv2.VideoWriter_fourcc(*VIDEO_CODEC.MP4V)
-        out = cv2.VideoWriter(output_path, fourcc, video.fps, (video_width, combined_height))
+    def _layout_single(self, video: VideoAsset, image: ImageAsset, crop_bottom: int,
+                       image_position: str, start: int = 0, end: Optional[int] = None) -> '_Layout':
+        """Paint the image into a new canvas and place the video below or above it."""
+        plan = self._plan_single(video, image, crop_bottom, image_position)
+        video_rect, image_rect = plan.rects if image_position == 'bottom' else plan.rects[::-1]
+        fps = self.fps or video.fps
+        region = self._region(video, fps, start, False, video_rect, video.height - crop_bottom)
+        self._check_memory(plan, [region], [(image, image_rect.size)])
+
+        # Allocate the output frame once; the image is painted a single time
+        # and every video frame is decoded into its own slice.
+        shape = (plan.height, plan.width, 3)
+        canvas = np.empty(shape, dtype=np.uint8) if plan.covered else np.zeros(shape, dtype=np.uint8)
+        with self._stage('images'):
+            self._paint_image(image, image_rect.view(canvas))
+        total = end if end is not None else timeline_length([video], fps, LENGTH_POLICIES.FIRST)
+        return _Layout(canvas, [region], fps, None if end is None else end - start, max(0, total - start),
+                       self._audio_source(video.path, fps, start, end))
 
-        # Process each frame
-        for frame in video.frames():
-            if crop_bottom > 0:
-                frame = frame[0:video_height, :]
+    def _plan_single(self, video: VideoAsset, image: ImageAsset, crop_bottom: int,
+                     image_position: str) -> LayoutPlan:
+        """Plan a legacy render: the video and the image stacked, scaled to the video width."""
+        sizes = ((video.width, video.height - crop_bottom), (image.width, image.height))
+        if image_position == 'top':
+            plan = plan_layout(sizes[::-1], 1, LAYOUTS.VSTACK, 'width')
+        else:
+            plan = plan_layout(sizes, 0, LAYOUTS.VSTACK, 'width')
+        return fit_layout(plan, self.max_width, self.max_height)
+
+    def _combine_assets(self, assets: List[Asset], output_path: str,
+                        start: int = 0, end: Optional[int] = None) -> None:
+        """Combine frames [start, end) of multiple assets by stacking them spatially.
+
+        With end None, the whole timeline is written; its length follows the
+        length policy.
+        """
+        self._write_video(self._layout_assets(assets, start, end), output_path)
 
-            if image_position == 'top':
-                combined = np.vstack((scaled_image, frame))
+    def _layout_assets(self, assets: List[Asset], start: int = 0, end: Optional[int] = None) -> '_Layout':
+        """Stack the assets into a new canvas, painting the images and placing the videos."""
+        videos = [asset for asset in assets if isinstance(asset, VideoAsset)]
+        if not videos:
+            raise ValueError("At least one video asset is required")
+
+        # The first video gives the reference dimensions and the default FPS
+        fps = self.fps or videos[0].fps
+        frame_count = timeline_length(videos, fps, self.length)
+        plan = self._plan(assets, assets.index(videos[0]))
+
+        regions = []
+        images = []
+        for asset, rect in zip(assets, plan.rects):
+            if isinstance(asset, ImageAsset):
+                images.append((asset, rect))
             else:
-                combined = np.vstack((frame, scaled_image))
-            out.write(combined)
+                assert isinstance(asset, VideoAsset)
+                # Only videos that end before the timeline does need to loop
+                loop = (self.length == LENGTH_POLICIES.LOOP
+                        and timeline_length([asset], fps, LENGTH_POLICIES.FIRST) < frame_count)
+                regions.append(self._region(asset, fps, start, loop, rect, asset.height))
+        self._check_memory(plan, regions, [(image, rect.size) for image, rect in images])
+
+        # Allocate the output frame once and paint the static images into it;
+        # cells not covered by an asset stay black.
+        shape = (plan.height, plan.width, 3)
+        canvas = np.empty(shape, dtype=np.uint8) if plan.covered else np.zeros(shape, dtype=np.uint8)
+        for image, rect in images:
+            with self._stage('images'):
+                self._paint_image(image, rect.view(canvas))
+
+        if end is None:
+            end = frame_count
+        return _Layout(canvas, regions, fps, end - start, end - start,
+                       self._audio_source(videos[0].path, fps, start, end))
+
+    @property
+    def _trimmed(self) -> bool:
+        """Whether start_time or end_time select part of the timeline."""
+        return self.start_time > 0 or self.end_time is not None
+
+    def _window(self, fps: float, frame_count: int, until_end: bool) -> Tuple[int, Optional[int]]:
+        """Return the frames [start, end) of a timeline selected by start_time and end_time.
+
+        Args:
+            fps: Output frame rate
+            frame_count: Length of the timeline
+            until_end: Return None as end without an end time, so frames are
+                       written until the video ends
+
+        Raises:
+            ValueError: If the window starts after the timeline ends
+        """
+        start = round(self.start_time * fps)
+        if start >= frame_count:
+            raise ValueError(f"Invalid start time: {self.start_time}. Must be before the end of the output "
+                             f"({frame_count / fps:.3f}s)")
+        if self.end_time is None:
+            return start, None if until_end else frame_count
+        return start, max(start + 1, min(round(self.end_time * fps), frame_count))
+
+    def _audio_source(self, path: str, fps: float, start: int, end: Optional[int]) -> Optional[AudioSource]:
+        """Return the audio of frames [start, end) of a reference video, or None without audio.
+
+        With end None, the audio runs until the video ends.
+        """
+        if not self.audio:
+            return None
+        return AudioSource(path, start / fps, None if end is None else (end - start) / fps)
+
+    def _plan(self, assets: List[Asset], reference: int) -> LayoutPlan:
+        """Plan where the assets of a folder are drawn; plans are shared by assets of the same sizes."""
+        sizes = tuple((asset.width, asset.height) for asset in assets)
+        plan = plan_layout(sizes, reference, self.layout, self.constraint, self.columns)
+        return fit_layout(plan, self.max_width, self.max_height)
 
+    def _region(self, video: VideoAsset, fps: float, start: int, loop: bool, rect: Rect,
+                source_height: int) -> VideoRegion:
+        """Place a video in a canvas rectangle.
+
+        A video larger than its rectangle is scaled down as each frame is
+        decoded, so only one frame of it is ever held at full size. With a
+        frame cache, frames come from it already cropped and scaled.
+        """
+        scaled = rect.width * rect.height < video.width * source_height
+        if self.frame_cache is not None:
+            with self._stage('decode'):
+                cached = self.frame_cache.open(video, rect.size if scaled else None, source_height)
+            if cached is not None:
+                # The cache entry already holds every frame, so loops are not cached in memory again
+                return VideoRegion(TimedVideo(cached, fps, start, loop, cache_bytes=0), rect.y, rect.height,
+                                   cached.height, rect.x, rect.width)
+        if scaled:
+            # Repeated frames are detected before scaling, so they are not scaled again
+            dedup = FrameFingerprint(self.dedup_stride).changed if self.dedup_stride is not None else None
+            reader = TimedVideo(video, fps, start, loop, size=rect.size, source_height=source_height, dedup=dedup)
+            return VideoRegion(reader, rect.y, rect.height, rect.height, rect.x, rect.width)
+        return VideoRegion(TimedVideo(video, fps, start, loop), rect.y, rect.height, source_height, rect.x,
+                           rect.width)
+
+    def _check_memory(self, plan: LayoutPlan, regions: List[VideoRegion],
+                      images: List[Tuple[ImageAsset, Tuple[int, int]]]) -> None:
+        """Fail before allocating anything if the render would exceed the memory budget."""
+        if self.memory_budget_mb is None:
+            return
+        queue_size = self.queue_size if self.pipeline else None
+        estimate = estimate_memory(plan.size, regions, images, queue_size, self.overlay_cache is not None,
+                                   self.yuv)
+        estimate.check(self.memory_budget_mb)
+
+    def _write_video(self, layout: '_Layout', output_path: str) -> None:
+        """Render a layout and encode it to output_path."""
+        if self.stats is not None:
+            self.stats.start(layout.expected_frames)
+
+        # Create video writer
+        size, pix_fmt = self._output_format(layout)
+        with self._stage('encode'):
+            out = create_encoder(self.encoder, output_path, layout.fps, size, pix_fmt, layout.audio)
+
+        try:
+            self._render(layout.canvas, layout.regions, out.write, layout.frame_count)
+        except BaseException:
+            out.abort()
+            raise
         out.release()
 
-    def _combine_assets(self, assets: List[Asset], output_path: str) -> None:
-        """Combine multiple assets into a single video by stacking spatially."""
-        # Find the first video to get FPS and reference dimensions
-        video_asset: Optional[VideoAsset] = None
-        for asset in assets:
-            if isinstance(asset, VideoAsset):
-                video_asset = asset
-                break
+    def _discover(self, folder_path: str) -> List[Tuple[str, str]]:
+        """Find the media files of an input folder."""
+        return discover_assets(folder_path, self.discovery)
 
-        if video_asset is None:
-            raise ValueError("At least one video asset is required")
+    def _open_image(self, path: str) -> ImageAsset:
+        """Open an image, without decoding it if the overlay cache or media index knows its size."""
+        if self.overlay_cache is not None:
+            return self.overlay_cache.open_image(path)
+        if self.media_index is not None:
+            info = self.media_index.probe(path)
+            return ImageAsset(path, size=(info.width, info.height))
+        return ImageAsset(path)
 
-        fps = video_asset.fps
-        frame_count = video_asset.frame_count
-        ref_width = video_asset.width
-        ref_height = video_asset.height
+    def _timeline(self, video_paths: List[str], length: str) -> Tuple[float, int]:
+        """Return the output frame rate and number of frames of a timeline of video files."""
+        if self.media_index is not None:
+            infos = self.media_index.probe_all(video_paths)
+            fps = self.fps or infos[0].fps or 0.0
+            return fps, timeline_length(infos, fps, length)
+        videos = [VideoAsset(path) for path in video_paths]
+        try:
+            fps = self.fps or videos[0].fps
+            return fps, timeline_length(videos, fps, length)
+        finally:
+            for video in videos:
+                video.release()
 
-        # Calculate scaled dimensions for each asset
-        scaled_assets = []
-        total_height = 0
+    def _paint_image(self, image: ImageAsset, target: np.ndarray) -> None:
+        """Paint an image into a canvas region, resized to fill it."""
+        size = (target.shape[1], target.shape[0])
+        shared = self.shared_overlays.get(overlay_key(image.path, size)) if self.shared_overlays else None
+        if shared is not None:
+            shared.copy_to(target)
+        elif self.overlay_cache is not None:
+            np.copyto(target, self.overlay_cache.get(image, size))
+        else:
+            image.get_scaled(*size, dst=target)
 
-        for asset in assets:
-            if self.constraint == 'width':
-                # Scale all to same width
-                if isinstance(asset, ImageAsset):
-                    aspect_ratio = asset.width / asset.height
-                    new_height = int(ref_width / aspect_ratio)
-                    scaled_assets.append({
-                        'asset': asset,
-                        'width': ref_width,
-                        'height': new_height
-                    })
-                    total_height += new_height
-                else:
-                    # Video - use as is (it's the reference)
-                    scaled_assets.append({
-                        'asset': asset,
-                        'width': ref_width,
-                        'height': ref_height
-                    })
-                    total_height += ref_height
+    def _render(self, canvas: np.ndarray, regions: List[VideoRegion],
+                write: Callable[[np.ndarray], None], frame_count: Optional[int] = None) -> None:
+        """Fill the video regions of the canvas frame by frame and write each frame.
+
+        Args:
+            canvas: Output frame with the static images already painted
+            regions: Video regions to fill on every frame
+            write: Callable that encodes one finished frame, BGR or, with
+                   yuv, I420
+            frame_count: Number of frames to write, or None to stop when every
+                         video has ended. Videos that end early are shown black.
+        """
+        stats = self.stats
+        if stats is not None:
+            write = stats.timed_writes('encode', write)
+        if self.cancel is not None:
+            write = _cancellable(write, self.cancel)
+
+        if self.pipeline:
+            FramePipeline(canvas, regions, write, self.queue_size, stats, self.dedup_stride).run(frame_count)
+            return
+
+        frames = self._frames_yuv if self.yuv else self._frames
+        for frame in frames(canvas, regions, frame_count):
+            write(frame)
+
+    def _frames(self, canvas: np.ndarray, regions: List[VideoRegion],
+                frame_count: Optional[int] = None) -> Generator[np.ndarray, None, None]:
+        """Fill the video regions of the canvas frame by frame, yielding the canvas after each frame.
+
+        Args:
+            canvas: Output frame with the static images already painted
+            regions: Video regions to fill on every frame
+            frame_count: Number of frames to yield, or None to stop when every
+                         video has ended. Videos that end early are shown black.
+        """
+        stats = self.stats
+
+        # Stage functions are bound once; with stats they are wrapped in timers
+        read = [region.asset.get_frame for region in regions]
+        copy_frame = copy_into
+        changed = []
+        if self.dedup_stride is not None:
+            changed = [FrameFingerprint(self.dedup_stride).changed for _ in regions]
+        if stats is not None:
+            read = [stats.timed('decode', get_frame) for get_frame in read]
+            copy_frame = stats.timed('composite', copy_into)
+            changed = [stats.timed('composite', check) for check in changed]
+
+        # Frames that need cropping or resizing are decoded into a reusable buffer first
+        # Repeated frames decoded in place come back as the same view and are not copied
+        rows = [region.rows(canvas) for region in regions]
+        buffers: List[Optional[np.ndarray]] = []
+        for region, target in zip(regions, rows):
+            if (region.asset.height, region.asset.width) == target.shape[:2]:
+                buffers.append(None)
             else:
-                # constraint == 'height': scale images to video height
-                if isinstance(asset, ImageAsset):
-                    aspect_ratio = asset.width / asset.height
-                    new_width = int(ref_height * aspect_ratio)
-                    # For height constraint, we still need same width for vstack
-                    # So we use ref_width but scale based on height
-                    new_height = ref_height
-                    scaled_assets.append({
-                        'asset': asset,
-                        'width': ref_width,
-                        'height': new_height
-                    })
-                    total_height += new_height
+                buffers.append(np.empty((region.asset.height, region.asset.width, 3), dtype=np.uint8))
+        ended = [False] * len(regions)
+        written = 0
+        while frame_count is None or written < frame_count:
+            repeated = written > 0 and bool(changed)
+            for i, region in enumerate(regions):
+                if ended[i]:
+                    continue
+                frame = read[i](dst=rows[i] if buffers[i] is None else buffers[i])
+                if frame is None:
+                    # Video ended, leave its region black
+                    rows[i][:] = 0
+                    ended[i] = True
+                    repeated = False
+                elif changed and not changed[i](frame[:region.source_height]):
+                    # The canvas still shows this frame
+                    continue
                 else:
-                    scaled_assets.append({
-                        'asset': asset,
-                        'width': ref_width,
-                        'height': ref_height
-                    })
-                    total_height += ref_height
+                    repeated = False
+                    if frame is not rows[i]:
+                        copy_frame(frame[:region.source_height], rows[i])
+            if frame_count is None and all(ended):
+                break
+            if repeated and stats is not None:
+                stats.frames_deduplicated()
+            yield canvas
+            written += 1
 
-        # Create video writer
-        fourcc = cv2.VideoWriter_fourcc(*VIDEO_CODEC.MP4V)
-        out = cv2.VideoWriter(output_path, fourcc, fps, (ref_width, total_height))
-
-        # Pre-scale all images
-        scaled_images = {}
-        for i, info in enumerate(scaled_assets):
-            if isinstance(info['asset'], ImageAsset):
-                scaled_images[i] = cv2.resize(
-                    info['asset'].image,
-                    (info['width'], info['height'])
-                )
-
-        # Reset all videos
-        for asset in assets:
-            asset.reset()
-
-        # Process frame by frame
-        for _ in range(frame_count):
-            frames = []
-            for i, info in enumerate(scaled_assets):
-                asset = info['asset']
-                if isinstance(asset, ImageAsset):
-                    frames.append(scaled_images[i])
+    def _frames_yuv(self, canvas: np.ndarray, regions: List[VideoRegion],
+                    frame_count: Optional[int] = None) -> Generator[np.ndarray, None, None]:
+        """Like _frames, but composite in planar YUV 4:2:0 and yield (height * 3 / 2, width) I420 frames.
+
+        The canvas with its painted images is converted once; after that, only
+        the video regions are converted, each at its own size, and stacked into
+        the planes. A BGR copy of the canvas, padded to even, keeps the pixels
+        along odd region edges that their chroma is converted from.
+        """
+        stats = self.stats
+
+        with self._stage('composite'):
+            height, width = canvas.shape[:2]
+            edges = np.zeros(even_size(width, height)[::-1] + (3,), dtype=np.uint8)
+            edges[:height, :width] = canvas
+            frame = I420Frame.from_bgr(edges)
+        targets = []
+        for region in regions:
+            right = width if region.width is None else region.left + region.width
+            targets.append(I420Region(frame, edges, region.left, region.top, right, region.top + region.height))
+        convert_edges = [target.convert_edges for target in targets]
+
+        read = [region.asset.get_frame for region in regions]
+        put = [target.put for target in targets]
+        changed = []
+        if self.dedup_stride is not None:
+            changed = [FrameFingerprint(self.dedup_stride).changed for _ in regions]
+        if stats is not None:
+            read = [stats.timed('decode', get_frame) for get_frame in read]
+            put = [stats.timed('composite', convert) for convert in put]
+            changed = [stats.timed('composite', check) for check in changed]
+            convert_edges = [stats.timed('composite', convert) for convert in convert_edges]
+
+        # Videos are decoded in BGR, which is all OpenCV's capture delivers, into their own buffers
+        buffers = [np.empty((region.asset.height, region.asset.width, 3), dtype=np.uint8) for region in regions]
+        ended = [False] * len(regions)
+        written = 0
+        while frame_count is None or written < frame_count:
+            repeated = written > 0 and bool(changed)
+            for i, region in enumerate(regions):
+                if ended[i]:
+                    continue
+                decoded = read[i](dst=buffers[i])
+                if decoded is None:
+                    # Video ended, leave its region black
+                    targets[i].clear()
+                    ended[i] = True
+                    repeated = False
+                elif changed and not changed[i](decoded[:region.source_height]):
+                    continue
                 else:
-                    frame = asset.get_frame()
-                    if frame is None:
-                        # Video ended, use black frame
-                        frame = np.zeros((info['height'], info['width'], 3), dtype=np.uint8)
-                    elif frame.shape[1] != info['width'] or frame.shape[0] != info['height']:
-                        frame = cv2.resize(frame, (info['width'], info['height']))
-                    frames.append(frame)
+                    repeated = False
+                    put[i](decoded[:region.source_height])
+            if frame_count is None and all(ended):
+                break
+            if not repeated:
+                for convert in convert_edges:
+                    convert()
+            if repeated and stats is not None:
+                stats.frames_deduplicated()
+            yield frame.data
+            written += 1
 
-            combined = np.vstack(frames)
-            out.write(combined)
 
-        out.release()
+@dataclass(frozen=True)
+class _Layout:
+    """A canvas with its images painted and the video regions to fill on every frame.
+
+    Attributes:
+        canvas: Output frame with the static images already painted
+        regions: Video regions to fill on every frame
+        fps: Output frame rate
+        frame_count: Number of frames to render, None to render until every video ends
+        expected_frames: Best estimate of the number of frames, for progress
+        audio: Audio track to copy into an encoded output, None for none
+    """
+
+    canvas: np.ndarray
+    regions: List[VideoRegion]
+    fps: float
+    frame_count: Optional[int]
+    expected_frames: int
+    audio: Optional[AudioSource] = None
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """Output (width, height) in pixels."""
+        return self.canvas.shape[1], self.canvas.shape[0]
+
+
+def _cancellable(write: Callable[[np.ndarray], None], cancel: threading.Event) -> Callable[[np.ndarray], None]:
+    """Wrap a function that writes one frame so it raises RenderCancelledError once cancel is set."""
+    def wrapper(frame: np.ndarray) -> None:
+        if cancel.is_set():
+            raise RenderCancelledError()
+        write(frame)
+
+    return wrapper
@@ -1,15 +1,42 @@
 """Configuration module."""
 
-from .constants import DEFAULTS, FILE_EXTENSIONS, VIDEO_CODEC, Defaults, FileExtensions, VideoCodec
+from .constants import (
+    DEFAULTS,
+    ENCODERS,
+    FILE_EXTENSIONS,
+    LAYOUTS,
+    LENGTH_POLICIES,
+    PIX_FMTS,
+    STREAM_FORMATS,
+    VIDEO_CODEC,
+    Defaults,
+    Encoders,
+    FileExtensions,
+    Layouts,
+    LengthPolicies,
+    PixelFormats,
+    StreamFormats,
+    VideoCodec,
+)
 from .settings import SETTINGS, Settings
 
 __all__ = [
     'DEFAULTS',
+    'ENCODERS',
     'FILE_EXTENSIONS',
+    'LAYOUTS',
+    'LENGTH_POLICIES',
+    'PIX_FMTS',
+    'STREAM_FORMATS',
     'VIDEO_CODEC',
     'SETTINGS',
     'Defaults',
+    'Encoders',
     'FileExtensions',
+    'Layouts',
+    'LengthPolicies',
+    'PixelFormats',
+    'StreamFormats',
     'VideoCodec',
     'Settings',
 ]
@@ -21,6 +21,36 @@ class Defaults:
     CONSTRAINT: str = 'width'
     IMAGE_POSITION: str = 'bottom'
     CROP_BOTTOM: int = 0
+    QUEUE_SIZE: int = 4
+    ENCODER: str = 'opencv'
+    FFMPEG_CODEC: str = 'libx264'
+    FFMPEG_PRESET: str = 'medium'
+    FFMPEG_CRF: int = 23
+    BATCH_THREADS: int = 1
+    REPORT_PATH: str = 'output/batch_report.json'
+    OVERLAY_CACHE_DIR: str = '.cache/overlays'
+    OVERLAY_CACHE_MB: int = 1024
+    OVERLAY_MEMO_SIZE: int = 32
+    LENGTH_POLICY: str = 'first'
+    LOOP_CACHE_MB: int = 256
+    PROGRESS_INTERVAL: float = 0.5
+    BENCH_MEDIA_DIR: str = '.cache/bench'
+    BENCH_RESULTS_PATH: str = 'output/benchmark.json'
+    BENCH_TOLERANCE: float = 0.1
+    STREAM_FORMAT: str = 'y4m'
+    CHECKPOINT_SECONDS: float = 60.0
+    OUTPUT_CACHE_DIR: str = '.cache/outputs'
+    OUTPUT_CACHE_MB: int = 4096
+    FRAME_CACHE_DIR: str = '.cache/frames'
+    FRAME_CACHE_MB: int = 8192
+    LAYOUT: str = 'vstack'
+    LAYOUT_CACHE_SIZE: int = 64
+    ASYNC_WORKERS: int = 2
+    POLL_INTERVAL: float = 1.0
+    SETTLE_SECONDS: float = 2.0
+    RETRY_MAX_SECONDS: float = 300.0
+    MEDIA_INDEX_PATH: str = '.cache/media.sqlite'
+    DEDUP_STRIDE: int = 4
 
 
 @dataclass(frozen=True)
@@ -28,8 +58,60 @@ class VideoCodec:
     """Video codec constants."""
 
     MP4V: str = 'mp4v'
+    MJPG: str = 'MJPG'
+    FFV1: str = 'ffv1'
+
+
+@dataclass(frozen=True)
+class Encoders:
+    """Encoder backend names."""
+
+    OPENCV: str = 'opencv'
+    FFMPEG: str = 'ffmpeg'
+    MJPG: str = 'mjpg'
+    FFV1: str = 'ffv1'
+
+
+@dataclass(frozen=True)
+class LengthPolicies:
+    """How the output length follows the videos of a folder."""
+
+    FIRST: str = 'first'
+    SHORTEST: str = 'shortest'
+    LONGEST: str = 'longest'
+    LOOP: str = 'loop'
+
+
+@dataclass(frozen=True)
+class StreamFormats:
+    """Formats for frames streamed to stdout."""
+
+    Y4M: str = 'y4m'
+    RAW: str = 'raw'
+
+
+@dataclass(frozen=True)
+class PixelFormats:
+    """Memory layouts of composited frames, named as ffmpeg names them."""
+
+    BGR24: str = 'bgr24'
+    YUV420P: str = 'yuv420p'
+
+
+@dataclass(frozen=True)
+class Layouts:
+    """How the assets of a folder are arranged on the output canvas."""
+
+    VSTACK: str = 'vstack'
+    HSTACK: str = 'hstack'
+    GRID: str = 'grid'
 
 
 FILE_EXTENSIONS = FileExtensions()
 DEFAULTS = Defaults()
 VIDEO_CODEC = VideoCodec()
+ENCODERS = Encoders()
+LENGTH_POLICIES = LengthPolicies()
+LAYOUTS = Layouts()
+STREAM_FORMATS = StreamFormats()
+PIX_FMTS = PixelFormats()
@@ -16,6 +16,12 @@ class Settings:
     default_constraint: str = os.getenv('DEFAULT_CONSTRAINT', DEFAULTS.CONSTRAINT)
     default_image_position: str = os.getenv('DEFAULT_IMAGE_POSITION', DEFAULTS.IMAGE_POSITION)
     default_crop_bottom: int = int(os.getenv('DEFAULT_CROP_BOTTOM', str(DEFAULTS.CROP_BOTTOM)))
+    default_encoder: str = os.getenv('DEFAULT_ENCODER', DEFAULTS.ENCODER)
+    ffmpeg_path: str = os.getenv('FFMPEG_PATH', 'ffmpeg')
+    overlay_cache_dir: str = os.getenv('OVERLAY_CACHE_DIR', DEFAULTS.OVERLAY_CACHE_DIR)
+    output_cache_dir: str = os.getenv('OUTPUT_CACHE_DIR', DEFAULTS.OUTPUT_CACHE_DIR)
+    frame_cache_dir: str = os.getenv('FRAME_CACHE_DIR', DEFAULTS.FRAME_CACHE_DIR)
+    media_index_path: str = os.getenv('MEDIA_INDEX_PATH', DEFAULTS.MEDIA_INDEX_PATH)
 
 
 SETTINGS = Settings()
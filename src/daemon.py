@@ -0,0 +1,311 @@
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .batch import BatchJob, JobResult, load_jobs, run_job, write_report
+from .config import DEFAULTS
+
+SPOOL_EXTENSIONS = ('.json', '.csv')
+SPOOL_DONE_DIR = 'done'
+SPOOL_FAILED_DIR = 'failed'
+
+# Identifies the current contents of an input; a change restarts its debounce
+Signature = Tuple[Tuple[str, int, int], ...]
+
+
+def partial_path(output_path: str) -> str:
+    """Return the hidden path an output is rendered to before it is renamed into place."""
+    directory, name = os.path.split(output_path)
+    stem, ext = os.path.splitext(name)
+    return os.path.join(directory, f'.{stem}.partial{ext}')
+
+
+def render_atomically(job: BatchJob, threads: int = DEFAULTS.BATCH_THREADS) -> JobResult:
+    """Run a job into a hidden partial file and rename it over the output once it is complete.
+
+    Readers of the output directory never see a half-written output, and a
+    failed job leaves an existing output untouched.
+    """
+    partial = partial_path(job.output)
+    result = run_job(replace(job, output=partial), threads)
+    if result.success:
+        try:
+            os.replace(partial, job.output)
+        except OSError as e:
+            result = replace(result, success=False, error=f"{type(e).__name__}: {e}")
+    elif os.path.exists(partial):
+        os.unlink(partial)
+    return replace(result, output=job.output)
+
+
+def _warm() -> None:
+    """Initialize a worker so it ignores SIGINT.
+
+    Resolving this function loads this module in the worker, and with it the
+    renderer and OpenCV, so running it when a worker starts pays for those
+    imports before the first job. Ctrl+C reaches every process of the
+    terminal's group; the daemon drains on it, so workers must keep
+    rendering instead of raising KeyboardInterrupt.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def signature(path: str) -> Signature:
+    """Return the name, size and modification time of a file, or of every file in a folder."""
+    if os.path.isdir(path):
+        entries = []
+        for entry in os.scandir(path):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((entry.name, stat.st_size, stat.st_mtime_ns))
+        return tuple(sorted(entries))
+    stat = os.stat(path)
+    return ((os.path.basename(path), stat.st_size, stat.st_mtime_ns),)
+
+
+class HotFolderDaemon:
+    """Renders jobs dropped into watched folders or a spool directory on a warm process pool.
+
+    Every subfolder of a watched folder is a folder-mode job written to
+    <output_dir>/<subfolder>.mp4; it is rendered again when its files change.
+    A subfolder that fails is retried after poll_interval, twice as long
+    after each further failure (up to five minutes), and right away once its
+    files change.
+    Every .json or .csv manifest in the spool directory is a batch of jobs;
+    once they have all finished, the manifest is moved to done/ or failed/
+    with a report next to it.
+
+    An input is picked up only after its files have kept their size and
+    modification time for settle_seconds, so files still being copied are
+    not read. Outputs are rendered to a hidden partial file and renamed into
+    place. stop(), SIGTERM or SIGINT drain the daemon: no new jobs start,
+    jobs still waiting are dropped (they are picked up again on the next
+    start) and running jobs finish.
+    """
+
+    def __init__(self, watch_dirs: List[str], output_dir: str, spool_dir: Optional[str] = None,
+                 defaults: Optional[Dict[str, Any]] = None, workers: Optional[int] = None,
+                 threads: int = DEFAULTS.BATCH_THREADS, poll_interval: float = DEFAULTS.POLL_INTERVAL,
+                 settle_seconds: float = DEFAULTS.SETTLE_SECONDS,
+                 on_result: Optional[Callable[[JobResult], None]] = None):
+        """Initialize the daemon.
+
+        Args:
+            watch_dirs: Folders whose subfolders are jobs
+            output_dir: Directory for the outputs of watched subfolders
+            spool_dir: Directory polled for job manifests
+            defaults: Job options used where a job does not set its own
+            workers: Number of worker processes (default: number of CPU cores)
+            threads: OpenCV threads per job; keep workers * threads near the core count
+            poll_interval: Seconds between scans of the watched folders
+            settle_seconds: Seconds an input must stay unchanged before it is read
+            on_result: Called with each result as soon as its job finishes
+        """
+        if not watch_dirs and spool_dir is None:
+            raise ValueError("At least one watch folder or a spool directory is required")
+        if poll_interval <= 0:
+            raise ValueError(f"Invalid poll interval: {poll_interval}. Must be positive")
+        if settle_seconds < 0:
+            raise ValueError(f"Invalid settle time: {settle_seconds}. Must not be negative")
+        for directory in [*watch_dirs, *([spool_dir] if spool_dir is not None else [])]:
+            if not os.path.isdir(directory):
+                raise ValueError(f"Not a valid directory: {directory}")
+        self.watch_dirs = watch_dirs
+        self.output_dir = output_dir
+        self.spool_dir = spool_dir
+        self.defaults = defaults or {}
+        self.workers = workers or os.cpu_count() or 1
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.on_result = on_result
+        self._stop = threading.Event()
+        # Input path -> (signature, time it was first seen with that signature)
+        self._seen: Dict[str, Tuple[Signature, float]] = {}
+        # Input path -> signature it was last rendered with
+        self._done: Dict[str, Signature] = {}
+        # Input path -> (signature, failures in a row with it, time it may be retried)
+        self._failed: Dict[str, Tuple[Signature, int, float]] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Running job -> (input folder or manifest, index of the job in the manifest, job)
+        self._running: Dict[Future[JobResult], Tuple[str, int, BatchJob]] = {}
+        # Spool manifest -> results of its jobs, None while a job is still running
+        self._batches: Dict[str, List[Optional[JobResult]]] = {}
+
+    def stop(self) -> None:
+        """Drain: start no new jobs and return from run() once the running ones have finished."""
+        self._stop.set()
+
+    def run(self) -> None:
+        """Poll for jobs until stopped, then wait for the running jobs."""
+        restore = self._handle_signals()
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self._start_pool()
+            while not self._stop.is_set():
+                self._submit_ready()
+                self._stop.wait(self.poll_interval)
+                self._collect(wait=False)
+            # Jobs that have not started are dropped and picked up again next time
+            for future in list(self._running):
+                if future.cancel():
+                    del self._running[future]
+            self._collect(wait=True)
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+            restore()
+
+    def _start_pool(self) -> None:
+        """Start the worker processes and have each import the renderer before the first job."""
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm)
+        # Start every worker now rather than with the first jobs
+        for _ in range(self.workers):
+            self._pool.submit(_warm)
+
+    def _submit(self, job: BatchJob, source: str, index: int = 0) -> None:
+        """Run a job on the pool, replacing the pool if a worker died (e.g. killed for memory)."""
+        assert self._pool is not None
+        try:
+            future = self._pool.submit(render_atomically, job, self.threads)
+        except BrokenProcessPool:
+            self._pool.shutdown(wait=False)
+            self._start_pool()
+            future = self._pool.submit(render_atomically, job, self.threads)
+        self._running[future] = (source, index, job)
+
+    def _handle_signals(self) -> Callable[[], None]:
+        """Drain on SIGTERM and SIGINT; a second signal stops right away."""
+        if threading.current_thread() is not threading.main_thread():
+            return lambda: None
+        previous: Dict[int, Any] = {}
+
+        def drain(signum: int, frame: Any) -> None:
+            self.stop()
+            signal.signal(signum, previous[signum])
+
+        def restore() -> None:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            previous[signum] = signal.signal(signum, drain)
+        return restore
+
+    def _settled(self, path: str, now: float) -> Optional[Signature]:
+        """Return the signature of an input that has stopped changing, or None."""
+        try:
+            current = signature(path)
+        except OSError:
+            return None
+        seen = self._seen.get(path)
+        if seen is None or seen[0] != current:
+            self._seen[path] = (current, now)
+            return current if self.settle_seconds == 0 else None
+        return current if now - seen[1] >= self.settle_seconds else None
+
+    def _submit_ready(self) -> None:
+        """Submit every settled input that is not rendered, running or already done."""
+        now = time.monotonic()
+        busy = {source for source, _, _ in self._running.values()} | set(self._batches)
+        for watch_dir in self.watch_dirs:
+            for job in load_jobs(watch_dir, self.output_dir, self.defaults):
+                assert job.input is not None
+                if job.input in busy:
+                    continue
+                current = self._settled(job.input, now)
+                if current is None or self._done.get(job.input) == current:
+                    continue
+                failed = self._failed.get(job.input)
+                if failed is not None and failed[0] == current and now < failed[2]:
+                    continue
+                if self._is_current(job.output, current):
+                    self._done[job.input] = current
+                    continue
+                self._submit(job, job.input)
+
+        if self.spool_dir is None:
+            return
+        for entry in sorted(os.scandir(self.spool_dir), key=lambda e: e.name):
+            if (not entry.is_file() or entry.name.startswith('.') or entry.path in busy
+                    or os.path.splitext(entry.name)[1].lower() not in SPOOL_EXTENSIONS):
+                continue
+            if self._settled(entry.path, now) is None:
+                continue
+            try:
+                jobs = load_jobs(entry.path, self.output_dir, self.defaults)
+            except Exception as e:
+                self._finish_manifest(entry.path, [], f"{type(e).__name__}: {e}")
+                continue
+            self._batches[entry.path] = [None] * len(jobs)
+            for i, job in enumerate(jobs):
+                self._submit(job, entry.path, i)
+            if not jobs:
+                self._finish_manifest(entry.path, [])
+
+    @staticmethod
+    def _is_current(output_path: str, current: Signature) -> bool:
+        """Return whether an output is newer than every file of its input, from an earlier run."""
+        try:
+            output_mtime = os.stat(output_path).st_mtime_ns
+        except OSError:
+            return False
+        return all(mtime <= output_mtime for _, _, mtime in current)
+
+    def _collect(self, wait: bool) -> None:
+        """Record finished jobs; with wait, block until every running job has finished."""
+        for future in list(self._running):
+            if not wait and not future.done():
+                continue
+            source, index, job = self._running.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. killed for memory)
+                result = JobResult(job.output, False, 0.0, f"{type(e).__name__}: {e}")
+            if self.on_result is not None:
+                self.on_result(result)
+            if source in self._batches:
+                results = self._batches[source]
+                results[index] = result
+                if None not in results:
+                    del self._batches[source]
+                    self._finish_manifest(source, [r for r in results if r is not None])
+            elif result.success:
+                self._done[source] = self._seen[source][0]
+                self._failed.pop(source, None)
+            else:
+                self._retry_later(source)
+
+        # Batches whose waiting jobs were dropped on drain stay in the spool
+        if wait:
+            self._batches.clear()
+
+    def _retry_later(self, source: str) -> None:
+        """Back off from a failed input: wait twice as long after each failure, until its files change."""
+        current = self._seen[source][0]
+        failed = self._failed.get(source)
+        failures = failed[1] + 1 if failed is not None and failed[0] == current else 1
+        delay = min(self.poll_interval * 2 ** failures, DEFAULTS.RETRY_MAX_SECONDS)
+        self._failed[source] = (current, failures, time.monotonic() + delay)
+
+    def _finish_manifest(self, path: str, results: List[JobResult], error: Optional[str] = None) -> None:
+        """Move a processed manifest to done/ or failed/ and write its report next to it."""
+        assert self.spool_dir is not None
+        failed = error is not None or any(not r.success for r in results)
+        target_dir = os.path.join(self.spool_dir, SPOOL_FAILED_DIR if failed else SPOOL_DONE_DIR)
+        os.makedirs(target_dir, exist_ok=True)
+        name = os.path.basename(path)
+        report_path = os.path.join(target_dir, os.path.splitext(name)[0] + '.report.json')
+        write_report(results, report_path)
+        if error is not None:
+            with open(os.path.join(target_dir, name + '.error.txt'), 'w', encoding='utf-8') as f:
+                f.write(error + '\n')
+        os.replace(path, os.path.join(target_dir, name))
+        self._seen.pop(path, None)
@@ -0,0 +1,341 @@
+import os
+import shutil
+import subprocess
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .config import DEFAULTS, ENCODERS, PIX_FMTS, SETTINGS, VIDEO_CODEC
+
+BACKENDS = (ENCODERS.OPENCV, ENCODERS.FFMPEG, ENCODERS.MJPG, ENCODERS.FFV1)
+PIX_FMTS_IN = (PIX_FMTS.BGR24, PIX_FMTS.YUV420P)
+
+
+@dataclass(frozen=True)
+class EncoderOptions:
+    """Encoder backend selection and quality settings.
+
+    Attributes:
+        backend: 'opencv' (mp4v), 'ffmpeg' (raw frames piped to ffmpeg),
+                 'mjpg' or 'ffv1' (intra-only intermediates for fast turnaround)
+        codec: FourCC for the opencv backend or codec name for the ffmpeg
+               backend; None uses the backend default
+        preset: ffmpeg speed/size preset, None to omit
+        crf: ffmpeg constant rate factor (lower is better quality), None to omit
+    """
+
+    backend: str = DEFAULTS.ENCODER
+    codec: Optional[str] = None
+    preset: Optional[str] = DEFAULTS.FFMPEG_PRESET
+    crf: Optional[int] = DEFAULTS.FFMPEG_CRF
+
+    def __post_init__(self) -> None:
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Invalid encoder: {self.backend}. Must be one of {', '.join(BACKENDS)}")
+
+
+@dataclass(frozen=True)
+class AudioSource:
+    """Audio track carried into an output by stream copy, without re-encoding it.
+
+    Attributes:
+        path: Media file whose first audio stream is copied; a file without
+              audio gives an output without audio
+        start: Offset into the file in seconds, where the output starts
+        duration: Seconds to copy, None to copy until the video ends
+    """
+
+    path: str
+    start: float = 0.0
+    duration: Optional[float] = None
+
+
+def audio_args(audio: AudioSource) -> Tuple[List[str], List[str]]:
+    """Return the ffmpeg input and output arguments that copy the audio of a source into an output.
+
+    The audio is added as the second input; the video is taken from the first.
+    """
+    inputs = []
+    if audio.start > 0:
+        # Seeking the input only moves to the nearest audio packet, so copying stays exact enough
+        inputs += ['-ss', f'{audio.start:.6f}']
+    if audio.duration is not None:
+        inputs += ['-t', f'{audio.duration:.6f}']
+    inputs += ['-i', audio.path]
+    outputs = ['-map', '0:v:0', '-map', '1:a:0?', '-c:a', 'copy']
+    if audio.duration is None:
+        outputs.append('-shortest')
+    return inputs, outputs
+
+
+def find_ffmpeg() -> str:
+    """Return the path of the ffmpeg executable.
+
+    Raises:
+        RuntimeError: If ffmpeg is not installed
+    """
+    path = shutil.which(SETTINGS.ffmpeg_path)
+    if path is None:
+        raise RuntimeError(f"ffmpeg not found: {SETTINGS.ffmpeg_path} (set FFMPEG_PATH)")
+    return path
+
+
+class Encoder(ABC):
+    """Writes composited frames to an output file."""
+
+    def __init__(self, output_path: str, fps: float, size: Tuple[int, int],
+                 input_pix_fmt: str = PIX_FMTS.BGR24):
+        """Initialize the encoder.
+
+        Args:
+            output_path: Path for output video file
+            fps: Output frame rate
+            size: Output (width, height) in pixels
+            input_pix_fmt: Layout of the frames passed to write: 'bgr24' or
+                           'yuv420p' (even sizes only)
+        """
+        if input_pix_fmt not in PIX_FMTS_IN:
+            raise ValueError(f"Invalid input pixel format: {input_pix_fmt}. Must be one of {', '.join(PIX_FMTS_IN)}")
+        self.output_path = output_path
+        self.fps = fps
+        self.size = size
+        self.input_pix_fmt = input_pix_fmt
+
+    @abstractmethod
+    def write(self, frame: np.ndarray) -> None:
+        """Encode one (height, width, 3) BGR frame, or one (height * 3 / 2, width) I420 frame."""
+
+    @abstractmethod
+    def release(self) -> None:
+        """Finish the output file and release resources."""
+
+    def abort(self) -> None:
+        """Release resources without finishing the output file, after a failed or cancelled render."""
+        self.release()
+
+    def __enter__(self) -> 'Encoder':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.release()
+
+
+class OpenCVEncoder(Encoder):
+    """Encoder backed by cv2.VideoWriter; I420 frames are converted back to BGR, which it expects."""
+
+    def __init__(self, output_path: str, fps: float, size: Tuple[int, int], codec: str = VIDEO_CODEC.MP4V,
+                 api_preference: int = cv2.CAP_ANY, input_pix_fmt: str = PIX_FMTS.BGR24):
+        super().__init__(output_path, fps, size, input_pix_fmt)
+        fourcc = cv2.VideoWriter_fourcc(*codec)
+        self.writer = cv2.VideoWriter(output_path, api_preference, fourcc, fps, size)
+        if not self.writer.isOpened():
+            raise ValueError(f"Error opening video writer: {output_path} (codec {codec})")
+        self._bgr: Optional[np.ndarray] = None
+        if input_pix_fmt == PIX_FMTS.YUV420P:
+            self._bgr = np.empty((size[1], size[0], 3), dtype=np.uint8)
+
+    def write(self, frame: np.ndarray) -> None:
+        if self._bgr is not None:
+            frame = cv2.cvtColor(frame, cv2.COLOR_YUV2BGR_I420, dst=self._bgr)
+        self.writer.write(frame)
+
+    def release(self) -> None:
+        self.writer.release()
+
+
+def ffmpeg_command(output_path: str, fps: float, size: Tuple[int, int], codec: str,
+                   preset: Optional[str] = None, crf: Optional[int] = None,
+                   pix_fmt: Optional[str] = 'yuv420p', input_pix_fmt: str = PIX_FMTS.BGR24,
+                   audio: Optional[AudioSource] = None) -> List[str]:
+    """Build the ffmpeg command line that encodes raw BGR24 or yuv420p frames read from stdin.
+
+    With audio, the audio track of the source is copied into the output in the same pass.
+    """
+    width, height = size
+    audio_inputs, audio_outputs = audio_args(audio) if audio is not None else ([], [])
+    command = [
+        SETTINGS.ffmpeg_path, '-y', '-loglevel', 'error',
+        '-f', 'rawvideo', '-pix_fmt', input_pix_fmt, '-s', f'{width}x{height}', '-r', f'{fps}',
+        '-i', '-',
+        *audio_inputs,
+        *audio_outputs,
+        '-c:v', codec,
+    ]
+    if preset is not None:
+        command += ['-preset', preset]
+    if crf is not None:
+        command += ['-crf', str(crf)]
+    if pix_fmt is not None:
+        command += ['-pix_fmt', pix_fmt]
+        if pix_fmt == 'yuv420p' and (width % 2 or height % 2):
+            # 4:2:0 chroma needs even dimensions, pad odd ones with a black line
+            command += ['-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2']
+    command.append(output_path)
+    return command
+
+
+class FFmpegEncoder(Encoder):
+    """Encoder that streams raw frames into an ffmpeg subprocess."""
+
+    def __init__(self, output_path: str, fps: float, size: Tuple[int, int],
+                 codec: str = DEFAULTS.FFMPEG_CODEC, preset: Optional[str] = DEFAULTS.FFMPEG_PRESET,
+                 crf: Optional[int] = DEFAULTS.FFMPEG_CRF, pix_fmt: Optional[str] = 'yuv420p',
+                 input_pix_fmt: str = PIX_FMTS.BGR24, audio: Optional[AudioSource] = None):
+        super().__init__(output_path, fps, size, input_pix_fmt)
+        find_ffmpeg()
+
+        self._stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            ffmpeg_command(output_path, fps, size, codec, preset, crf, pix_fmt, input_pix_fmt, audio),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=self._stderr,
+        )
+
+    def write(self, frame: np.ndarray) -> None:
+        assert self.process.stdin is not None
+        try:
+            self.process.stdin.write(np.ascontiguousarray(frame).data)
+        except BrokenPipeError:
+            self.process.wait()
+            raise self._error() from None
+
+    def release(self) -> None:
+        if self.process.stdin is None or self.process.stdin.closed:
+            return
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        if self.process.wait() != 0:
+            raise self._error()
+        self._stderr.close()
+
+    def abort(self) -> None:
+        """Stop ffmpeg right away instead of waiting for it to encode the frames it has buffered."""
+        self.process.kill()
+        if self.process.stdin is not None:
+            try:
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+        self.process.wait()
+        self._stderr.close()
+
+    def _error(self) -> RuntimeError:
+        self._stderr.seek(0)
+        message = self._stderr.read().decode(errors='replace').strip()
+        self._stderr.close()
+        return RuntimeError(f"ffmpeg exited with code {self.process.returncode}: {message}")
+
+
+def video_only_path(output_path: str) -> str:
+    """Return the hidden path a backend without audio support encodes to before the audio is added."""
+    directory, name = os.path.split(output_path)
+    stem, ext = os.path.splitext(name)
+    return os.path.join(directory, f'.{stem}.video{ext}')
+
+
+def mux_audio(video_path: str, audio: AudioSource, output_path: str) -> None:
+    """Copy the video of one file and the audio of a source into output_path, re-encoding neither."""
+    audio_inputs, audio_outputs = audio_args(audio)
+    result = subprocess.run(
+        [find_ffmpeg(), '-y', '-loglevel', 'error', '-i', video_path, *audio_inputs, *audio_outputs,
+         '-c:v', 'copy', output_path],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    if result.returncode != 0:
+        message = result.stderr.decode(errors='replace').strip()
+        raise RuntimeError(f"ffmpeg mux exited with code {result.returncode}: {message}")
+
+
+class AudioMuxEncoder(Encoder):
+    """Adds an audio track to a backend that can only write video.
+
+    The backend encodes to a hidden file next to the output; on release, its
+    video and the audio of the source are copied into the output by ffmpeg
+    without re-encoding either, and the hidden file is removed.
+    """
+
+    def __init__(self, encoder: Encoder, output_path: str, audio: AudioSource):
+        """Initialize the encoder.
+
+        Args:
+            encoder: Backend writing the video to its own (hidden) path
+            output_path: Path for output video file
+            audio: Audio track to add
+        """
+        super().__init__(output_path, encoder.fps, encoder.size, encoder.input_pix_fmt)
+        find_ffmpeg()
+        self.encoder = encoder
+        self.audio = audio
+        self._finished = False
+
+    def write(self, frame: np.ndarray) -> None:
+        self.encoder.write(frame)
+
+    def release(self) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        try:
+            self.encoder.release()
+            mux_audio(self.encoder.output_path, self.audio, self.output_path)
+        finally:
+            self._remove_video()
+
+    def abort(self) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        try:
+            self.encoder.abort()
+        finally:
+            self._remove_video()
+
+    def _remove_video(self) -> None:
+        if os.path.exists(self.encoder.output_path):
+            os.unlink(self.encoder.output_path)
+
+
+def create_encoder(options: EncoderOptions, output_path: str, fps: float, size: Tuple[int, int],
+                   input_pix_fmt: str = PIX_FMTS.BGR24, audio: Optional[AudioSource] = None) -> Encoder:
+    """Create the encoder selected by options.
+
+    Args:
+        options: Backend and quality settings
+        output_path: Path for output video file
+        fps: Output frame rate
+        size: Output (width, height) in pixels
+        input_pix_fmt: Layout of the frames that will be written: 'bgr24' or
+                       'yuv420p'. The ffmpeg backends take yuv420p frames as
+                       they are; the OpenCV ones convert them back to BGR
+        audio: Audio track copied into the output (needs ffmpeg). The ffmpeg
+               backends add it while encoding; the OpenCV ones encode to a
+               hidden file that is then remuxed with the audio by stream copy
+    """
+    if options.backend in (ENCODERS.OPENCV, ENCODERS.MJPG):
+        if audio is not None:
+            # Fail before rendering anything if the audio cannot be added
+            find_ffmpeg()
+        path = output_path if audio is None else video_only_path(output_path)
+        if options.backend == ENCODERS.OPENCV:
+            encoder: Encoder = OpenCVEncoder(path, fps, size, options.codec or VIDEO_CODEC.MP4V,
+                                             input_pix_fmt=input_pix_fmt)
+        else:
+            # OpenCV's built-in writer uses a fixed quality, so every frame encodes
+            # independently of the ones before it
+            encoder = OpenCVEncoder(path, fps, size, VIDEO_CODEC.MJPG, cv2.CAP_OPENCV_MJPEG, input_pix_fmt)
+        return encoder if audio is None else AudioMuxEncoder(encoder, output_path, audio)
+    if options.backend == ENCODERS.FFMPEG:
+        return FFmpegEncoder(output_path, fps, size, options.codec or DEFAULTS.FFMPEG_CODEC,
+                             options.preset, options.crf, input_pix_fmt=input_pix_fmt, audio=audio)
+    # Lossless and intra-only; bgr0 (or yuv420p for yuv420p frames) keeps the frames bit-exact
+    pix_fmt = 'bgr0' if input_pix_fmt == PIX_FMTS.BGR24 else PIX_FMTS.YUV420P
+    return FFmpegEncoder(output_path, fps, size, VIDEO_CODEC.FFV1, preset=None, crf=None, pix_fmt=pix_fmt,
+                         input_pix_fmt=input_pix_fmt, audio=audio)
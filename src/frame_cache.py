@@ -0,0 +1,228 @@
+import copy
+import hashlib
+import os
+import struct
+import tempfile
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .asset import Asset, VideoAsset
+from .config import DEFAULTS, SETTINGS
+from .utils import evict_lru
+
+# Magic, version, width, height, stored frames, container frame count, fps,
+# source size and source modification time, padded so frames start aligned
+_HEADER = struct.Struct('<4sHxxIIIId2q')
+_HEADER_SIZE = 64
+_MAGIC = b'VFRM'
+_VERSION = 1
+
+
+class CachedVideo(Asset):
+    """A video read from the decoded frames of a frame cache entry.
+
+    Frames are views into a read-only memory map of the entry, so reading
+    one costs a page-cache copy at most and seeking is free. It reports the
+    fps and frame count of the source container, so timelines are the same
+    as with the decoded video.
+
+    Attributes:
+        fps: Frame rate of the source video
+        frame_count: Frame count reported by the source container
+        frames: Decoded frames, a read-only (count, height, width, 3) array
+    """
+
+    def __init__(self, path: str, frames: np.ndarray, fps: float, frame_count: int):
+        super().__init__(path)
+        self.frames = frames
+        self.fps = fps
+        self.frame_count = frame_count
+        self._position = 0
+
+    @property
+    def width(self) -> int:
+        return int(self.frames.shape[2])
+
+    @property
+    def height(self) -> int:
+        return int(self.frames.shape[1])
+
+    def get_frame(self, dst: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """Return the next frame, copied into dst if given, or None at end of video.
+
+        Without dst the frame is a read-only view into the cache entry.
+        """
+        if self._position >= len(self.frames):
+            return None
+        frame: np.ndarray = self.frames[self._position]
+        self._position += 1
+        if dst is None:
+            return frame
+        np.copyto(dst, frame)
+        return dst
+
+    def grab(self) -> bool:
+        """Skip the next frame; False at end of video."""
+        if self._position >= len(self.frames):
+            return False
+        self._position += 1
+        return True
+
+    def reset(self) -> None:
+        """Rewind the video to its first frame."""
+        self._position = 0
+
+    def seek(self, frame_index: int) -> None:
+        """Position the video so the next frame read is frame_index."""
+        self._position = max(0, frame_index)
+
+    def release(self) -> None:
+        """Drop the reference to the memory map; it is unmapped once no frame view is left."""
+        self.frames = np.empty((0,) + self.frames.shape[1:], dtype=np.uint8)
+
+
+class FrameCache:
+    """On-disk cache of decoded video frames, read back through memory maps.
+
+    An entry holds every frame of a video, already cropped and scaled to the
+    size a render places it at, as raw BGR pixels after a small header. It is
+    keyed by the source file (path, modification time and size) and the
+    stored size; the header repeats the source size and modification time,
+    and entries that do not match their source or are truncated are decoded
+    again. The total size on disk is capped; the least recently used entries
+    are evicted first, and videos that would not fit are decoded as usual.
+    """
+
+    def __init__(self, cache_dir: str = SETTINGS.frame_cache_dir,
+                 max_bytes: int = DEFAULTS.FRAME_CACHE_MB * 1024 * 1024, fill: bool = True):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cache files
+            max_bytes: Maximum total size of cached frames on disk
+            fill: Decode videos missing from the cache into it; False only
+                  reads entries that already exist
+        """
+        if max_bytes < 0:
+            raise ValueError(f"Invalid cache size: {max_bytes}. Must not be negative")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.fill = fill
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def read_only(self) -> 'FrameCache':
+        """Return a copy of the cache that reads existing entries but never fills new ones."""
+        cache = copy.copy(self)
+        cache.fill = False
+        return cache
+
+    def entry_path(self, path: str, size: Tuple[int, int], source_height: int) -> str:
+        """Return the cache file of a video stored at size (width, height) from its top source_height rows."""
+        stat = os.stat(path)
+        identity = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{size[0]}x{size[1]}|{source_height}"
+        return os.path.join(self.cache_dir, hashlib.sha1(identity.encode()).hexdigest() + '.frames')
+
+    def open(self, video: VideoAsset, size: Optional[Tuple[int, int]] = None,
+             source_height: Optional[int] = None) -> Optional[CachedVideo]:
+        """Return the frames of a video from the cache, decoding them into it on a miss.
+
+        Filling the cache reads the whole video once and leaves it rewound.
+
+        Args:
+            video: Opened video
+            size: (width, height) to store frames at (default: the video
+                  width and source_height)
+            source_height: Rows of each decoded frame that are kept and
+                           scaled to size (default: all)
+
+        Returns:
+            The cached video, or None if the video is not cached and cannot
+            be: filling is off, or its frames exceed the cache size
+        """
+        if source_height is None:
+            source_height = video.height
+        if size is None:
+            size = (video.width, source_height)
+        path = self.entry_path(video.path, size, source_height)
+        cached = self._load(path, video.path, size)
+        if cached is not None:
+            # Mark as recently used for eviction
+            os.utime(path)
+            return cached
+        if not self.fill or _HEADER_SIZE + max(video.frame_count, 0) * size[0] * size[1] * 3 > self.max_bytes:
+            return None
+        if not self._store(path, video, size, source_height):
+            return None
+        return self._load(path, video.path, size)
+
+    def _load(self, path: str, source: str, size: Tuple[int, int]) -> Optional[CachedVideo]:
+        """Map an entry, or return None if it is missing, stale or incomplete."""
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(_HEADER_SIZE)
+            stat = os.stat(source)
+            file_size = os.path.getsize(path)
+        except OSError:
+            return None
+        if len(header) < _HEADER.size:
+            return None
+        magic, version, width, height, count, frame_count, fps, source_size, source_mtime = \
+            _HEADER.unpack_from(header)
+        if (magic != _MAGIC or version != _VERSION or (width, height) != size
+                or (source_size, source_mtime) != (stat.st_size, stat.st_mtime_ns)
+                or file_size != _HEADER_SIZE + count * width * height * 3):
+            return None
+        frames: np.ndarray
+        if count:
+            frames = np.memmap(path, dtype=np.uint8, mode='r', offset=_HEADER_SIZE,
+                               shape=(count, height, width, 3))
+        else:
+            frames = np.empty((0, height, width, 3), dtype=np.uint8)
+        return CachedVideo(source, frames, float(fps), int(frame_count))
+
+    def _store(self, path: str, video: VideoAsset, size: Tuple[int, int], source_height: int) -> bool:
+        """Decode every frame of a video into an entry; return False if they outgrow the cache."""
+        stat = os.stat(video.path)
+        frame_bytes = size[0] * size[1] * 3
+        scaled = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        count = 0
+        fits = True
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(bytes(_HEADER_SIZE))
+                video.seek(0)
+                while True:
+                    frame = video.get_frame()
+                    if frame is None:
+                        break
+                    if _HEADER_SIZE + (count + 1) * frame_bytes > self.max_bytes:
+                        # The container under-reported its frame count
+                        fits = False
+                        break
+                    frame = frame[:source_height]
+                    if frame.shape[:2] != (size[1], size[0]):
+                        frame = cv2.resize(frame, size, dst=scaled)
+                    f.write(np.ascontiguousarray(frame).data)
+                    count += 1
+                f.seek(0)
+                f.write(_HEADER.pack(_MAGIC, _VERSION, size[0], size[1], count, max(video.frame_count, 0),
+                                     video.fps, stat.st_size, stat.st_mtime_ns))
+            if not fits:
+                os.unlink(tmp_path)
+                return False
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        finally:
+            video.reset()
+        self._evict()
+        return True
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache fits max_bytes."""
+        evict_lru(self.cache_dir, self.max_bytes, lambda name: name.endswith('.frames'))
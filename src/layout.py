@@ -0,0 +1,175 @@
+import functools
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .config import DEFAULTS, LAYOUTS
+
+ARRANGEMENTS = (LAYOUTS.VSTACK, LAYOUTS.HSTACK, LAYOUTS.GRID)
+
+
+@dataclass(frozen=True)
+class Rect:
+    """A rectangle of the output canvas.
+
+    Attributes:
+        x: First column
+        y: First row
+        width: Number of columns
+        height: Number of rows
+    """
+
+    x: int
+    y: int
+    width: int
+    height: int
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """(width, height) in pixels."""
+        return self.width, self.height
+
+    def view(self, canvas: np.ndarray) -> np.ndarray:
+        """Return the rectangle as a view into a canvas."""
+        return canvas[self.y:self.y + self.height, self.x:self.x + self.width]
+
+
+@dataclass(frozen=True)
+class LayoutPlan:
+    """Canvas size and the rectangle each asset is drawn into, in asset order.
+
+    Rectangles never overlap. Where an asset is smaller than its cell, the
+    rest of the cell stays black, so the plan says whether the canvas needs
+    clearing.
+
+    Attributes:
+        width: Canvas width in pixels
+        height: Canvas height in pixels
+        rects: Target rectangle of each asset
+    """
+
+    width: int
+    height: int
+    rects: Tuple[Rect, ...]
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """Canvas (width, height) in pixels."""
+        return self.width, self.height
+
+    @property
+    def covered(self) -> bool:
+        """Whether the rectangles cover the whole canvas."""
+        return sum(rect.width * rect.height for rect in self.rects) == self.width * self.height
+
+
+def _scaled(size: Tuple[int, int], reference: Tuple[int, int], constraint: str) -> Tuple[int, int]:
+    """Scale a size to the reference width or height, keeping its aspect ratio."""
+    if size == reference:
+        return reference
+    aspect_ratio = size[0] / size[1]
+    if constraint == 'width':
+        return reference[0], int(reference[0] / aspect_ratio)
+    return int(reference[1] * aspect_ratio), reference[1]
+
+
+@functools.lru_cache(maxsize=DEFAULTS.LAYOUT_CACHE_SIZE)
+def plan_layout(sizes: Tuple[Tuple[int, int], ...], reference: int = 0, layout: str = LAYOUTS.VSTACK,
+                constraint: str = 'width', columns: Optional[int] = None) -> LayoutPlan:
+    """Plan where each asset is drawn on the output canvas.
+
+    Every asset is scaled to the reference asset's width ('width' constraint)
+    or height ('height' constraint), keeping its aspect ratio, and the assets
+    are placed in a grid: one column for 'vstack', one row for 'hstack'.
+    With the 'width' constraint all columns are as wide as the reference and
+    each row as tall as its tallest asset; with 'height' all rows are as tall
+    as the reference and each column as wide as its widest asset. Assets
+    smaller than their cell are centered in it.
+
+    Plans are cached, so jobs with the same input dimensions share one.
+
+    Args:
+        sizes: (width, height) of each asset, in stacking order
+        reference: Index of the asset whose dimensions the others are scaled to
+        layout: 'vstack', 'hstack' or 'grid'
+        constraint: 'width' or 'height'
+        columns: Number of grid columns (default: square-ish grid); ignored
+                 for vstack and hstack
+    """
+    if layout not in ARRANGEMENTS:
+        raise ValueError(f"Invalid layout: {layout}. Must be one of {', '.join(ARRANGEMENTS)}")
+    if constraint not in ('width', 'height'):
+        raise ValueError(f"Invalid constraint: {constraint}. Must be 'width' or 'height'")
+    if not sizes:
+        raise ValueError("At least one asset is required")
+    if not 0 <= reference < len(sizes):
+        raise ValueError(f"Invalid reference asset: {reference}. Must be below {len(sizes)}")
+    if columns is not None and columns < 1:
+        raise ValueError(f"Invalid column count: {columns}. Must be at least 1")
+
+    if layout == LAYOUTS.VSTACK:
+        columns = 1
+    elif layout == LAYOUTS.HSTACK:
+        columns = len(sizes)
+    elif columns is None:
+        columns = math.ceil(math.sqrt(len(sizes)))
+    columns = min(columns, len(sizes))
+    rows = math.ceil(len(sizes) / columns)
+
+    scaled = [_scaled(size, sizes[reference], constraint) for size in sizes]
+    cells = [(i % columns, i // columns) for i in range(len(sizes))]
+    if constraint == 'width':
+        column_widths = [sizes[reference][0]] * columns
+        row_heights = [max(h for (_, h), (_, r) in zip(scaled, cells) if r == row) for row in range(rows)]
+    else:
+        column_widths = [max(w for (w, _), (c, _) in zip(scaled, cells) if c == col) for col in range(columns)]
+        row_heights = [sizes[reference][1]] * rows
+
+    column_x = _offsets(column_widths)
+    row_y = _offsets(row_heights)
+    rects = []
+    for (width, height), (col, row) in zip(scaled, cells):
+        rects.append(Rect(column_x[col] + (column_widths[col] - width) // 2,
+                          row_y[row] + (row_heights[row] - height) // 2, width, height))
+    return LayoutPlan(sum(column_widths), sum(row_heights), tuple(rects))
+
+
+@functools.lru_cache(maxsize=DEFAULTS.LAYOUT_CACHE_SIZE)
+def fit_layout(plan: LayoutPlan, max_width: Optional[int] = None, max_height: Optional[int] = None) -> LayoutPlan:
+    """Scale a plan down so the canvas fits within a maximum size, keeping its aspect ratio.
+
+    Rectangle edges are scaled, so rectangles that touched still touch.
+
+    Args:
+        plan: Plan to scale
+        max_width: Maximum canvas width, None for no limit
+        max_height: Maximum canvas height, None for no limit
+    """
+    for name, limit in (('width', max_width), ('height', max_height)):
+        if limit is not None and limit < 1:
+            raise ValueError(f"Invalid maximum {name}: {limit}. Must be at least 1")
+    scale = min(1.0, (max_width or plan.width) / plan.width, (max_height or plan.height) / plan.height)
+    if scale == 1.0:
+        return plan
+
+    def edge(position: int) -> int:
+        # The epsilon keeps exact ratios (e.g. 3840 -> 1920) from rounding down
+        return int(position * scale + 1e-6)
+
+    rects = []
+    for rect in plan.rects:
+        x, y = edge(rect.x), edge(rect.y)
+        rects.append(Rect(x, y, max(1, edge(rect.x + rect.width) - x), max(1, edge(rect.y + rect.height) - y)))
+    return LayoutPlan(edge(plan.width), edge(plan.height), tuple(rects))
+
+
+def _offsets(lengths: List[int]) -> List[int]:
+    """Return the start of each length when they are laid end to end."""
+    offsets = []
+    position = 0
+    for length in lengths:
+        offsets.append(position)
+        position += length
+    return offsets
@@ -0,0 +1,128 @@
+import os
+import sqlite3
+import threading
+from typing import Any, ClassVar, Dict, List, Optional
+
+from .config import SETTINGS
+from .probe import MediaInfo, probe
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    fps REAL,
+    frame_count INTEGER,
+    duration REAL
+)
+"""
+
+
+class MediaIndex:
+    """Persistent index of media properties, keyed by path, size and modification time.
+
+    Looking up a file costs one stat and one indexed query; only files that
+    are new or changed since they were last seen are probed. The index is a
+    SQLite database in WAL mode, so parallel workers and runs can share it.
+    The connection is opened on first use, shared by threads under a lock and
+    not pickled, so a combiner holding an index can still be sent to worker
+    processes.
+    """
+
+    _shared: ClassVar[Dict[str, 'MediaIndex']] = {}
+
+    def __init__(self, path: str = SETTINGS.media_index_path):
+        """Initialize the index.
+
+        Args:
+            path: Path of the SQLite database, created if missing
+        """
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, path: str = SETTINGS.media_index_path) -> 'MediaIndex':
+        """Return an index instance shared by all jobs in this process."""
+        key = os.path.abspath(path)
+        if key not in cls._shared:
+            cls._shared[key] = cls(path)
+        return cls._shared[key]
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def probe(self, path: str) -> MediaInfo:
+        """Return the properties of a media file, probing it only if it changed since it was indexed."""
+        return self.probe_all([path])[0]
+
+    def probe_all(self, paths: List[str]) -> List[MediaInfo]:
+        """Return the properties of media files in order, storing new ones in a single transaction."""
+        with self._lock:
+            return self._probe_all(paths)
+
+    def _probe_all(self, paths: List[str]) -> List[MediaInfo]:
+        db = self._db
+        results = []
+        changed = []
+        for path in paths:
+            key = os.path.abspath(path)
+            stat = os.stat(path)
+            row = db.execute('SELECT type, width, height, fps, frame_count, duration FROM media '
+                             'WHERE path = ? AND size = ? AND mtime_ns = ?',
+                             (key, stat.st_size, stat.st_mtime_ns)).fetchone()
+            if row is not None:
+                results.append(MediaInfo(path, *row))
+                continue
+            info = probe(path)
+            changed.append((key, stat.st_size, stat.st_mtime_ns, info.type, info.width, info.height,
+                            info.fps, info.frame_count, info.duration))
+            results.append(info)
+        if changed:
+            with db:
+                db.executemany('INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', changed)
+        return results
+
+    def prune(self) -> int:
+        """Remove entries of files that no longer exist.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            db = self._db
+            missing = [(path,) for path, in db.execute('SELECT path FROM media') if not os.path.isfile(path)]
+            with db:
+                db.executemany('DELETE FROM media WHERE path = ?', missing)
+            return len(missing)
+
+    def close(self) -> None:
+        """Close the database connection; it is reopened on next use."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {'path': self.path}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state['path'])  # type: ignore[misc]
+
+    def __enter__(self) -> 'MediaIndex':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from .asset import ImageAsset, VideoAsset
+from .pipeline import VideoRegion
+from .timeline import TimedVideo
+
+MB = 1024 * 1024
+
+
+def frame_bytes(width: int, height: int) -> int:
+    """Return the size of a BGR24 frame in bytes."""
+    return width * height * 3
+
+
+@dataclass(frozen=True)
+class MemoryEstimate:
+    """Frame memory a render allocates, in bytes, by purpose.
+
+    Covers the buffers the renderer itself allocates; decoder and encoder
+    internals come on top.
+
+    Attributes:
+        canvas: Output canvases, one or the pipeline's pool
+        decode: Decode and scaling buffers of the videos, including queued frames
+        images: Largest image decoded for painting, plus the overlays kept in memory
+        loop_cache: Decoded frames kept for looping videos
+    """
+
+    canvas: int
+    decode: int
+    images: int
+    loop_cache: int
+
+    @property
+    def total(self) -> int:
+        """Total bytes."""
+        return self.canvas + self.decode + self.images + self.loop_cache
+
+    def check(self, budget_mb: Optional[int]) -> None:
+        """Raise a ValueError with a breakdown of the estimate if it exceeds budget_mb."""
+        if budget_mb is None or self.total <= budget_mb * MB:
+            return
+        parts = ', '.join(f"{name} {size / MB:.0f} MB" for name, size in (
+            ('canvas', self.canvas), ('decode', self.decode), ('images', self.images),
+            ('loop cache', self.loop_cache)) if size)
+        raise ValueError(f"Render needs about {self.total / MB:.0f} MB ({parts}), more than the memory "
+                         f"budget of {budget_mb} MB. Set a smaller maximum output width or height")
+
+
+def estimate_memory(canvas_size: Tuple[int, int], regions: List[VideoRegion],
+                    images: List[Tuple[ImageAsset, Tuple[int, int]]], queue_size: Optional[int] = None,
+                    overlays_in_memory: bool = False, yuv: bool = False) -> MemoryEstimate:
+    """Estimate the frame memory of a render before anything is allocated.
+
+    Args:
+        canvas_size: Output (width, height)
+        regions: Video regions of the layout
+        images: Each painted image with its scaled (width, height)
+        queue_size: Queue size of the threaded pipeline, None for the
+                    sequential renderer
+        overlays_in_memory: Scaled images are kept in memory, as the overlay
+                            cache does
+        yuv: Frames are composited in YUV 4:2:0 (sequential renderer only)
+    """
+    canvas = frame_bytes(*canvas_size)
+    # The pipeline keeps a template plus a pool of queue_size + 2 canvases
+    canvases = 1 if queue_size is None else queue_size + 3
+    canvas_total = canvas * canvases
+    if yuv:
+        # The BGR template is converted once into an I420 canvas of half its size
+        canvas_total += canvas // 2
+
+    decode = 0
+    loop_cache = 0
+    for region in regions:
+        reader = region.asset
+        source = reader.asset if isinstance(reader, TimedVideo) else reader
+        decoded = frame_bytes(reader.width, reader.height)
+        if isinstance(reader, TimedVideo) and reader.size is not None:
+            # Frames are decoded at the source size and scaled right away
+            decode += frame_bytes(source.width, source.height)
+        if queue_size is not None:
+            decode += (queue_size + 2) * decoded
+        elif yuv:
+            # Frames are decoded into their own buffer, scaled to the region and converted
+            region_bytes = frame_bytes(region.width or canvas_size[0], region.height)
+            decode += decoded + region_bytes // 2
+            if (reader.height, reader.width) != (region.height, region.width or canvas_size[0]):
+                decode += region_bytes
+        elif (reader.height, reader.width) != (region.height, region.width or canvas_size[0]):
+            decode += decoded
+        if isinstance(reader, TimedVideo) and reader.loop and isinstance(source, VideoAsset):
+            loop_cache += min(reader.cache_bytes, max(source.frame_count, 1) * decoded)
+
+    largest = 0
+    overlays = 0
+    for image, (width, height) in images:
+        largest = max(largest, frame_bytes(*image.decoded_size(width, height)))
+        if overlays_in_memory:
+            overlays += frame_bytes(width, height)
+    return MemoryEstimate(canvas_total, decode, largest + overlays, loop_cache)
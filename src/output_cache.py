@@ -0,0 +1,146 @@
+import functools
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List
+
+from .config import DEFAULTS, SETTINGS
+from .utils import evict_lru
+
+
+@functools.lru_cache(maxsize=1)
+def code_version() -> str:
+    """Return a hash of this package's source, so any code change invalidates cached outputs."""
+    digest = hashlib.sha1()
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    for root, dirs, files in os.walk(package_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith('.py'):
+                path = os.path.join(root, name)
+                digest.update(os.path.relpath(path, package_dir).encode())
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=1)
+def library_versions() -> Dict[str, str]:
+    """Return the OpenCV and NumPy versions, whose decoders, scaling and encoders shape the output."""
+    # Imported here so the command line loads this module without loading OpenCV
+    import cv2
+    import numpy as np
+    return {'opencv': cv2.__version__, 'numpy': np.__version__}
+
+
+def file_digest(path: str) -> str:
+    """Return the SHA-256 of a file's contents."""
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+class OutputCache:
+    """Content-addressed store of finished outputs.
+
+    A job's key is a hash of its inputs, in order, its options, the code
+    version and the OpenCV and NumPy versions. Inputs are identified by path, size and modification time, or
+    by their contents with hash_contents. Entries are hard links to the
+    rendered files where the file system allows it and copies otherwise. The
+    total size is capped; the least recently used entries are evicted first.
+    """
+
+    def __init__(self, cache_dir: str = SETTINGS.output_cache_dir,
+                 max_bytes: int = DEFAULTS.OUTPUT_CACHE_MB * 1024 * 1024, hash_contents: bool = False):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cached outputs
+            max_bytes: Maximum total size of cached outputs
+            hash_contents: Identify inputs by their contents instead of their
+                           size and modification time; slower for large
+                           videos, but survives inputs being copied again
+        """
+        if max_bytes < 0:
+            raise ValueError(f"Invalid cache size: {max_bytes}. Must not be negative")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hash_contents = hash_contents
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, inputs: List[str], options: Dict[str, Any]) -> str:
+        """Return the key of a job.
+
+        Args:
+            inputs: Input files in the order they are combined
+            options: JSON-serializable options that change the output
+        """
+        identities = []
+        for path in inputs:
+            if self.hash_contents:
+                identities.append(file_digest(path))
+            else:
+                stat = os.stat(path)
+                identities.append(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}")
+        job = {'inputs': identities, 'options': options, 'code': code_version(), 'libraries': library_versions()}
+        return hashlib.sha256(json.dumps(job, sort_keys=True).encode()).hexdigest()
+
+    def _entry(self, key: str, output_path: str) -> str:
+        return os.path.join(self.cache_dir, key + os.path.splitext(output_path)[1])
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        """Place the cached output for key at output_path, if there is one.
+
+        Returns:
+            True if the output was taken from the cache
+        """
+        entry = self._entry(key, output_path)
+        if not os.path.isfile(entry):
+            return False
+        try:
+            _place(entry, output_path)
+            # Mark as recently used for eviction
+            os.utime(entry)
+        except OSError:
+            return False
+        return True
+
+    def store(self, key: str, output_path: str) -> None:
+        """Add a rendered output to the cache and evict old entries."""
+        if os.path.getsize(output_path) > self.max_bytes:
+            return
+        _place(output_path, self._entry(key, output_path))
+        self._evict()
+
+    @staticmethod
+    def detach(output_path: str) -> None:
+        """Remove output_path if it is a hard link, so rendering over it cannot change a cached entry."""
+        try:
+            if os.stat(output_path).st_nlink > 1:
+                os.unlink(output_path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        """Delete least recently used outputs until the cache fits max_bytes."""
+        evict_lru(self.cache_dir, self.max_bytes, lambda name: not name.endswith('.tmp'))
+
+
+def _place(source: str, target: str) -> None:
+    """Hard-link source to target, or copy it if linking is not possible, replacing target atomically."""
+    target_dir = os.path.dirname(os.path.abspath(target))
+    fd, tmp_path = tempfile.mkstemp(dir=target_dir, suffix='.tmp')
+    os.close(fd)
+    os.unlink(tmp_path)
+    try:
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            # Other file system, or links not supported
+            shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .asset import ImageAsset
+from .config import DEFAULTS, SETTINGS
+from .utils import evict_lru
+
+
+class OverlayCache:
+    """On-disk cache of images already resized for pasting into a frame.
+
+    Entries are keyed by the source file (path, modification time and size),
+    the target dimensions and the interpolation, and stored as .npy files that
+    are memory-mapped on load, next to a small .json file per source image
+    holding its size. The total size on disk is capped; the least recently
+    used files of either kind are evicted first. Arrays loaded in this
+    process are also kept in a small in-memory LRU memo.
+    """
+
+    _shared: Dict[Tuple[str, int], 'OverlayCache'] = {}
+
+    def __init__(self, cache_dir: str = SETTINGS.overlay_cache_dir,
+                 max_bytes: int = DEFAULTS.OVERLAY_CACHE_MB * 1024 * 1024,
+                 memo_size: int = DEFAULTS.OVERLAY_MEMO_SIZE):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cache files
+            max_bytes: Maximum total size of cached arrays on disk
+            memo_size: Maximum number of arrays kept in memory
+        """
+        if max_bytes < 0:
+            raise ValueError(f"Invalid cache size: {max_bytes}. Must not be negative")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.memo_size = memo_size
+        self._memo: OrderedDict[str, np.ndarray] = OrderedDict()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def shared(cls, cache_dir: str = SETTINGS.overlay_cache_dir,
+               max_bytes: int = DEFAULTS.OVERLAY_CACHE_MB * 1024 * 1024) -> 'OverlayCache':
+        """Return a cache instance shared by all jobs in this process."""
+        key = (os.path.abspath(cache_dir), max_bytes)
+        if key not in cls._shared:
+            cls._shared[key] = cls(cache_dir, max_bytes)
+        return cls._shared[key]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Memory-mapped arrays stay in the process that loaded them
+        state = self.__dict__.copy()
+        state['_memo'] = OrderedDict()
+        return state
+
+    def _source_id(self, path: str) -> str:
+        stat = os.stat(path)
+        identity = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}"
+        return hashlib.sha1(identity.encode()).hexdigest()
+
+    def source_size(self, path: str) -> Optional[Tuple[int, int]]:
+        """Return the cached (width, height) of an image file, if known."""
+        try:
+            info_path = os.path.join(self.cache_dir, self._source_id(path) + '.json')
+            with open(info_path, encoding='utf-8') as f:
+                info = json.load(f)
+            size = int(info['width']), int(info['height'])
+            # Mark as recently used for eviction
+            os.utime(info_path)
+            return size
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def open_image(self, path: str) -> ImageAsset:
+        """Open an image, deferring decoding when its size is already cached."""
+        size = self.source_size(path)
+        asset = ImageAsset(path, size=size)
+        if size is None:
+            self._write_json(self._source_id(path) + '.json', {'width': asset.width, 'height': asset.height})
+        return asset
+
+    def get(self, image: ImageAsset, size: Tuple[int, int],
+            interpolation: int = cv2.INTER_LINEAR) -> np.ndarray:
+        """Return the image resized to size (width, height), from the cache if possible.
+
+        The returned array is read-only.
+        """
+        source_id = self._source_id(image.path)
+        key = hashlib.sha1(f"{source_id}|{size[0]}x{size[1]}|{interpolation}".encode()).hexdigest()
+
+        cached = self._memo.get(key)
+        if cached is not None:
+            self._memo.move_to_end(key)
+            return cached
+
+        path = os.path.join(self.cache_dir, key + '.npy')
+        try:
+            cached = np.load(path, mmap_mode='r')
+            # Mark as recently used for eviction
+            os.utime(path)
+        except (OSError, ValueError):
+            cached = None
+        if cached is None or cached.shape[:2] != (size[1], size[0]):
+            resized = image.get_scaled(*size, interpolation=interpolation)
+            self._store(path, resized)
+            resized.flags.writeable = False
+            cached = resized
+
+        self._memo[key] = cached
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return cached
+
+    def _store(self, path: str, array: np.ndarray) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._evict()
+
+    def _write_json(self, name: str, data: Dict[str, Any]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, os.path.join(self.cache_dir, name))
+
+    def _evict(self) -> None:
+        """Delete least recently used arrays and image sizes until the cache fits max_bytes."""
+        evict_lru(self.cache_dir, self.max_bytes, lambda name: name.endswith(('.npy', '.json')))
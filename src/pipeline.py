@@ -0,0 +1,356 @@
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Generator, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .asset import VideoAsset
+from .config import DEFAULTS
+from .stats import RenderStats
+from .timeline import TimedVideo
+
+
+@dataclass(frozen=True)
+class VideoRegion:
+    """Rectangle of the output canvas filled by a video.
+
+    Attributes:
+        asset: Video providing the frames, read one frame per output frame
+        top: First canvas row of the region
+        height: Number of canvas rows in the region
+        source_height: Number of rows used from each decoded frame (less than
+                       the video height when the bottom is cropped)
+        left: First canvas column of the region
+        width: Number of canvas columns in the region (default: up to the
+               right edge of the canvas)
+    """
+
+    asset: Union[VideoAsset, TimedVideo]
+    top: int
+    height: int
+    source_height: int
+    left: int = 0
+    width: Optional[int] = None
+
+    def rows(self, canvas: np.ndarray) -> np.ndarray:
+        """Return the region as a view into a canvas."""
+        right = canvas.shape[1] if self.width is None else self.left + self.width
+        return canvas[self.top:self.top + self.height, self.left:right]
+
+
+def copy_into(frame: np.ndarray, target: np.ndarray) -> None:
+    """Copy a frame into a canvas region, resizing it if the sizes differ."""
+    if frame.shape == target.shape:
+        np.copyto(target, frame)
+    else:
+        cv2.resize(frame, (target.shape[1], target.shape[0]), dst=target)
+
+
+class FrameFingerprint:
+    """Tells whether a video frame repeats the previous one, from a strided sample of its pixels.
+
+    Comparing every stride-th pixel of every stride-th row costs a small
+    fraction of a resize or copy. Changes that fall entirely between sampled
+    pixels are missed; a stride of 1 compares every pixel.
+    """
+
+    def __init__(self, stride: int = DEFAULTS.DEDUP_STRIDE):
+        if stride < 1:
+            raise ValueError(f"Invalid dedup stride: {stride}. Must be at least 1")
+        self.stride = stride
+        self._sample: Optional[np.ndarray] = None
+
+    def changed(self, frame: np.ndarray) -> bool:
+        """Return whether frame differs from the frame passed last time, and remember it."""
+        sample = frame[::self.stride, ::self.stride]
+        if self._sample is not None and self._sample.shape == sample.shape:
+            if np.array_equal(sample, self._sample):
+                return False
+            np.copyto(self._sample, sample)
+        else:
+            self._sample = sample.copy()
+        return True
+
+
+# Put in the pending queue instead of a canvas when a frame repeats the previous one
+_REPEAT = object()
+
+
+class _StoppedError(Exception):
+    """Raised inside a stage when the pipeline is shutting down."""
+
+
+class FramePipeline:
+    """Runs decode, compositing and encoding on separate threads.
+
+    Each video region gets a reader thread that decodes into a small pool of
+    recycled buffers. The calling thread composites those frames into a pool
+    of recycled canvases, and a writer thread hands finished canvases to the
+    encoder. Stages are joined by bounded queues, so a slow encoder stalls the
+    readers instead of letting frames pile up in memory. OpenCV releases the
+    GIL while decoding, resizing and encoding, so the stages run in parallel.
+
+    With dedup_stride, a frame whose videos all repeat their previous frames
+    is not composited: the previous canvas is written again.
+
+    The first exception raised by any stage stops all of them and is re-raised
+    from run().
+    """
+
+    def __init__(self, canvas: np.ndarray, regions: List[VideoRegion],
+                 write: Optional[Callable[[np.ndarray], None]], queue_size: int = DEFAULTS.QUEUE_SIZE,
+                 stats: Optional[RenderStats] = None, dedup_stride: Optional[int] = None):
+        """Initialize the pipeline.
+
+        Args:
+            canvas: Output frame with the static content already painted
+            regions: Video regions to fill on every frame
+            write: Callable that encodes one finished frame; None if the
+                   frames are consumed through frames() instead of run()
+            queue_size: Maximum number of frames buffered between stages
+            stats: Times the decode and composite stages when given
+            dedup_stride: Fingerprint stride for detecting repeated frames;
+                          None composites every frame
+        """
+        if queue_size < 1:
+            raise ValueError(f"Invalid queue size: {queue_size}. Must be at least 1")
+        self.template = canvas
+        self.regions = regions
+        self.write = write
+        self.queue_size = queue_size
+        self.stats = stats
+        self.dedup_stride = dedup_stride
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+
+    def run(self, frame_count: Optional[int] = None) -> None:
+        """Render frames until frame_count is reached.
+
+        Args:
+            frame_count: Number of output frames. If None, render until every
+                         video has ended. Videos that end early are shown black.
+        """
+        if self.write is None:
+            raise ValueError("A write callable is required to run the pipeline")
+        threads, composite_args = self._start(frame_count)
+        free, pending = composite_args[2], composite_args[3]
+        writer = threading.Thread(target=self._guard, args=(self._write_frames, pending, free), daemon=True)
+        writer.start()
+
+        try:
+            self._guard(self._composite, *composite_args)
+            if not self._errors:
+                writer.join()
+        finally:
+            # Readers may still be blocked on a full queue once enough frames are written
+            self._stop.set()
+            writer.join()
+            for thread in threads:
+                thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+
+    def frames(self, frame_count: Optional[int] = None) -> Generator[np.ndarray, None, None]:
+        """Render frames on background threads and yield each finished canvas.
+
+        The consumer takes the place of the writer stage: a yielded canvas is
+        recycled when the next frame is requested, so copy it to keep it.
+        Closing the generator stops all stages.
+
+        Args:
+            frame_count: Number of output frames. If None, render until every
+                         video has ended.
+        """
+        threads, composite_args = self._start(frame_count)
+        free, pending = composite_args[2], composite_args[3]
+        compositor = threading.Thread(target=self._guard, args=(self._composite, *composite_args), daemon=True)
+        compositor.start()
+        threads.append(compositor)
+
+        last = None
+        try:
+            while True:
+                try:
+                    canvas = self._get(pending)
+                except _StoppedError:
+                    break
+                if canvas is None:
+                    break
+                if canvas is _REPEAT:
+                    canvas = last
+                elif last is not None:
+                    free.put(last)
+                last = canvas
+                yield canvas
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+
+    def _start(self, frame_count: Optional[int]) -> Tuple[List[threading.Thread], Tuple[Any, ...]]:
+        """Start the reader threads.
+
+        Returns:
+            The started threads and the arguments for the compositor stage.
+        """
+        self._stop.clear()
+        self._errors = []
+
+        frame_queues: List[queue.Queue[Any]] = []
+        buffer_queues: List[queue.Queue[Any]] = []
+        threads = []
+        for region in self.regions:
+            frames: queue.Queue[Any] = queue.Queue(maxsize=self.queue_size)
+            buffers: queue.Queue[Any] = queue.Queue()
+            # One more buffer is held by the compositor as the region's current frame
+            for _ in range(self.queue_size + 2):
+                buffers.put(np.empty((region.asset.height, region.asset.width, 3), dtype=np.uint8))
+            frame_queues.append(frames)
+            buffer_queues.append(buffers)
+            threads.append(threading.Thread(target=self._guard, args=(self._read, region, frames, buffers,
+                                                                      frame_count), daemon=True))
+
+        # One canvas is being composited and one written while the queue is full
+        free: queue.Queue[Any] = queue.Queue()
+        for _ in range(self.queue_size + 2):
+            free.put(self.template.copy())
+        pending: queue.Queue[Any] = queue.Queue(maxsize=self.queue_size)
+
+        for thread in threads:
+            thread.start()
+        return threads, (frame_queues, buffer_queues, free, pending, frame_count)
+
+    def _guard(self, stage: Callable[..., None], *args: Any) -> None:
+        """Run a stage, recording its error and stopping the other stages."""
+        try:
+            stage(*args)
+        except _StoppedError:
+            pass
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+
+    def _get(self, q: queue.Queue[Any]) -> Any:
+        while True:
+            if self._stop.is_set():
+                raise _StoppedError()
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _put(self, q: queue.Queue[Any], item: Any) -> None:
+        while True:
+            if self._stop.is_set():
+                raise _StoppedError()
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _read(self, region: VideoRegion, frames: queue.Queue[Any], buffers: queue.Queue[Any],
+              frame_count: Optional[int]) -> None:
+        """Reader stage: decode frames of one video into recycled buffers."""
+        get_frame = region.asset.get_frame
+        if self.stats is not None:
+            get_frame = self.stats.timed('decode', get_frame)
+        read = 0
+        while frame_count is None or read < frame_count:
+            buffer = self._get(buffers)
+            frame = get_frame(dst=buffer)
+            if frame is not buffer:
+                # Repeated or cached frame, the buffer was not used
+                buffers.put(buffer)
+            if frame is None:
+                break
+            self._put(frames, frame)
+            read += 1
+        self._put(frames, None)
+
+    def _composite(self, frame_queues: List[queue.Queue[Any]], buffer_queues: List[queue.Queue[Any]],
+                   free: queue.Queue[Any], pending: queue.Queue[Any], frame_count: Optional[int]) -> None:
+        """Compositor stage: paint decoded frames into free canvases."""
+        copy_frame = copy_into
+        changed = [fingerprint.changed for fingerprint in self._fingerprints()]
+        if self.stats is not None:
+            copy_frame = self.stats.timed('composite', copy_into)
+            changed = [self.stats.timed('composite', check) for check in changed]
+        ended = [False] * len(self.regions)
+        # Frame shown by each region; a reader sends it again to repeat it
+        current: List[Optional[np.ndarray]] = [None] * len(self.regions)
+        written = 0
+        while frame_count is None or written < frame_count:
+            frames: List[Optional[np.ndarray]] = [None] * len(self.regions)
+            repeated = written > 0 and bool(changed)
+            for i, region in enumerate(self.regions):
+                if ended[i]:
+                    continue
+                frame = self._get(frame_queues[i])
+                if frame is None:
+                    ended[i] = True
+                    repeated = False
+                    continue
+                frames[i] = frame
+                if changed and changed[i](frame[:region.source_height]):
+                    repeated = False
+                if frame is not current[i]:
+                    previous = current[i]
+                    # Frames are recycled once a newer one arrived; the canvas holds a copy.
+                    # Cached loop frames are read-only and never recycled
+                    if previous is not None and previous.flags.writeable:
+                        buffer_queues[i].put(previous)
+                    current[i] = frame
+            if frame_count is None and all(ended):
+                break
+
+            if repeated:
+                # Every video shows the same frame as before: write the previous canvas again
+                self._put(pending, _REPEAT)
+                if self.stats is not None:
+                    self.stats.frames_deduplicated()
+                written += 1
+                continue
+
+            canvas = self._get(free)
+            for region, frame in zip(self.regions, frames):
+                rows = region.rows(canvas)
+                if frame is None:
+                    # Video ended, show its region black
+                    rows[:] = 0
+                else:
+                    copy_frame(frame[:region.source_height], rows)
+            self._put(pending, canvas)
+            written += 1
+        self._put(pending, None)
+
+    def _fingerprints(self) -> List[FrameFingerprint]:
+        """Return one fingerprint per region, or none without dedup."""
+        if self.dedup_stride is None:
+            return []
+        return [FrameFingerprint(self.dedup_stride) for _ in self.regions]
+
+    def _write_frames(self, pending: queue.Queue[Any], free: queue.Queue[Any]) -> None:
+        """Writer stage: encode finished canvases and recycle them.
+
+        The last canvas is kept until a newer one arrives, so a repeated frame
+        can write it again.
+        """
+        assert self.write is not None
+        last = None
+        while True:
+            canvas = self._get(pending)
+            if canvas is None:
+                break
+            if canvas is _REPEAT:
+                canvas = last
+            elif last is not None:
+                free.put(last)
+            last = canvas
+            self.write(canvas)
@@ -0,0 +1,230 @@
+import os
+import struct
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from .utils import discover_assets, get_file_type, read_image_size
+
+# (width, height, fps, frame_count) of a video
+VideoInfo = Tuple[int, int, float, int]
+
+# Containers of the ISO base media file format (MP4, MOV)
+_ISO_EXTENSIONS = ('.mp4', '.mov', '.m4v')
+# Boxes that only contain other boxes, on the way to the sample tables
+_ISO_CONTAINERS = (b'moov', b'trak', b'mdia', b'minf', b'stbl')
+_IDENTITY_MATRIX = (0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    """Properties of a media file, as a render would see them.
+
+    Attributes:
+        path: Path to the file
+        type: 'image' or 'video'
+        width: Width in pixels
+        height: Height in pixels
+        fps: Frame rate, None for images
+        frame_count: Number of frames, None for images
+        duration: Length in seconds, None for images
+    """
+
+    path: str
+    type: str
+    width: int
+    height: int
+    fps: Optional[float] = None
+    frame_count: Optional[int] = None
+    duration: Optional[float] = None
+
+
+def probe(path: str) -> MediaInfo:
+    """Return the properties of an image or video, decoding as little as possible.
+
+    Sizes of images and the size, frame rate and frame count of MP4, MOV and
+    AVI videos are read from the file headers without loading OpenCV. Other
+    files, and headers that may not match what OpenCV decodes (e.g. rotated
+    videos), fall back to opening the file with OpenCV.
+    """
+    file_type = get_file_type(path)
+    if file_type is None:
+        raise ValueError(f"Unsupported media file: {path}")
+    if not os.path.isfile(path):
+        raise ValueError(f"Not a valid file: {path}")
+
+    if file_type == 'image':
+        size = read_image_size(path)
+        if size is None:
+            from .asset import ImageAsset
+            image = ImageAsset(path)
+            size = image.width, image.height
+        return MediaInfo(path, file_type, *size)
+
+    info = read_video_info(path)
+    if info is None:
+        info = _open_video_info(path)
+    width, height, fps, frame_count = info
+    duration = frame_count / fps if fps > 0 else None
+    return MediaInfo(path, file_type, width, height, fps, frame_count, duration)
+
+
+def probe_folder(folder_path: str) -> List[MediaInfo]:
+    """Probe every media file of a folder, in the order a render uses them."""
+    return [probe(path) for path, _ in discover_assets(folder_path)]
+
+
+def _open_video_info(path: str) -> VideoInfo:
+    from .asset import VideoAsset
+    video = VideoAsset(path)
+    try:
+        return video.width, video.height, video.fps, video.frame_count
+    finally:
+        video.release()
+
+
+def read_video_info(path: str) -> Optional[VideoInfo]:
+    """Read the size, frame rate and frame count of an MP4, MOV or AVI video from its headers.
+
+    Only the headers are read; no frame is decoded.
+
+    Returns:
+        (width, height, fps, frame_count), or None if the file cannot be read,
+        the container is not supported, or the decoded frames may differ from
+        the header (rotated MP4 tracks, which OpenCV rotates on load).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if ext in _ISO_EXTENSIONS:
+                return _iso_video_info(f, size)
+            if ext == '.avi':
+                return _avi_video_info(f)
+    except (OSError, struct.error):
+        return None
+    return None
+
+
+def _iso_boxes(f: BinaryIO, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """Yield (type, payload start, payload end) of the boxes up to end, leaving f at the payload."""
+    position = f.tell()
+    while position + 8 <= end:
+        f.seek(position)
+        size, kind = struct.unpack('>I4s', f.read(8))
+        start = position + 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            start += 8
+        elif size == 0:
+            size = end - position
+        if size < start - position:
+            return
+        yield kind, start, position + size
+        position += size
+
+
+def _iso_video_info(f: BinaryIO, file_size: int) -> Optional[VideoInfo]:
+    """Find the first video track of an MP4/MOV file and read its sample tables."""
+    boxes: Dict[bytes, Tuple[int, int]] = {}
+    for info in _iso_tracks(f, 0, file_size, boxes):
+        if info is not None:
+            return info
+    return None
+
+
+def _iso_tracks(f: BinaryIO, start: int, end: int,
+                boxes: Dict[bytes, Tuple[int, int]]) -> Iterator[Optional[VideoInfo]]:
+    """Walk the box tree, yielding the info of each track once its boxes are collected."""
+    f.seek(start)
+    for kind, payload, box_end in _iso_boxes(f, end):
+        if kind == b'trak':
+            track: Dict[bytes, Tuple[int, int]] = {}
+            yield from _iso_tracks(f, payload, box_end, track)
+            yield _iso_track_info(f, track)
+        elif kind in _ISO_CONTAINERS:
+            yield from _iso_tracks(f, payload, box_end, boxes)
+        elif kind in (b'tkhd', b'hdlr', b'mdhd', b'stsd', b'stts'):
+            # MOV has a second hdlr in minf for the data reference; the media one comes first
+            boxes.setdefault(kind, (payload, box_end))
+
+
+def _iso_track_info(f: BinaryIO, track: Dict[bytes, Tuple[int, int]]) -> Optional[VideoInfo]:
+    if not all(kind in track for kind in (b'tkhd', b'hdlr', b'mdhd', b'stsd', b'stts')):
+        return None
+    f.seek(track[b'hdlr'][0] + 8)
+    if f.read(4) != b'vide':
+        return None
+
+    f.seek(track[b'tkhd'][0])
+    version = f.read(1)[0]
+    # Skip flags, times, track id, reserved, duration, reserved, layer, group, volume, reserved
+    f.seek(3 + (32 if version == 1 else 20) + 16, os.SEEK_CUR)
+    if struct.unpack('>9i', f.read(36)) != _IDENTITY_MATRIX:
+        return None
+
+    f.seek(track[b'mdhd'][0])
+    version = f.read(1)[0]
+    f.seek(3 + (16 if version == 1 else 8), os.SEEK_CUR)
+    timescale = struct.unpack('>I', f.read(4))[0]
+
+    # Coded size from the first visual sample entry
+    f.seek(track[b'stsd'][0] + 8 + 32)
+    width, height = struct.unpack('>HH', f.read(4))
+
+    # Frame count and the most common frame duration from the time-to-sample table
+    f.seek(track[b'stts'][0] + 4)
+    entry_count = struct.unpack('>I', f.read(4))[0]
+    frame_count = 0
+    common_count, common_delta = 0, 0
+    for _ in range(entry_count):
+        count, delta = struct.unpack('>II', f.read(8))
+        frame_count += count
+        if count > common_count:
+            common_count, common_delta = count, delta
+    if not (width and height and timescale and common_delta):
+        return None
+    return width, height, timescale / common_delta, frame_count
+
+
+def _avi_video_info(f: BinaryIO) -> Optional[VideoInfo]:
+    """Read the stream header and format of the first video stream of an AVI file."""
+    head = f.read(12)
+    if head[:4] != b'RIFF' or head[8:12] != b'AVI ':
+        return None
+    if f.read(4) != b'LIST':
+        return None
+    hdrl_size = struct.unpack('<I', f.read(4))[0]
+    hdrl = f.read(hdrl_size)
+    if hdrl[:4] != b'hdrl':
+        return None
+
+    position = 4
+    while position + 8 <= len(hdrl):
+        kind, size = struct.unpack('<4sI', hdrl[position:position + 8])
+        chunk = hdrl[position + 8:position + 8 + size]
+        if kind == b'LIST' and chunk[:4] == b'strl':
+            info = _avi_stream_info(chunk[4:])
+            if info is not None:
+                return info
+        position += 8 + size + (size & 1)
+    return None
+
+
+def _avi_stream_info(strl: bytes) -> Optional[VideoInfo]:
+    strh = strf = None
+    position = 0
+    while position + 8 <= len(strl):
+        kind, size = struct.unpack('<4sI', strl[position:position + 8])
+        chunk = strl[position + 8:position + 8 + size]
+        if kind == b'strh':
+            strh = chunk
+        elif kind == b'strf':
+            strf = chunk
+        position += 8 + size + (size & 1)
+    if strh is None or strf is None or strh[:4] != b'vids':
+        return None
+    scale, rate, _, length = struct.unpack('<IIII', strh[20:36])
+    width, height = struct.unpack('<ii', strf[4:12])
+    if not (scale and rate and width):
+        return None
+    return width, abs(height), rate / scale, length
@@ -0,0 +1,61 @@
+import os
+import subprocess
+import tempfile
+from typing import List, Optional, Tuple
+
+from .encoders import AudioSource, audio_args, find_ffmpeg
+
+
+def split_frames(frame_count: int, segments: int) -> List[Tuple[int, int]]:
+    """Split frames [0, frame_count) into contiguous, near-equal ranges.
+
+    Returns:
+        List of (start, end) ranges, at most one per frame.
+    """
+    if segments < 1:
+        raise ValueError(f"Invalid segment count: {segments}. Must be at least 1")
+    segments = max(1, min(segments, frame_count))
+    bounds = [frame_count * i // segments for i in range(segments + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(segments)]
+
+
+def chunk_frames(frame_count: int, chunk: int) -> List[Tuple[int, int]]:
+    """Split frames [0, frame_count) into ranges of chunk frames; the last one may be shorter.
+
+    Returns:
+        List of (start, end) ranges, at least one.
+    """
+    if chunk < 1:
+        raise ValueError(f"Invalid chunk length: {chunk}. Must be at least 1")
+    if frame_count <= 0:
+        return [(0, 0)]
+    return [(start, min(start + chunk, frame_count)) for start in range(0, frame_count, chunk)]
+
+
+def concat_segments(segment_paths: List[str], output_path: str, audio: Optional[AudioSource] = None) -> None:
+    """Join segment files into output_path by stream copy, without re-encoding.
+
+    Uses ffmpeg's concat demuxer, so all segments must share codec and size.
+    With audio, the audio track of the source is copied in the same pass.
+    """
+    ffmpeg = find_ffmpeg()
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+        list_path = f.name
+
+    audio_inputs, audio_outputs = audio_args(audio) if audio is not None else ([], [])
+    try:
+        result = subprocess.run(
+            [ffmpeg, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path,
+             *audio_inputs, *audio_outputs, '-c', 'copy', output_path],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+    finally:
+        os.unlink(list_path)
+
+    if result.returncode != 0:
+        message = result.stderr.decode(errors='replace').strip()
+        raise RuntimeError(f"ffmpeg concat exited with code {result.returncode}: {message}")
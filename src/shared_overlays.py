@@ -0,0 +1,136 @@
+import os
+import secrets
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, Tuple
+
+import numpy as np
+
+from .asset import ImageAsset
+
+# (absolute image path, width, height)
+OverlayKey = Tuple[str, int, int]
+
+
+def overlay_key(path: str, size: Tuple[int, int]) -> OverlayKey:
+    """Return the key of an image scaled to size (width, height)."""
+    return os.path.abspath(path), size[0], size[1]
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        # The publishing process owns the block; attaching must not register it for cleanup
+        return shared_memory.SharedMemory(name=name, track=False)  # type: ignore[call-arg]
+    except TypeError:
+        # Python < 3.13 always tracks; the tracker is shared with the publisher, so it stays harmless
+        return shared_memory.SharedMemory(name=name)
+
+
+@dataclass(frozen=True)
+class SharedOverlay:
+    """A scaled image published in shared memory, as passed to worker processes.
+
+    Attributes:
+        name: Name of the shared memory block
+        width: Image width in pixels
+        height: Image height in pixels
+    """
+
+    name: str
+    width: int
+    height: int
+
+    def copy_to(self, target: np.ndarray) -> None:
+        """Copy the image into target, e.g. the rows of a canvas.
+
+        The block is mapped into this process for the copy only; no private
+        copy of the image is made.
+        """
+        block = _attach(self.name)
+        try:
+            # No view may outlive the mapping, so the array is never bound to a name
+            np.copyto(target, np.ndarray((self.height, self.width, 3), dtype=np.uint8, buffer=block.buf))
+        finally:
+            block.close()
+
+
+class SharedOverlayPool:
+    """Scaled images published once into shared memory for many worker processes.
+
+    Every publish of an image adds a reference to its block and every release
+    removes one; a block is unlinked when its last reference is released, so
+    an image used by many jobs is decoded and resized once and exists in
+    memory once, however many workers paint it.
+    """
+
+    def __init__(self) -> None:
+        self._prefix = f"cvi_{os.getpid()}_{secrets.token_hex(4)}_"
+        self._count = 0
+        self._overlays: Dict[OverlayKey, SharedOverlay] = {}
+        # Keyed by block name
+        self._blocks: Dict[str, shared_memory.SharedMemory] = {}
+        self._keys: Dict[str, OverlayKey] = {}
+        self._refs: Dict[str, int] = {}
+
+    def __enter__(self) -> 'SharedOverlayPool':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def publish(self, path: str, size: Tuple[int, int]) -> SharedOverlay:
+        """Return the image scaled to size (width, height) in shared memory, adding a reference."""
+        key = overlay_key(path, size)
+        if key in self._overlays:
+            overlay = self._overlays[key]
+            self._refs[overlay.name] += 1
+            return overlay
+
+        width, height = size
+        if width <= 0 or height <= 0:
+            raise ValueError(f"Invalid overlay size: {width}x{height}. Must be positive")
+        block = shared_memory.SharedMemory(name=f"{self._prefix}{self._count}", create=True, size=width * height * 3)
+        self._count += 1
+        try:
+            # Resized straight into the block; no private copy is kept
+            ImageAsset(path).get_scaled(width, height, dst=np.ndarray((height, width, 3), dtype=np.uint8,
+                                                                      buffer=block.buf))
+        except BaseException:
+            block.close()
+            block.unlink()
+            raise
+
+        overlay = SharedOverlay(block.name, width, height)
+        self._overlays[key] = overlay
+        self._blocks[overlay.name] = block
+        self._keys[overlay.name] = key
+        self._refs[overlay.name] = 1
+        return overlay
+
+    def release(self, overlay: SharedOverlay) -> None:
+        """Remove a reference to a published image, unlinking its block after the last one."""
+        if overlay.name not in self._refs:
+            return
+        self._refs[overlay.name] -= 1
+        if self._refs[overlay.name] <= 0:
+            self._free(overlay.name)
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the published images."""
+        return sum(overlay.width * overlay.height * 3 for overlay in self._overlays.values())
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def close(self) -> None:
+        """Unlink every block, whatever its references."""
+        for name in list(self._blocks):
+            self._free(name)
+
+    def _free(self, name: str) -> None:
+        block = self._blocks.pop(name)
+        del self._overlays[self._keys.pop(name)]
+        del self._refs[name]
+        block.close()
+        block.unlink()
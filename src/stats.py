@@ -0,0 +1,193 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+from .config import DEFAULTS
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+@dataclass(frozen=True)
+class Progress:
+    """Render progress passed to a progress callback.
+
+    Attributes:
+        frames: Frames written so far
+        total_frames: Expected number of frames, None if unknown
+        elapsed: Seconds since the render started
+        fps: Frames written per second so far
+        eta: Estimated seconds until the render finishes, None if unknown
+    """
+
+    frames: int
+    total_frames: Optional[int]
+    elapsed: float
+    fps: float
+    eta: Optional[float]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Return the peak resident set size of this process in MB, if available."""
+    try:
+        import resource
+    except ImportError:
+        return _windows_peak_rss_mb()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _windows_peak_rss_mb() -> Optional[float]:
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [
+                ('cb', wintypes.DWORD),
+                ('PageFaultCount', wintypes.DWORD),
+                ('PeakWorkingSetSize', ctypes.c_size_t),
+                ('WorkingSetSize', ctypes.c_size_t),
+                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t),
+                ('PeakPagefileUsage', ctypes.c_size_t),
+            ]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        windll: Any = getattr(ctypes, 'windll')
+        handle = windll.kernel32.GetCurrentProcess()
+        if not windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return None
+        return float(counters.PeakWorkingSetSize) / (1024 * 1024)
+    except (AttributeError, OSError):
+        return None
+
+
+class RenderStats:
+    """Cumulative per-stage timings and progress of a render.
+
+    Stages are timed by wrapping the functions that do the work, so a render
+    without stats runs exactly the same calls as before. Stage times are busy
+    times summed over threads; with the threaded pipeline they overlap and
+    can add up to more than the wall time.
+    """
+
+    def __init__(self, progress: Optional[Callable[[Progress], None]] = None,
+                 progress_interval: float = DEFAULTS.PROGRESS_INTERVAL):
+        """Initialize the stats.
+
+        Args:
+            progress: Called with the current progress while frames are written,
+                      at most every progress_interval seconds and once at the end
+            progress_interval: Minimum seconds between progress calls
+        """
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.stages: Dict[str, float] = {}
+        self.frames = 0
+        self.deduplicated = 0
+        self.total_frames: Optional[int] = None
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._last_progress = float('-inf')
+        self._lock = threading.Lock()
+
+    def start(self, total_frames: Optional[int] = None) -> None:
+        """Start the wall clock, unless already started."""
+        if self._started is None:
+            self._started = time.perf_counter()
+        self.total_frames = total_frames
+
+    def add(self, stage: str, seconds: float) -> None:
+        """Add time spent in a stage."""
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        """Time a block of code as part of a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def timed(self, stage: str, func: F) -> F:
+        """Wrap a function so its calls are timed as part of a stage."""
+        perf_counter = time.perf_counter
+        add = self.add
+
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add(stage, perf_counter() - start)
+
+        return wrapper  # type: ignore[return-value]
+
+    def timed_writes(self, stage: str, write: Callable[[Any], None]) -> Callable[[Any], None]:
+        """Wrap a function that writes one frame, timing it and counting the frames."""
+        timed_write = self.timed(stage, write)
+        frames_written = self.frames_written
+
+        def wrapper(frame: Any) -> None:
+            timed_write(frame)
+            frames_written()
+
+        return wrapper
+
+    def frames_written(self, count: int = 1) -> None:
+        """Count written frames and report progress if it is due."""
+        self.frames += count
+        if self.progress is None:
+            return
+        now = time.perf_counter()
+        done = self.total_frames is not None and self.frames >= self.total_frames
+        if done or now - self._last_progress >= self.progress_interval:
+            self._last_progress = now
+            self.progress(self.snapshot())
+
+    def frames_deduplicated(self, count: int = 1) -> None:
+        """Count frames written again without compositing, because every video repeated its frame."""
+        self.deduplicated += count
+
+    def finish(self) -> None:
+        """Stop the wall clock."""
+        self._finished = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the render started."""
+        if self._started is None:
+            return 0.0
+        end = self._finished if self._finished is not None else time.perf_counter()
+        return end - self._started
+
+    def snapshot(self) -> Progress:
+        """Return the current progress."""
+        elapsed = self.elapsed
+        fps = self.frames / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if self.total_frames is not None and fps > 0:
+            eta = max(0, self.total_frames - self.frames) / fps
+        return Progress(self.frames, self.total_frames, elapsed, fps, eta)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the stats as a JSON-serializable dict."""
+        elapsed = self.elapsed
+        return {
+            'frames': self.frames,
+            'seconds': elapsed,
+            'fps': self.frames / elapsed if elapsed > 0 else 0.0,
+            'peak_rss_mb': peak_rss_mb(),
+            'deduplicated_frames': self.deduplicated,
+            'stages': dict(self.stages),
+        }
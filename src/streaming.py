@@ -0,0 +1,127 @@
+from fractions import Fraction
+from typing import Any, BinaryIO, Callable, Generator, Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .config import PIX_FMTS, STREAM_FORMATS
+
+FORMATS = (STREAM_FORMATS.Y4M, STREAM_FORMATS.RAW)
+
+
+class FrameStream:
+    """Composited frames rendered lazily as they are iterated.
+
+    A yielded frame is the renderer's own buffer and is overwritten by a later
+    frame; copy it to keep it. Close the stream, or use it as a context
+    manager, to stop rendering early and release the inputs.
+
+    Attributes:
+        fps: Output frame rate
+        width: Frame width in pixels
+        height: Frame height in pixels
+        frame_count: Number of frames, None if the stream runs until the video ends
+        pix_fmt: 'bgr24' for (height, width, 3) BGR frames or 'yuv420p' for
+                 (height * 3 / 2, width) planar I420 frames
+    """
+
+    def __init__(self, frames: Generator[np.ndarray, None, None], fps: float, size: Tuple[int, int],
+                 frame_count: Optional[int], release: Callable[[], None], pix_fmt: str = PIX_FMTS.BGR24):
+        """Initialize the stream.
+
+        Args:
+            frames: Generator that renders the frames
+            fps: Output frame rate
+            size: Frame (width, height) in pixels
+            frame_count: Number of frames, None if unknown in advance
+            release: Called once when the stream is closed
+            pix_fmt: Layout of the frames
+        """
+        self._frames = frames
+        self._release: Optional[Callable[[], None]] = release
+        self.fps = fps
+        self.width, self.height = size
+        self.frame_count = frame_count
+        self.pix_fmt = pix_fmt
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        return self
+
+    def __next__(self) -> np.ndarray:
+        try:
+            return next(self._frames)
+        except StopIteration:
+            self.close()
+            raise
+
+    def __enter__(self) -> 'FrameStream':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop rendering and release the inputs."""
+        try:
+            self._frames.close()
+        finally:
+            if self._release is not None:
+                release, self._release = self._release, None
+                release()
+
+
+def y4m_header(width: int, height: int, fps: float) -> bytes:
+    """Return the YUV4MPEG2 stream header for 4:2:0 frames."""
+    rate = Fraction(fps).limit_denominator(1001)
+    return f"YUV4MPEG2 W{width} H{height} F{rate.numerator}:{rate.denominator} Ip A1:1 C420jpeg\n".encode('ascii')
+
+
+def write_stream(stream: FrameStream, out: BinaryIO, fmt: str = STREAM_FORMATS.Y4M) -> int:
+    """Write every frame of a stream to a binary file object.
+
+    Args:
+        stream: Frames to write
+        out: Binary file object, e.g. sys.stdout.buffer
+        fmt: 'y4m' for YUV4MPEG2 (odd dimensions are padded to even with black
+             rows or columns) or 'raw' for frames in the stream's pixel format
+             without a header. I420 frames are written to either as they are
+
+    Returns:
+        Number of frames written
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Invalid stream format: {fmt}. Must be one of {', '.join(FORMATS)}")
+
+    written = 0
+    if fmt == STREAM_FORMATS.RAW:
+        for frame in stream:
+            out.write(np.ascontiguousarray(frame).data.cast('B'))
+            written += 1
+        out.flush()
+        return written
+
+    # 4:2:0 subsampling needs even dimensions
+    width = stream.width + stream.width % 2
+    height = stream.height + stream.height % 2
+    out.write(y4m_header(width, height, stream.fps))
+    if stream.pix_fmt == PIX_FMTS.YUV420P:
+        for frame in stream:
+            out.write(b'FRAME\n')
+            out.write(frame.data.cast('B'))
+            written += 1
+        out.flush()
+        return written
+
+    padded = np.zeros((height, width, 3), dtype=np.uint8) if (width, height) != (stream.width, stream.height) \
+        else None
+    yuv = np.empty((height * 3 // 2, width), dtype=np.uint8)
+    for frame in stream:
+        if padded is not None:
+            padded[:stream.height, :stream.width] = frame
+            frame = padded
+        cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420, dst=yuv)
+        out.write(b'FRAME\n')
+        out.write(yuv.data.cast('B'))
+        written += 1
+    out.flush()
+    return written
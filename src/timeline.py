@@ -0,0 +1,203 @@
+from typing import Callable, Dict, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .asset import VideoAsset
+from .config import DEFAULTS, LENGTH_POLICIES
+from .frame_cache import CachedVideo
+from .probe import MediaInfo
+
+POLICIES = (LENGTH_POLICIES.FIRST, LENGTH_POLICIES.SHORTEST, LENGTH_POLICIES.LONGEST, LENGTH_POLICIES.LOOP)
+
+
+def _duration(video: Union[VideoAsset, CachedVideo, MediaInfo]) -> float:
+    if not video.fps or video.fps <= 0:
+        raise ValueError(f"Invalid frame rate for video: {video.path}")
+    return (video.frame_count or 0) / video.fps
+
+
+def timeline_length(videos: Sequence[Union[VideoAsset, MediaInfo]], fps: float,
+                    policy: str = DEFAULTS.LENGTH_POLICY) -> int:
+    """Return the number of output frames of a timeline.
+
+    Args:
+        videos: Videos on the timeline, opened or probed, the first one in
+                folder order first
+        fps: Output frame rate
+        policy: 'first' to end with the first video, 'shortest' or 'longest'
+                to end with the shortest or longest video, 'loop' to end with
+                the longest video while the shorter ones loop
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Invalid length policy: {policy}. Must be one of {', '.join(POLICIES)}")
+    if not videos:
+        raise ValueError("At least one video asset is required")
+
+    durations = [_duration(video) for video in videos]
+    if policy == LENGTH_POLICIES.FIRST:
+        duration = durations[0]
+    elif policy == LENGTH_POLICIES.SHORTEST:
+        duration = min(durations)
+    else:
+        duration = max(durations)
+    return round(duration * fps)
+
+
+class TimedVideo:
+    """A video read at the output frame rate of a timeline.
+
+    Output frame n shows the source frame on screen at time n / fps. Source
+    frames no output frame needs are skipped with grab(), so they are never
+    retrieved or colour-converted; when the output rate is higher than the
+    source rate, frames are repeated instead of decoded again.
+
+    A looping video wraps around at its end. The frames it shows during the
+    first pass are kept in memory, up to cache_bytes, so later passes copy
+    them instead of seeking back and decoding again.
+
+    With a size, every frame is scaled right after it is decoded, so queued,
+    repeated and cached frames take the memory of the scaled size only.
+    """
+
+    def __init__(self, asset: Union[VideoAsset, CachedVideo], fps: float, start: int = 0, loop: bool = False,
+                 cache_bytes: int = DEFAULTS.LOOP_CACHE_MB * 1024 * 1024,
+                 size: Optional[Tuple[int, int]] = None, source_height: Optional[int] = None,
+                 dedup: Optional[Callable[[np.ndarray], bool]] = None):
+        """Initialize the reader.
+
+        Args:
+            asset: Video to read, decoded or from the frame cache
+            fps: Output frame rate
+            start: First output frame to read
+            loop: Wrap around at the end of the video instead of ending
+            cache_bytes: Memory for decoded frames of a looping video
+            size: (width, height) to scale frames to as they are decoded
+                  (default: the video size)
+            source_height: Rows of each decoded frame that are scaled to size
+                           (default: all); less when the bottom is cropped
+            dedup: Called with every decoded frame before it is scaled;
+                   when it returns False, the frame repeats the previous one
+                   and the previous scaled frame is returned instead of
+                   scaling it again. Its answer is ignored for the first
+                   frame decoded after a seek or a loop cache hit, whose
+                   previous frame was not the one it last saw
+        """
+        if fps <= 0:
+            raise ValueError(f"Invalid frame rate: {fps}. Must be positive")
+        _duration(asset)
+        self.asset = asset
+        self.fps = fps
+        self.loop = loop
+        self.cache_bytes = cache_bytes
+        self.size = size
+        self.source_height = asset.height if source_height is None else source_height
+        self.dedup = dedup
+        # Source-size frame decoded before scaling, allocated on first use
+        self._scratch: Optional[np.ndarray] = None
+        self._next = start
+        # Source frame the capture returns next, unknown until the first seek
+        self._position: Optional[int] = None
+        # The container's frame count is used up front so every segment of a
+        # render wraps at the same frame; it is corrected if the video ends early
+        self._length: Optional[int] = asset.frame_count if loop and asset.frame_count > 0 else None
+        self._last_index: Optional[int] = None
+        self._last: Optional[np.ndarray] = None
+        # Whether _last is the scaled frame dedup was last called with
+        self._deduplicable = False
+        self._cache: Dict[int, np.ndarray] = {}
+        self._cached_bytes = 0
+
+    @property
+    def width(self) -> int:
+        return self.asset.width if self.size is None else self.size[0]
+
+    @property
+    def height(self) -> int:
+        return self.asset.height if self.size is None else self.size[1]
+
+    def source_index(self, output_index: int) -> int:
+        """Return the source frame shown at an output frame, before wrapping."""
+        # The epsilon keeps exact ratios (e.g. 60 -> 30 fps) from rounding down
+        return int(output_index * self.asset.fps / self.fps + 1e-6)
+
+    def get_frame(self, dst: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """Return the source frame for the next output frame.
+
+        Args:
+            dst: Optional preallocated buffer to decode into
+
+        Returns:
+            The frame, or None once the video has ended. A repeated frame is
+            the same array returned for the previous output frame, and frames
+            of a looping video may come from its cache; callers must treat
+            arrays other than dst as read-only.
+        """
+        index = self.source_index(self._next)
+        self._next += 1
+        if self._length is not None:
+            if self.loop and self._length:
+                index %= self._length
+            elif index >= self._length:
+                return None
+
+        if index == self._last_index:
+            return self._last
+
+        frame = self._cache.get(index)
+        if frame is not None:
+            self._deduplicable = False
+        else:
+            frame = self._read(index, dst)
+            if frame is None and self.loop and self._length and index >= self._length:
+                # Ended before the container's frame count; wrap at the real end
+                index %= self._length
+                frame = self._cache.get(index)
+                if frame is not None:
+                    self._deduplicable = False
+                else:
+                    frame = self._read(index, dst)
+            if frame is None:
+                return None
+            if self.loop and self._cached_bytes + frame.nbytes <= self.cache_bytes:
+                cached = frame.copy()
+                cached.flags.writeable = False
+                self._cache[index] = cached
+                self._cached_bytes += cached.nbytes
+
+        self._last_index = index
+        self._last = frame
+        return frame
+
+    def _read(self, index: int, dst: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Decode source frame index, skipping forward with grab() where possible."""
+        if self._position is None or index < self._position:
+            self.asset.seek(index)
+            self._position = index
+            self._deduplicable = False
+        while self._position < index:
+            if not self.asset.grab():
+                self._ended()
+                return None
+            self._position += 1
+        frame = self.asset.get_frame(dst=dst if self.size is None else self._scratch)
+        if frame is None:
+            self._ended()
+            return None
+        self._position += 1
+        if self.size is not None:
+            self._scratch = frame
+            # dedup is called even when its answer is ignored, so it remembers this frame
+            repeated = self.dedup is not None and not self.dedup(frame[:self.source_height])
+            if repeated and self._deduplicable and self._last is not None:
+                # Same picture as the previous source frame, which is still scaled
+                return self._last
+            frame = cv2.resize(frame[:self.source_height], self.size, dst=dst)
+            self._deduplicable = True
+        return frame
+
+    def _ended(self) -> None:
+        assert self._position is not None
+        if self._length is None or self._position < self._length:
+            self._length = self._position
+
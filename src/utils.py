@@ -1,5 +1,9 @@
+import fnmatch
 import os
-from typing import List, Optional, Tuple
+import re
+import struct
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, List, Optional, Tuple, Union
 
 from .config import FILE_EXTENSIONS
 
@@ -18,27 +22,169 @@ def get_file_type(path: str) -> Optional[str]:
     return None
 
 
-def discover_assets(folder_path: str) -> List[Tuple[str, str]]:
+@dataclass(frozen=True)
+class DiscoveryOptions:
+    """How media files are found in an input folder.
+
+    Attributes:
+        recursive: Also search subfolders
+        include: Glob patterns; when given, only files matching one of them
+                 are used
+        exclude: Glob patterns of files and subfolders to skip
+        natural_sort: Order numbers by value, so clip2 comes before clip10
+    """
+
+    recursive: bool = False
+    include: Tuple[str, ...] = ()
+    exclude: Tuple[str, ...] = ()
+    natural_sort: bool = False
+
+
+def natural_key(name: str) -> List[Union[int, str]]:
+    """Return a sort key that orders the numbers in a name by value, ignoring case."""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', name)]
+
+
+def discover_assets(folder_path: str, options: Optional[DiscoveryOptions] = None) -> List[Tuple[str, str]]:
     """Discover and sort media files in a folder.
 
+    Patterns are matched against the path relative to the folder, with /
+    between folder names. Files are sorted by that path, folder by folder.
+
+    Args:
+        folder_path: Folder to search
+        options: Recursion, include/exclude patterns and sort order
+                 (default: media files directly in the folder, sorted by name)
+
     Returns:
         List of tuples (file_path, file_type) sorted by filename.
         file_type is either 'image' or 'video'.
     """
     if not os.path.isdir(folder_path):
         raise ValueError(f"Not a valid directory: {folder_path}")
+    options = options or DiscoveryOptions()
+
+    def excluded(relative: str) -> bool:
+        return any(fnmatch.fnmatch(relative, pattern) for pattern in options.exclude)
+
+    found = []
+    pending = [('', folder_path)]
+    while pending:
+        prefix, directory = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                relative = prefix + entry.name
+                # Symlinked folders are not followed, so links cannot form cycles
+                if options.recursive and entry.is_dir(follow_symlinks=False):
+                    if not excluded(relative):
+                        pending.append((relative + '/', entry.path))
+                    continue
+                file_type = get_file_type(entry.name)
+                if file_type is None or not entry.is_file() or excluded(relative):
+                    continue
+                if options.include and not any(fnmatch.fnmatch(relative, p) for p in options.include):
+                    continue
+                found.append((relative, entry.path, file_type))
+
+    key = natural_key if options.natural_sort else str.lower
+    found.sort(key=lambda item: [key(part) for part in item[0].split('/')])
+    return [(path, file_type) for _, path, file_type in found]
+
+
+def read_image_size(path: str) -> Optional[Tuple[int, int]]:
+    """Read the (width, height) of a PNG, JPEG, GIF, BMP or WebP image from its header.
 
-    assets = []
-    for filename in os.listdir(folder_path):
-        filepath = os.path.join(folder_path, filename)
-        if not os.path.isfile(filepath):
+    Only the first bytes of the file are read; nothing is decoded.
+
+    Returns:
+        (width, height), or None if the file cannot be read, the format is not
+        recognised, or the decoded size may differ (JPEG with EXIF data, which
+        OpenCV rotates on load).
+    """
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(32)
+            if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+                width, height = struct.unpack('>II', head[16:24])
+                return width, height
+            if head[:6] in (b'GIF87a', b'GIF89a'):
+                width, height = struct.unpack('<HH', head[6:10])
+                return width, height
+            if head.startswith(b'BM'):
+                width, height = struct.unpack('<ii', head[18:26])
+                return width, abs(height)
+            if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+                return _webp_size(head)
+            if head.startswith(b'\xff\xd8'):
+                f.seek(2)
+                return _jpeg_size(f)
+    except (OSError, struct.error):
+        return None
+    return None
+
+
+def evict_lru(folder: str, max_bytes: int, is_entry: Callable[[str], bool]) -> None:
+    """Delete the least recently modified entries of a cache folder until they fit max_bytes.
+
+    Args:
+        folder: Cache folder
+        max_bytes: Maximum total size of the entries
+        is_entry: Called with each file name; True for files that count as
+                  entries and may be deleted
+    """
+    entries = []
+    total = 0
+    for entry in os.scandir(folder):
+        if entry.is_file() and is_entry(entry.name):
+            stat = entry.stat()
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            total += stat.st_size
+
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+        except OSError:
+            # Removed by another process, or still mapped on a platform that refuses to delete it
             continue
+        total -= size
+
 
-        file_type = get_file_type(filepath)
-        if file_type is not None:
-            assets.append((filepath, file_type))
+def _webp_size(head: bytes) -> Optional[Tuple[int, int]]:
+    chunk = head[12:16]
+    if chunk == b'VP8 ':
+        width, height = struct.unpack('<HH', head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L':
+        bits = struct.unpack('<I', head[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X':
+        width = int.from_bytes(head[24:27], 'little') + 1
+        height = int.from_bytes(head[27:30], 'little') + 1
+        return width, height
+    return None
 
-    # Sort by filename
-    assets.sort(key=lambda x: os.path.basename(x[0]).lower())
 
-    return assets
+def _jpeg_size(f: BinaryIO) -> Optional[Tuple[int, int]]:
+    """Scan JPEG markers up to the start-of-frame segment."""
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code == 0xFF:
+            # Fill byte before a marker
+            f.seek(-1, os.SEEK_CUR)
+            continue
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        segment_start = f.tell()
+        length = struct.unpack('>H', f.read(2))[0]
+        if code == 0xE1 and f.read(4) == b'Exif':
+            return None
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack('>xHH', f.read(5))
+            return width, height
+        f.seek(segment_start + length)
@@ -0,0 +1,171 @@
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def even_size(width: int, height: int) -> Tuple[int, int]:
+    """Return a (width, height) padded to even values, as 4:2:0 chroma needs."""
+    return width + width % 2, height + height % 2
+
+
+def i420_planes(data: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Split a packed (height * 3 / 2, width) I420 buffer into Y, U and V plane views."""
+    width = data.shape[1]
+    height = data.shape[0] * 2 // 3
+    flat = data.reshape(-1)
+    luma = width * height
+    chroma = luma // 4
+    return (flat[:luma].reshape(height, width),
+            flat[luma:luma + chroma].reshape(height // 2, width // 2),
+            flat[luma + chroma:].reshape(height // 2, width // 2))
+
+
+# Y, U and V of black, as OpenCV's BGR to I420 conversion gives them
+_BLACK = tuple(int(plane[0, 0]) for plane in i420_planes(
+    cv2.cvtColor(np.zeros((2, 2, 3), dtype=np.uint8), cv2.COLOR_BGR2YUV_I420)))
+
+
+class I420Frame:
+    """A planar YUV 4:2:0 frame held in one contiguous buffer.
+
+    The buffer holds the full-size Y plane followed by the quarter-size U and
+    V planes, the layout of ffmpeg's yuv420p and of a YUV4MPEG2 frame, so a
+    frame is written out without converting it. It takes half the bytes of a
+    BGR24 frame of the same size.
+
+    Attributes:
+        width: Frame width in pixels, even
+        height: Frame height in pixels, even
+        data: The buffer as a (height * 3 / 2, width) array, the shape OpenCV's
+              I420 conversions read and write
+        y: Y plane view, (height, width)
+        u: U plane view, (height / 2, width / 2)
+        v: V plane view, (height / 2, width / 2)
+    """
+
+    def __init__(self, width: int, height: int):
+        if width < 2 or height < 2 or width % 2 or height % 2:
+            raise ValueError(f"Invalid I420 frame size: {width}x{height}. Must be even")
+        self.width = width
+        self.height = height
+        self.data = np.empty((height * 3 // 2, width), dtype=np.uint8)
+        self.y, self.u, self.v = i420_planes(self.data)
+
+    @classmethod
+    def from_bgr(cls, bgr: np.ndarray) -> 'I420Frame':
+        """Convert a BGR frame, padding odd dimensions with a black row or column."""
+        height, width = bgr.shape[:2]
+        frame = cls(*even_size(width, height))
+        if (frame.width, frame.height) != (width, height):
+            padded = np.zeros((frame.height, frame.width, 3), dtype=np.uint8)
+            padded[:height, :width] = bgr
+            bgr = padded
+        cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV_I420, dst=frame.data)
+        return frame
+
+    def to_bgr(self, dst: Optional[np.ndarray] = None) -> np.ndarray:
+        """Convert the frame to BGR, into dst if given."""
+        return cv2.cvtColor(self.data, cv2.COLOR_YUV2BGR_I420, dst=dst)
+
+
+class I420Region:
+    """A rectangle of an I420 frame that BGR video frames are converted into.
+
+    Each frame is scaled to the rectangle in BGR, converted to I420 and its
+    planes are copied into the frame, so only the region is ever converted.
+    A rectangle with odd edges shares the chroma samples along them with its
+    neighbours; the region keeps its edge rows and columns in a BGR canvas of
+    the whole frame, and convert_edges recomputes the shared samples from it
+    once every region of the frame has been put.
+    """
+
+    def __init__(self, frame: I420Frame, canvas: np.ndarray, left: int, top: int, right: int, bottom: int):
+        """Initialize the region.
+
+        Args:
+            frame: Frame the region belongs to
+            canvas: BGR frame of the same size holding what is painted around
+                    the region; the region writes its edge pixels into it
+            left: First column
+            top: First row
+            right: Column after the last one
+            bottom: Row after the last one
+        """
+        self.width = max(0, right - left)
+        self.height = max(0, bottom - top)
+        self.canvas = canvas[top:top + self.height, left:left + self.width]
+        # The smallest even-aligned rectangle around the region, converted as a whole
+        outer_left, outer_top = left - left % 2, top - top % 2
+        outer_right, outer_bottom = right + right % 2, bottom + bottom % 2
+        self._inner = (slice(top - outer_top, top - outer_top + self.height),
+                       slice(left - outer_left, left - outer_left + self.width))
+        self.planes = (frame.y[top:bottom, left:right],
+                       frame.u[outer_top // 2:outer_bottom // 2, outer_left // 2:outer_right // 2],
+                       frame.v[outer_top // 2:outer_bottom // 2, outer_left // 2:outer_right // 2])
+        self._yuv = np.empty(((outer_bottom - outer_top) * 3 // 2, outer_right - outer_left), dtype=np.uint8)
+        self._converted = i420_planes(self._yuv)
+        self._padded: Optional[np.ndarray] = None
+        if (outer_left, outer_top, outer_right, outer_bottom) != (left, top, right, bottom):
+            self._padded = np.zeros((outer_bottom - outer_top, outer_right - outer_left, 3), dtype=np.uint8)
+        self._scaled: Optional[np.ndarray] = None
+
+        # Two-pixel strips of the canvas across each odd edge, with the chroma row or column they set
+        self._edges: List[Tuple[np.ndarray, np.ndarray, Tuple[np.ndarray, ...], Tuple[np.ndarray, ...]]] = []
+        strips = []
+        if top % 2:
+            strips.append((slice(top - 1, top + 1), slice(outer_left, outer_right)))
+        if bottom % 2:
+            strips.append((slice(bottom - 1, bottom + 1), slice(outer_left, outer_right)))
+        if left % 2:
+            strips.append((slice(outer_top, outer_bottom), slice(left - 1, left + 1)))
+        if right % 2:
+            strips.append((slice(outer_top, outer_bottom), slice(right - 1, right + 1)))
+        if self.width and self.height:
+            for rows, columns in strips:
+                strip = canvas[rows, columns]
+                converted = np.empty((strip.shape[0] * 3 // 2, strip.shape[1]), dtype=np.uint8)
+                chroma = (slice(rows.start // 2, rows.stop // 2), slice(columns.start // 2, columns.stop // 2))
+                self._edges.append((strip, converted, i420_planes(converted)[1:], (frame.u[chroma], frame.v[chroma])))
+
+    def put(self, bgr: np.ndarray) -> None:
+        """Convert a BGR frame into the region, resizing it if the sizes differ."""
+        if not self.width or not self.height:
+            return
+        if bgr.shape[:2] != (self.height, self.width):
+            if self._scaled is None:
+                self._scaled = np.empty((self.height, self.width, 3), dtype=np.uint8)
+            bgr = cv2.resize(bgr, (self.width, self.height), dst=self._scaled)
+        if self._padded is not None:
+            self._padded[self._inner] = bgr
+            self._keep_edges(bgr)
+            bgr = self._padded
+        cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV_I420, dst=self._yuv)
+        np.copyto(self.planes[0], self._converted[0][self._inner])
+        for converted, plane in zip(self._converted[1:], self.planes[1:]):
+            np.copyto(plane, converted)
+
+    def clear(self) -> None:
+        """Fill the region with black."""
+        for plane, value in zip(self.planes, _BLACK):
+            plane[:] = value
+        if self._padded is not None and self.width and self.height:
+            self._keep_edges(np.zeros((self.height, self.width, 3), dtype=np.uint8))
+
+    def convert_edges(self) -> None:
+        """Recompute the chroma samples shared with neighbours from the canvas.
+
+        Call once every region of the frame has been put, so the canvas holds
+        the current edge pixels of all of them.
+        """
+        for strip, converted, chroma, planes in self._edges:
+            cv2.cvtColor(strip, cv2.COLOR_BGR2YUV_I420, dst=converted)
+            for source, plane in zip(chroma, planes):
+                np.copyto(plane, source.reshape(plane.shape))
+
+    def _keep_edges(self, bgr: np.ndarray) -> None:
+        """Copy the outer rows and columns of a frame scaled to the region into the canvas."""
+        self.canvas[0] = bgr[0]
+        self.canvas[-1] = bgr[-1]
+        self.canvas[:, 0] = bgr[:, 0]
+        self.canvas[:, -1] = bgr[:, -1]
@@ -0,0 +1,38 @@
+"""Helpers shared by the tests."""
+
+from typing import Iterable, Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def gray_frames(count: int, size: Tuple[int, int] = (160, 120), offset: int = 0) -> Iterator[np.ndarray]:
+    """Yield count flat BGR frames of size (width, height); frame i has the gray value offset + 8 * i, wrapped."""
+    for i in range(count):
+        yield np.full((size[1], size[0], 3), (offset + 8 * i) % 256, dtype=np.uint8)
+
+
+def write_video(path: str, frames: Iterable[np.ndarray], fps: float = 10.0, fourcc: str = 'MJPG',
+                api: Optional[int] = None) -> None:
+    """Write BGR frames to a video sized after the first frame.
+
+    Args:
+        path: Output file
+        frames: Frames to write, all of the same size
+        fps: Frame rate
+        fourcc: Codec; intra-only MJPG keeps flat frames close to their values
+        api: OpenCV writer backend (default: OpenCV's own MJPG writer for MJPG,
+             any other backend otherwise)
+    """
+    if api is None:
+        api = cv2.CAP_OPENCV_MJPEG if fourcc == 'MJPG' else cv2.CAP_ANY
+    out: Optional[cv2.VideoWriter] = None
+    try:
+        for frame in frames:
+            if out is None:
+                height, width = frame.shape[:2]
+                out = cv2.VideoWriter(path, api, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+            out.write(frame)
+    finally:
+        if out is not None:
+            out.release()
@@ -2,6 +2,7 @@
 
 import os
 import tempfile
+from typing import Any, List, Optional, Tuple
 
 import cv2
 import numpy as np
@@ -48,6 +49,53 @@ class TestImageAsset:
         assert scaled.shape[0] == 200  # Aspect ratio preserved
         asset.release()
 
+    def test_lazy_decode(self, temp_image: str, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that the image is only decoded when its pixels are needed."""
+        calls: List[Tuple[Any, ...]] = []
+        imread = cv2.imread
+
+        def recording_imread(*args: Any) -> Any:
+            calls.append(args)
+            return imread(*args)
+
+        monkeypatch.setattr(cv2, 'imread', recording_imread)
+        asset = ImageAsset(temp_image)
+        assert (asset.width, asset.height) == (200, 100)
+        assert calls == []
+        assert asset.image.shape == (100, 200, 3)
+        assert len(calls) == 1
+
+    @pytest.mark.parametrize('target_width,expected_flag', [
+        (60, cv2.IMREAD_REDUCED_COLOR_2),
+        (50, cv2.IMREAD_REDUCED_COLOR_4),
+        (20, cv2.IMREAD_REDUCED_COLOR_8),
+        (150, None),
+    ])
+    def test_get_scaled_reduced_decode(self, temp_image: str, monkeypatch: pytest.MonkeyPatch,
+                                       target_width: int, expected_flag: Optional[int]) -> None:
+        """Test that downscaling picks the largest reduction that still covers the target."""
+        flags: List[Tuple[Any, ...]] = []
+        imread = cv2.imread
+
+        def recording_imread(path: str, *args: Any) -> Any:
+            flags.append(args)
+            return imread(path, *args)
+
+        monkeypatch.setattr(cv2, 'imread', recording_imread)
+        asset = ImageAsset(temp_image)
+        scaled = asset.get_scaled(target_width=target_width)
+        assert scaled.shape[1] == target_width
+        assert flags == [(expected_flag,) if expected_flag is not None else ()]
+        assert scaled[0, 0].tolist() == [255, 0, 0]
+
+    def test_get_scaled_into_buffer(self, temp_image: str) -> None:
+        """Test resizing straight into a preallocated buffer."""
+        asset = ImageAsset(temp_image)
+        canvas = np.zeros((100, 100, 3), dtype=np.uint8)
+        asset.get_scaled(target_width=100, dst=canvas[:50])
+        assert canvas[:50].min() == 0 and canvas[:50, :, 0].min() == 255
+        assert not canvas[50:].any()
+
     def test_invalid_image_path(self) -> None:
         """Test error handling for invalid image path."""
         with pytest.raises(ValueError, match='Error loading image'):
@@ -0,0 +1,154 @@
+"""Tests for src/async_render.py."""
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Generator, List, Tuple
+
+import cv2
+import numpy as np
+import pytest
+
+import src.combiner
+from src.asset import VideoAsset
+from src.async_render import RenderPool
+from src.combiner import RenderCancelledError, VideoCombiner
+from src.encoders import EncoderOptions, create_encoder
+from src.stats import Progress
+from tests.conftest import gray_frames, write_video
+
+ENCODER = EncoderOptions(backend='mjpg')
+
+
+class TestRenderJob:
+    """Tests for RenderJob class and VideoCombiner.combine_async."""
+
+    @pytest.fixture
+    def temp_folder(self) -> Generator[str, None, None]:
+        """Create a folder with a 200-frame video and an image."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_video(os.path.join(tmpdir, '01_video.avi'), gray_frames(200))
+            cv2.imwrite(os.path.join(tmpdir, '02_image.png'), np.zeros((40, 160, 3), dtype=np.uint8))
+            os.makedirs(os.path.join(tmpdir, 'out'))
+            yield tmpdir
+
+    @pytest.fixture
+    def slow_encoder(self, monkeypatch: pytest.MonkeyPatch) -> List[str]:
+        """Make every frame take 5 ms to encode and record how encoders are closed."""
+        closed: List[str] = []
+
+        def create(*args: Any) -> Any:
+            encoder = create_encoder(*args)
+            write, release, abort = encoder.write, encoder.release, encoder.abort
+
+            def slow_write(frame: np.ndarray) -> None:
+                time.sleep(0.005)
+                write(frame)
+
+            def recorded_release() -> None:
+                closed.append('release')
+                release()
+
+            def recorded_abort() -> None:
+                closed.append('abort')
+                abort()
+
+            monkeypatch.setattr(encoder, 'write', slow_write)
+            monkeypatch.setattr(encoder, 'release', recorded_release)
+            monkeypatch.setattr(encoder, 'abort', recorded_abort)
+            return encoder
+
+        monkeypatch.setattr(src.combiner, 'create_encoder', create)
+        return closed
+
+    def test_invalid_pool(self) -> None:
+        """Test error handling for an invalid worker count."""
+        with pytest.raises(ValueError, match='Invalid worker count'):
+            RenderPool(0)
+
+    def test_combine_with_progress(self, temp_folder: str) -> None:
+        """Test that awaiting a job writes the output and progress events end with the job."""
+        output_path = os.path.join(temp_folder, 'out', 'output.avi')
+
+        async def main() -> List[Progress]:
+            with RenderPool(1) as pool:
+                job = VideoCombiner(encoder=ENCODER).combine_async(temp_folder, output_path, pool)
+                events = [event async for event in job]
+                await job
+                return events
+
+        events = asyncio.run(main())
+        assert os.path.getsize(output_path) > 0
+        assert events[-1].frames == events[-1].total_frames == 200
+
+    @pytest.mark.parametrize('pipeline', [False, True])
+    def test_cancel_releases_and_removes_output(self, temp_folder: str, slow_encoder: List[str],
+                                                monkeypatch: pytest.MonkeyPatch, pipeline: bool) -> None:
+        """Test that cancelling a running job aborts the encoder, releases the video and removes the output."""
+        output_path = os.path.join(temp_folder, 'out', 'output.avi')
+        released: List[str] = []
+        release = VideoAsset.release
+
+        def recorded_release(self: VideoAsset) -> None:
+            released.append(self.path)
+            release(self)
+
+        monkeypatch.setattr(VideoAsset, 'release', recorded_release)
+
+        async def main() -> float:
+            with RenderPool(1) as pool:
+                job = VideoCombiner(encoder=ENCODER, pipeline=pipeline).combine_async(temp_folder, output_path, pool)
+                await asyncio.sleep(0.2)
+                assert os.path.exists(output_path)
+                job.cancel()
+                cancelled_at = time.perf_counter()
+                with pytest.raises(asyncio.CancelledError):
+                    await job
+                return time.perf_counter() - cancelled_at
+
+        assert asyncio.run(main()) < 0.5
+        assert slow_encoder[0] == 'abort'
+        assert released == [os.path.join(temp_folder, '01_video.avi')]
+        assert not os.path.exists(output_path)
+
+    def test_cancel_waiting_job(self, temp_folder: str, slow_encoder: List[str]) -> None:
+        """Test that a job waiting for a busy pool never starts once cancelled."""
+        paths = [os.path.join(temp_folder, 'out', name) for name in ('first.avi', 'second.avi')]
+
+        async def main() -> Tuple[Any, ...]:
+            with RenderPool(1) as pool:
+                combiner = VideoCombiner(encoder=ENCODER)
+                first, second = (combiner.combine_async(temp_folder, path, pool) for path in paths)
+                await asyncio.sleep(0.05)
+                second.cancel()
+                return tuple(await asyncio.gather(first, second, return_exceptions=True))
+
+        first, second = asyncio.run(main())
+        assert first is None
+        assert isinstance(second, asyncio.CancelledError)
+        assert os.path.exists(paths[0]) and not os.path.exists(paths[1])
+        assert slow_encoder == ['release']
+
+    def test_errors_propagate(self, temp_folder: str) -> None:
+        """Test that a failing render raises from await and keeps an existing output."""
+        output_path = os.path.join(temp_folder, 'out', 'output.avi')
+        with open(output_path, 'wb') as f:
+            f.write(b'previous')
+
+        async def main() -> None:
+            with RenderPool(1) as pool:
+                await VideoCombiner().combine_async(os.path.join(temp_folder, 'missing'), output_path, pool)
+
+        with pytest.raises(ValueError, match='Not a valid directory'):
+            asyncio.run(main())
+        assert os.path.getsize(output_path) == len(b'previous')
+
+    def test_cancel_event(self, temp_folder: str) -> None:
+        """Test that a synchronous render stops when its cancel event is set."""
+        cancel = threading.Event()
+        cancel.set()
+        with pytest.raises(RenderCancelledError):
+            VideoCombiner(encoder=ENCODER, cancel=cancel).combine_from_folder(
+                temp_folder, os.path.join(temp_folder, 'out', 'output.avi'))
@@ -0,0 +1,132 @@
+"""Tests for src/batch.py."""
+
+import json
+import os
+import tempfile
+from typing import Generator, List
+
+import cv2
+import numpy as np
+import pytest
+
+from src.batch import BatchJob, JobResult, load_jobs, run_batch, run_job, write_report
+from src.utils import DiscoveryOptions
+
+
+class TestBatch:
+    """Tests for batch job loading and running."""
+
+    @pytest.fixture
+    def temp_root(self) -> Generator[str, None, None]:
+        """Create two job folders, each with a video and an image."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in ('job_b', 'job_a'):
+                folder = os.path.join(tmpdir, 'jobs', name)
+                os.makedirs(folder)
+                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+                out = cv2.VideoWriter(os.path.join(folder, '01_video.mp4'), fourcc, 30.0, (320, 240))
+                for _ in range(10):
+                    out.write(np.zeros((240, 320, 3), dtype=np.uint8))
+                out.release()
+                cv2.imwrite(os.path.join(folder, '02_image.png'), np.zeros((100, 320, 3), dtype=np.uint8))
+            # Folders without media are not jobs
+            os.makedirs(os.path.join(tmpdir, 'jobs', 'empty'))
+            yield tmpdir
+
+    def test_jobs_from_directory(self, temp_root: str) -> None:
+        """Test that every subfolder with media becomes a folder job."""
+        jobs = load_jobs(os.path.join(temp_root, 'jobs'), output_dir='out', defaults={'constraint': 'height'})
+        assert [os.path.basename(job.input or '') for job in jobs] == ['job_a', 'job_b']
+        assert [job.output for job in jobs] == [os.path.join('out', 'job_a.mp4'), os.path.join('out', 'job_b.mp4')]
+        assert all(job.constraint == 'height' for job in jobs)
+
+    def test_jobs_from_json(self, temp_root: str) -> None:
+        """Test loading a JSON manifest with paths relative to the manifest."""
+        manifest = os.path.join(temp_root, 'jobs.json')
+        with open(manifest, 'w') as f:
+            json.dump([
+                {'input': 'jobs/job_a', 'output': 'out/a.mp4', 'threads': 2},
+                {'video': 'v.mp4', 'image': 'i.png', 'output': 'out/b.mp4', 'image_position': 'top'},
+            ], f)
+
+        jobs = load_jobs(manifest)
+        assert jobs[0].input == os.path.join(temp_root, 'jobs/job_a')
+        assert jobs[0].threads == 2
+        assert jobs[1].video == os.path.join(temp_root, 'v.mp4')
+        assert jobs[1].image_position == 'top'
+
+    def test_jobs_from_csv(self, temp_root: str) -> None:
+        """Test loading a CSV manifest with typed columns."""
+        manifest = os.path.join(temp_root, 'jobs.csv')
+        with open(manifest, 'w') as f:
+            f.write('input,output,crop_bottom,pipeline\n')
+            f.write('jobs/job_a,out/a.mp4,20,true\n')
+            f.write('jobs/job_b,out/b.mp4,,\n')
+
+        jobs = load_jobs(manifest)
+        assert jobs[0].crop_bottom == 20
+        assert jobs[0].pipeline is True
+        assert jobs[1].crop_bottom == 0
+        assert jobs[1].pipeline is False
+
+    def test_discovery_fields(self, temp_root: str) -> None:
+        """Test that pattern lists load from JSON lists and ;-separated CSV cells."""
+        manifest = os.path.join(temp_root, 'jobs.csv')
+        with open(manifest, 'w') as f:
+            f.write('input,output,recursive,include,exclude\n')
+            f.write('jobs/job_a,out/a.mp4,true,*.mp4; *.png,\n')
+        job = load_jobs(manifest)[0]
+        assert job.discovery == DiscoveryOptions(recursive=True, include=('*.mp4', '*.png'))
+
+        # Subfolders whose only media is excluded are not jobs
+        jobs = load_jobs(os.path.join(temp_root, 'jobs'), defaults={'exclude': ['*.mp4']})
+        assert [os.path.basename(job.input or '') for job in jobs] == ['job_a', 'job_b']
+        assert load_jobs(os.path.join(temp_root, 'jobs'), defaults={'exclude': ['*.mp4', '*.png']}) == []
+
+    def test_invalid_manifest(self, temp_root: str) -> None:
+        """Test error handling for invalid manifests."""
+        manifest = os.path.join(temp_root, 'jobs.json')
+        with open(manifest, 'w') as f:
+            json.dump([{'input': 'a', 'output': 'a.mp4', 'unknown': 1}], f)
+        with pytest.raises(ValueError, match='Unknown manifest fields: unknown'):
+            load_jobs(manifest)
+
+        with pytest.raises(ValueError, match='Unsupported manifest type'):
+            load_jobs(os.path.join(temp_root, 'jobs.txt'))
+
+    def test_invalid_job(self) -> None:
+        """Test that a job needs a folder or a video/image pair."""
+        with pytest.raises(ValueError, match='needs input'):
+            BatchJob(output='out.mp4', video='v.mp4')
+
+    def test_run_job_failure(self, temp_root: str) -> None:
+        """Test that a failing job is reported instead of raised."""
+        result = run_job(BatchJob(input=os.path.join(temp_root, 'jobs', 'empty'), output='out.mp4'))
+        assert not result.success
+        assert result.error is not None and 'No media files found' in result.error
+
+    def test_run_batch(self, temp_root: str) -> None:
+        """Test running jobs on a pool with one failing job."""
+        output_dir = os.path.join(temp_root, 'out')
+        jobs = load_jobs(os.path.join(temp_root, 'jobs'), output_dir=output_dir)
+        jobs.append(BatchJob(input=os.path.join(temp_root, 'missing'), output=os.path.join(output_dir, 'x.mp4')))
+
+        seen: List[JobResult] = []
+        results = run_batch(jobs, workers=2, on_result=seen.append)
+
+        assert [r.success for r in results] == [True, True, False]
+        assert [r.output for r in results] == [job.output for job in jobs]
+        assert len(seen) == 3
+        assert os.path.exists(os.path.join(output_dir, 'job_a.mp4'))
+
+        report_path = os.path.join(temp_root, 'report.json')
+        write_report(results, report_path)
+        with open(report_path) as f:
+            report = json.load(f)
+        assert report['succeeded'] == 2
+        assert report['failed'] == 1
+        assert report['jobs'][2]['error'].startswith('ValueError')
+
+    def test_job_result_defaults(self) -> None:
+        """Test that successful results carry no error."""
+        assert JobResult('out.mp4', True, 1.0).error is None
@@ -0,0 +1,89 @@
+"""Tests for src/benchmark.py."""
+
+import os
+import tempfile
+from typing import Generator
+
+import cv2
+import pytest
+
+from src.benchmark import (
+    BenchResult,
+    Scenario,
+    compare,
+    load_results,
+    prepare_media,
+    run_scenario,
+    write_results,
+)
+
+
+class TestBenchmark:
+    """Tests for the benchmark suite."""
+
+    @pytest.fixture
+    def temp_dir(self) -> Generator[str, None, None]:
+        """Create a temporary directory for testing."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    def test_prepare_media(self, temp_dir: str) -> None:
+        """Test generating inputs once and reusing them."""
+        scenario = Scenario('tiny', width=160, height=120, frames=5, videos=2, images=1,
+                            image_width=160, image_height=40)
+        folder = prepare_media(scenario, temp_dir)
+        assert sorted(os.listdir(folder)) == ['.complete', '00_video.mp4', '01_video.mp4', '02_image.png']
+
+        cap = cv2.VideoCapture(os.path.join(folder, '00_video.mp4'))
+        assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 5
+        assert int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) == 160
+        cap.release()
+
+        mtime = os.path.getmtime(os.path.join(folder, '00_video.mp4'))
+        assert prepare_media(scenario, temp_dir) == folder
+        assert os.path.getmtime(os.path.join(folder, '00_video.mp4')) == mtime
+
+    def test_invalid_scenario(self) -> None:
+        """Test error handling for invalid scenarios."""
+        with pytest.raises(ValueError, match='Invalid scenario mode'):
+            Scenario('bad', mode='grid')
+        with pytest.raises(ValueError, match='single mode needs one video'):
+            Scenario('bad', mode='single', videos=2)
+
+    def test_run_scenario(self, temp_dir: str) -> None:
+        """Test measuring a small scenario in a separate process."""
+        scenario = Scenario('tiny_single', mode='single', width=160, height=120, frames=10,
+                            image_width=160, image_height=40)
+        result = run_scenario(scenario, temp_dir)
+        assert result.name == 'tiny_single'
+        assert result.frames == 10
+        assert result.seconds > 0
+        assert result.fps == pytest.approx(10 / result.seconds)
+        assert result.peak_rss_mb is None or result.peak_rss_mb > 0
+
+    def test_results_round_trip(self, temp_dir: str) -> None:
+        """Test writing and loading results."""
+        results = [BenchResult('a', 100, 2.0, 50.0, 120.5), BenchResult('b', 10, 1.0, 10.0, None)]
+        path = os.path.join(temp_dir, 'results.json')
+        write_results(results, path)
+        assert load_results(path) == results
+
+    def test_compare(self) -> None:
+        """Test flagging throughput and memory regressions beyond the tolerance."""
+        baseline = [
+            BenchResult('steady', 100, 1.0, 100.0, 100.0),
+            BenchResult('slower', 100, 1.0, 100.0, 100.0),
+            BenchResult('bigger', 100, 1.0, 100.0, 100.0),
+        ]
+        current = [
+            BenchResult('steady', 100, 1.05, 95.0, 105.0),
+            BenchResult('slower', 100, 1.25, 80.0, 100.0),
+            BenchResult('bigger', 100, 1.0, 100.0, 150.0),
+            BenchResult('new', 100, 1.0, 1.0, 1000.0),
+        ]
+        regressions = compare(baseline, current, tolerance=0.1)
+        assert [(r.name, r.metric) for r in regressions] == [('slower', 'fps'), ('bigger', 'peak_rss_mb')]
+        assert regressions[0].change == pytest.approx(-0.2)
+
+        with pytest.raises(ValueError, match='Invalid tolerance'):
+            compare(baseline, current, tolerance=-1)
@@ -0,0 +1,284 @@
+"""Tests for src/checkpoint.py."""
+
+import json
+import os
+import shutil
+import tempfile
+from typing import Generator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import pytest
+
+import src.combiner
+from src.checkpoint import Checkpoint, input_fingerprint
+from src.combiner import VideoCombiner
+from src.encoders import AudioSource, EncoderOptions
+from src.segments import chunk_frames
+from tests.conftest import gray_frames, write_video
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which('ffmpeg') is None, reason='ffmpeg not installed')
+ENCODER = EncoderOptions(backend='mjpg')
+
+
+def _read_indices(path: str) -> List[int]:
+    """Return the source frame index of every frame of a rendered video."""
+    cap = cv2.VideoCapture(path, cv2.CAP_OPENCV_MJPEG)
+    indices = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        indices.append(int(round(float(frame[:120].mean()) / 8)))
+    cap.release()
+    return indices
+
+
+def _join_with_opencv(segment_paths: List[str], output_path: str, audio: Optional[AudioSource] = None) -> None:
+    """Join MJPG segments by re-encoding them, standing in for ffmpeg's stream copy."""
+    fourcc = cv2.VideoWriter_fourcc(*'MJPG')
+    out = None
+    for path in segment_paths:
+        cap = cv2.VideoCapture(path, cv2.CAP_OPENCV_MJPEG)
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if out is None:
+                out = cv2.VideoWriter(output_path, cv2.CAP_OPENCV_MJPEG, fourcc, 10.0,
+                                      (frame.shape[1], frame.shape[0]))
+            out.write(frame)
+        cap.release()
+    assert out is not None
+    out.release()
+
+
+class TestCheckpoint:
+    """Tests for Checkpoint class."""
+
+    @pytest.fixture
+    def temp_dir(self) -> Generator[str, None, None]:
+        """Create a temporary directory for testing."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    def _finish(self, checkpoint: Checkpoint, index: int, data: bytes = b'frames') -> None:
+        with open(checkpoint.partial_path(index), 'wb') as f:
+            f.write(data)
+        checkpoint.mark_complete(index)
+
+    def test_resume_same_params(self, temp_dir: str) -> None:
+        """Test that finished segments survive reopening with the same parameters."""
+        directory = os.path.join(temp_dir, 'out.mp4.resume')
+        checkpoint = Checkpoint.open(directory, {'ranges': [(0, 10), (10, 20)]}, '.mp4')
+        self._finish(checkpoint, 0)
+        assert not os.path.exists(checkpoint.partial_path(0))
+
+        reopened = Checkpoint.open(directory, {'ranges': [(0, 10), (10, 20)]}, '.mp4')
+        assert reopened.is_complete(0)
+        assert not reopened.is_complete(1)
+
+    def test_changed_params_start_over(self, temp_dir: str) -> None:
+        """Test that segments of a render with other parameters are discarded."""
+        directory = os.path.join(temp_dir, 'out.mp4.resume')
+        checkpoint = Checkpoint.open(directory, {'fps': 25}, '.mp4')
+        self._finish(checkpoint, 0)
+
+        reopened = Checkpoint.open(directory, {'fps': 30}, '.mp4')
+        assert not reopened.is_complete(0)
+        assert not os.path.exists(checkpoint.segment_path(0))
+        with open(reopened.path, encoding='utf-8') as f:
+            assert json.load(f)['params'] == {'fps': 30}
+
+    def test_damaged_segment(self, temp_dir: str) -> None:
+        """Test that a segment whose file changed or vanished is not complete."""
+        directory = os.path.join(temp_dir, 'out.mp4.resume')
+        checkpoint = Checkpoint.open(directory, {}, '.mp4')
+        self._finish(checkpoint, 0)
+        self._finish(checkpoint, 1)
+        with open(checkpoint.segment_path(0), 'ab') as f:
+            f.write(b'garbage')
+        os.unlink(checkpoint.segment_path(1))
+        assert not checkpoint.is_complete(0)
+        assert not checkpoint.is_complete(1)
+
+    def test_remove(self, temp_dir: str) -> None:
+        """Test that removing a checkpoint deletes its directory."""
+        directory = os.path.join(temp_dir, 'out.mp4.resume')
+        checkpoint = Checkpoint.open(directory, {}, '.mp4')
+        self._finish(checkpoint, 0)
+        checkpoint.remove()
+        assert not os.path.exists(directory)
+
+    def test_input_fingerprint(self, temp_dir: str) -> None:
+        """Test that a modified input changes the fingerprint."""
+        path = os.path.join(temp_dir, 'input.bin')
+        with open(path, 'wb') as f:
+            f.write(b'a')
+        before = input_fingerprint([path])
+        with open(path, 'ab') as f:
+            f.write(b'b')
+        assert input_fingerprint([path]) != before
+
+    def test_chunk_frames(self) -> None:
+        """Test fixed-length ranges."""
+        assert chunk_frames(25, 10) == [(0, 10), (10, 20), (20, 25)]
+        assert chunk_frames(0, 10) == [(0, 0)]
+        with pytest.raises(ValueError, match='Invalid chunk length'):
+            chunk_frames(10, 0)
+
+
+class TestResumableRender:
+    """Tests for resumable rendering in VideoCombiner."""
+
+    @pytest.fixture
+    def temp_folder(self) -> Generator[str, None, None]:
+        """Create a folder with a 25-frame video and an image."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_video(os.path.join(tmpdir, '01_video.avi'), gray_frames(25))
+            cv2.imwrite(os.path.join(tmpdir, '02_image.png'), np.zeros((40, 160, 3), dtype=np.uint8))
+            os.makedirs(os.path.join(tmpdir, 'out'))
+            yield tmpdir
+
+    @pytest.fixture
+    def joined(self, monkeypatch: pytest.MonkeyPatch) -> List[List[str]]:
+        """Join segments with OpenCV instead of ffmpeg and record each join."""
+        joins: List[List[str]] = []
+
+        def concat(segment_paths: List[str], output_path: str, audio: Optional[AudioSource] = None) -> None:
+            joins.append([os.path.basename(path) for path in segment_paths])
+            _join_with_opencv(segment_paths, output_path)
+
+        monkeypatch.setattr(src.combiner, 'find_ffmpeg', lambda: 'ffmpeg')
+        monkeypatch.setattr(src.combiner, 'concat_segments', concat)
+        return joins
+
+    def test_audio_added_on_join(self, temp_folder: str, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that segments are rendered without audio and the join copies the audio of every frame."""
+        sources: List[Optional[AudioSource]] = []
+
+        def concat(segment_paths: List[str], output_path: str, audio: Optional[AudioSource] = None) -> None:
+            sources.append(audio)
+            _join_with_opencv(segment_paths, output_path)
+
+        monkeypatch.setattr(src.combiner, 'find_ffmpeg', lambda: 'ffmpeg')
+        monkeypatch.setattr(src.combiner, 'concat_segments', concat)
+        output_path = os.path.join(temp_folder, 'out', 'output.avi')
+        VideoCombiner(encoder=ENCODER, resumable=True, checkpoint_seconds=1.0, audio=True).combine_from_folder(
+            temp_folder, output_path)
+
+        assert sources == [AudioSource(os.path.join(temp_folder, '01_video.avi'), 0.0, 2.5)]
+        assert _read_indices(output_path) == list(range(25))
+
+    def test_trimmed(self, temp_folder: str, joined: List[List[str]]) -> None:
+        """Test that the segments of a time window start at the window."""
+        output_path = os.path.join(temp_folder, 'out', 'output.avi')
+        VideoCombiner(encoder=ENCODER, resumable=True, checkpoint_seconds=1.0, start_time=0.5,
+                      end_time=2.2).combine_from_folder(temp_folder, output_path)
+
+        assert joined == [['segment_00000.avi', 'segment_00001.avi']]
+        assert _read_indices(output_path) == list(range(5, 22))
+
+    def test_invalid_checkpoint_length(self) -> None:
+        """Test error handling for an invalid segment length."""
+        with pytest.raises(ValueError, match='Invalid checkpoint length'):
+            VideoCombiner(resumable=True, checkpoint_seconds=0)
+
+    def _crash_on_last(self, temp_folder: str, output_path: str, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Run a resumable render that fails in its last segment."""
+        render = VideoCombiner._load_and_combine_assets
+
+        def crash_on_last(self: VideoCombiner, asset_info: List[Tuple[str, str]], path: str, start: int = 0,
+                          end: Optional[int] = None) -> None:
+            if start == 20:
+                raise RuntimeError('killed')
+            render(self, asset_info, path, start, end)
+
+        with monkeypatch.context() as patch:
+            patch.setattr(VideoCombiner, '_load_and_combine_assets', crash_on_last)
+            with pytest.raises(RuntimeError, match='killed'):
+                VideoCombiner(encoder=ENCODER, resumable=True, checkpoint_seconds=1.0).combine_from_folder(
+                    temp_folder, output_path)
+        assert sorted(os.listdir(output_path + '.resume')) == ['checkpoint.json', 'segment_00000.avi',
+                                                               'segment_00001.avi']
+
+    def test_resume_after_crash(self, temp_folder: str, joined: List[List[str]],
+                                monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that a rerun renders only the segments a failed run did not finish."""
+        output_path = os.path.join(temp_folder, 'out', 'output.avi')
+        self._crash_on_last(temp_folder, output_path, monkeypatch)
+
+        render = VideoCombiner._load_and_combine_assets
+        rendered: List[int] = []
+
+        def counting(self: VideoCombiner, asset_info: List[Tuple[str, str]], path: str, start: int = 0,
+                     end: Optional[int] = None) -> None:
+            rendered.append(start)
+            render(self, asset_info, path, start, end)
+
+        monkeypatch.setattr(VideoCombiner, '_load_and_combine_assets', counting)
+        VideoCombiner(encoder=ENCODER, resumable=True, checkpoint_seconds=1.0).combine_from_folder(
+            temp_folder, output_path)
+
+        assert rendered == [20]
+        assert joined == [['segment_00000.avi', 'segment_00001.avi', 'segment_00002.avi']]
+        assert _read_indices(output_path) == list(range(25))
+        assert not os.path.exists(output_path + '.resume')
+
+    def test_resume_in_parallel(self, temp_folder: str, joined: List[List[str]],
+                                monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test resuming with segments rendered in parallel processes."""
+        output_path = os.path.join(temp_folder, 'out', 'output.avi')
+        self._crash_on_last(temp_folder, output_path, monkeypatch)
+        # Remove one finished segment so two are left to render
+        os.unlink(os.path.join(output_path + '.resume', 'segment_00000.avi'))
+
+        VideoCombiner(encoder=ENCODER, resumable=True, checkpoint_seconds=1.0, segments=2).combine_from_folder(
+            temp_folder, output_path)
+        assert _read_indices(output_path) == list(range(25))
+
+    def test_changed_input_starts_over(self, temp_folder: str, joined: List[List[str]],
+                                       monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that segments are re-rendered when an input changes between runs."""
+        output_path = os.path.join(temp_folder, 'out', 'output.avi')
+        combiner = VideoCombiner(encoder=ENCODER, resumable=True, checkpoint_seconds=1.0)
+
+        def disk_full(segment_paths: List[str], output: str, audio: Optional[AudioSource] = None) -> None:
+            raise OSError('disk full')
+
+        monkeypatch.setattr(src.combiner, 'concat_segments', disk_full)
+        with pytest.raises(OSError, match='disk full'):
+            combiner.combine_from_folder(temp_folder, output_path)
+
+        cv2.imwrite(os.path.join(temp_folder, '02_image.png'), np.zeros((80, 160, 3), dtype=np.uint8))
+        rendered: List[int] = []
+        render = VideoCombiner._load_and_combine_assets
+
+        def counting(self: VideoCombiner, asset_info: List[Tuple[str, str]], path: str, start: int = 0,
+                     end: Optional[int] = None) -> None:
+            rendered.append(start)
+            render(self, asset_info, path, start, end)
+
+        monkeypatch.setattr(VideoCombiner, '_load_and_combine_assets', counting)
+        monkeypatch.setattr(src.combiner, 'concat_segments', _join_with_opencv)
+        combiner.combine_from_folder(temp_folder, output_path)
+        assert rendered == [0, 10, 20]
+        assert not joined
+
+    def test_single_runs_until_video_ends(self, temp_folder: str, joined: List[List[str]]) -> None:
+        """Test a resumable legacy render."""
+        output_path = os.path.join(temp_folder, 'out', 'output.avi')
+        VideoCombiner(encoder=ENCODER, resumable=True, checkpoint_seconds=1.0).combine_single(
+            os.path.join(temp_folder, '01_video.avi'), os.path.join(temp_folder, '02_image.png'), output_path)
+        assert len(joined[0]) == 3
+        assert _read_indices(output_path) == list(range(25))
+
+    @needs_ffmpeg
+    def test_matches_sequential(self, temp_folder: str) -> None:
+        """Test that a resumable render joined by ffmpeg is frame-identical to a sequential one."""
+        sequential_path = os.path.join(temp_folder, 'out', 'sequential.avi')
+        resumable_path = os.path.join(temp_folder, 'out', 'resumable.avi')
+        VideoCombiner(encoder=ENCODER).combine_from_folder(temp_folder, sequential_path)
+        VideoCombiner(encoder=ENCODER, resumable=True, checkpoint_seconds=1.0).combine_from_folder(
+            temp_folder, resumable_path)
+        assert _read_indices(resumable_path) == _read_indices(sequential_path)
@@ -7,7 +7,9 @@ import cv2
 import numpy as np
 import pytest
 
+from src.asset import ImageAsset, VideoAsset
 from src.combiner import VideoCombiner
+from src.encoders import AudioSource
 
 
 class TestVideoCombiner:
@@ -87,6 +89,28 @@ class TestVideoCombiner:
             if os.path.exists(output_path):
                 os.unlink(output_path)
 
+    def test_combine_single_crop_bottom(self, temp_video: str, temp_image: str) -> None:
+        """Test that cropping and image placement are applied to every frame."""
+        with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as f:
+            output_path = f.name
+
+        try:
+            combiner = VideoCombiner()
+            combiner.combine_single(temp_video, temp_image, output_path, crop_bottom=40, image_position='top')
+
+            cap = cv2.VideoCapture(output_path)
+            assert cap.get(cv2.CAP_PROP_FRAME_HEIGHT) == 240 - 40 + 100
+            assert cap.get(cv2.CAP_PROP_FRAME_COUNT) == 30
+            ret, frame = cap.read()
+            cap.release()
+            assert ret
+            # Image (blue) on top, video (green) below
+            assert frame[50, 160, 0] > 200 and frame[50, 160, 1] < 50
+            assert frame[200, 160, 1] > 200 and frame[200, 160, 0] < 50
+        finally:
+            if os.path.exists(output_path):
+                os.unlink(output_path)
+
     def test_combine_from_folder(self, temp_video: str, temp_image: str) -> None:
         """Test combining assets from a folder."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -105,6 +129,19 @@ class TestVideoCombiner:
             assert cap.isOpened()
             cap.release()
 
+    def test_audio_source(self, temp_video: str, temp_image: str) -> None:
+        """Test that the audio of the reference video is cut to the rendered frames."""
+        video, image = VideoAsset(temp_video), ImageAsset(temp_image)
+        try:
+            assert VideoCombiner()._layout_assets([video, image]).audio is None
+            layout = VideoCombiner(audio=True)._layout_assets([image, video], 6, 21)
+            assert layout.audio == AudioSource(temp_video, 0.2, 0.5)
+            layout = VideoCombiner(audio=True)._layout_single(video, image, 0, 'bottom', 3)
+            assert layout.audio == AudioSource(temp_video, 0.1, None)
+        finally:
+            video.release()
+            image.release()
+
     def test_combine_from_folder_empty(self) -> None:
         """Test error handling for empty folder."""
         with tempfile.TemporaryDirectory() as tmpdir:
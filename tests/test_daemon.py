@@ -0,0 +1,187 @@
+"""Tests for src/daemon.py."""
+
+import json
+import os
+import signal
+import tempfile
+import threading
+import time
+from typing import Callable, Generator, List
+
+import cv2
+import numpy as np
+import pytest
+
+from src.batch import BatchJob, JobResult
+from src.daemon import HotFolderDaemon, partial_path, render_atomically
+from tests.conftest import write_video
+
+
+def _write_job(folder: str) -> None:
+    """Write a folder job with a 10-frame video and an image."""
+    os.makedirs(folder)
+    write_video(os.path.join(folder, '01_video.mp4'), [np.zeros((120, 160, 3), dtype=np.uint8)] * 10, 30.0, 'mp4v')
+    cv2.imwrite(os.path.join(folder, '02_image.png'), np.zeros((40, 160, 3), dtype=np.uint8))
+
+
+def _wait_for(condition: Callable[[], bool], timeout: float = 60.0) -> None:
+    """Poll until condition holds or fail after timeout seconds."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'Timed out'
+        time.sleep(0.05)
+
+
+class TestHotFolderDaemon:
+    """Tests for atomic outputs and the HotFolderDaemon class."""
+
+    @pytest.fixture
+    def temp_root(self) -> Generator[str, None, None]:
+        """Create watch, spool and output folders."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in ('watch', 'spool', 'out'):
+                os.makedirs(os.path.join(tmpdir, name))
+            yield tmpdir
+
+    def test_partial_path(self) -> None:
+        """Test that partial outputs are hidden files next to the output."""
+        assert partial_path(os.path.join('out', 'job.mp4')) == os.path.join('out', '.job.partial.mp4')
+
+    def test_render_atomically(self, temp_root: str) -> None:
+        """Test that a finished job is renamed into place without leaving a partial file."""
+        _write_job(os.path.join(temp_root, 'job'))
+        output_path = os.path.join(temp_root, 'out', 'job.mp4')
+
+        result = render_atomically(BatchJob(input=os.path.join(temp_root, 'job'), output=output_path))
+
+        assert result.success and result.output == output_path
+        assert os.listdir(os.path.join(temp_root, 'out')) == ['job.mp4']
+
+    def test_render_atomically_failure(self, temp_root: str) -> None:
+        """Test that a failing job keeps the existing output."""
+        output_path = os.path.join(temp_root, 'out', 'job.mp4')
+        with open(output_path, 'wb') as f:
+            f.write(b'previous')
+
+        result = render_atomically(BatchJob(input=os.path.join(temp_root, 'missing'), output=output_path))
+
+        assert not result.success
+        assert os.listdir(os.path.join(temp_root, 'out')) == ['job.mp4']
+        assert os.path.getsize(output_path) == len(b'previous')
+
+    def test_invalid_arguments(self, temp_root: str) -> None:
+        """Test error handling for invalid daemon arguments."""
+        with pytest.raises(ValueError, match='At least one watch folder'):
+            HotFolderDaemon([], temp_root)
+        with pytest.raises(ValueError, match='Invalid poll interval'):
+            HotFolderDaemon([temp_root], temp_root, poll_interval=0)
+        with pytest.raises(ValueError, match='Not a valid directory'):
+            HotFolderDaemon([os.path.join(temp_root, 'missing')], temp_root)
+
+    def test_settle(self, temp_root: str) -> None:
+        """Test that an input is ready only once it has stopped changing for settle_seconds."""
+        daemon = HotFolderDaemon([os.path.join(temp_root, 'watch')], temp_root, settle_seconds=5)
+        path = os.path.join(temp_root, 'spool', 'jobs.json')
+        with open(path, 'w') as f:
+            f.write('[')
+
+        assert daemon._settled(path, 100.0) is None
+        assert daemon._settled(path, 104.0) is None
+        assert daemon._settled(path, 105.0) is not None
+
+        # Still being written: the wait starts over
+        with open(path, 'a') as f:
+            f.write(']')
+        assert daemon._settled(path, 106.0) is None
+        assert daemon._settled(path, 111.0) is not None
+
+    def test_watch_and_spool(self, temp_root: str) -> None:
+        """Test rendering watched subfolders and spool manifests until the daemon is stopped."""
+        watch, spool, out = (os.path.join(temp_root, name) for name in ('watch', 'spool', 'out'))
+        _write_job(os.path.join(watch, 'job_a'))
+        _write_job(os.path.join(temp_root, 'job_b'))
+        with open(os.path.join(spool, 'good.json'), 'w') as f:
+            json.dump([{'input': '../job_b', 'output': '../out/b.mp4'}], f)
+        with open(os.path.join(spool, 'bad.json'), 'w') as f:
+            f.write('not json')
+
+        results: List[JobResult] = []
+        daemon = HotFolderDaemon([watch], out, spool_dir=spool, workers=1, poll_interval=0.05,
+                                 settle_seconds=0, on_result=results.append)
+        thread = threading.Thread(target=daemon.run)
+        thread.start()
+        try:
+            _wait_for(lambda: os.path.exists(os.path.join(spool, 'done', 'good.json')))
+            _wait_for(lambda: len(results) == 2)
+            # Rendered inputs are not rendered again until they change
+            time.sleep(0.3)
+            assert len(results) == 2
+        finally:
+            daemon.stop()
+            thread.join()
+
+        assert sorted(os.listdir(out)) == ['b.mp4', 'job_a.mp4']
+        assert all(r.success for r in results)
+        with open(os.path.join(spool, 'done', 'good.report.json')) as f:
+            assert json.load(f)['succeeded'] == 1
+        assert sorted(os.listdir(os.path.join(spool, 'failed'))) == [
+            'bad.json', 'bad.json.error.txt', 'bad.report.json']
+        assert not os.path.exists(os.path.join(spool, 'good.json'))
+
+    def test_skips_current_outputs(self, temp_root: str) -> None:
+        """Test that a subfolder whose output is newer than its files is not rendered on startup."""
+        watch, out = os.path.join(temp_root, 'watch'), os.path.join(temp_root, 'out')
+        _write_job(os.path.join(watch, 'job_a'))
+        with open(os.path.join(out, 'job_a.mp4'), 'wb') as f:
+            f.write(b'previous')
+
+        results: List[JobResult] = []
+        daemon = HotFolderDaemon([watch], out, workers=1, poll_interval=0.05, settle_seconds=0,
+                                 on_result=results.append)
+        thread = threading.Thread(target=daemon.run)
+        thread.start()
+        time.sleep(0.3)
+        daemon.stop()
+        thread.join()
+
+        assert results == []
+        assert os.path.getsize(os.path.join(out, 'job_a.mp4')) == len(b'previous')
+
+    def test_failed_job_retried_with_backoff(self, temp_root: str) -> None:
+        """Test that a failing subfolder is retried less and less often, and right away once it is fixed."""
+        watch, out = os.path.join(temp_root, 'watch'), os.path.join(temp_root, 'out')
+        job = os.path.join(watch, 'job_a')
+        _write_job(job)
+        video_path = os.path.join(job, '01_video.mp4')
+        os.rename(video_path, video_path + '.good')
+        with open(video_path, 'wb') as f:
+            f.write(b'not a video')
+
+        results: List[JobResult] = []
+        daemon = HotFolderDaemon([watch], out, workers=1, poll_interval=0.05, settle_seconds=0,
+                                 on_result=results.append)
+        thread = threading.Thread(target=daemon.run)
+        thread.start()
+        try:
+            _wait_for(lambda: len(results) >= 2)
+            time.sleep(1.0)
+            # Retried after 0.1, 0.2, 0.4 and 0.8 s rather than on every poll
+            assert 2 <= len(results) <= 5 and not any(r.success for r in results)
+
+            os.replace(video_path + '.good', video_path)
+            _wait_for(lambda: results[-1].success)
+        finally:
+            daemon.stop()
+            thread.join()
+
+        assert os.path.exists(os.path.join(out, 'job_a.mp4'))
+
+    def test_workers_ignore_sigint(self, temp_root: str) -> None:
+        """Test that pool workers ignore SIGINT, so Ctrl+C drains instead of failing renders."""
+        daemon = HotFolderDaemon([temp_root], temp_root, workers=1)
+        daemon._start_pool()
+        assert daemon._pool is not None
+        try:
+            assert daemon._pool.submit(signal.getsignal, signal.SIGINT).result() == signal.SIG_IGN
+        finally:
+            daemon._pool.shutdown()
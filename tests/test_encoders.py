@@ -0,0 +1,182 @@
+"""Tests for src/encoders.py."""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import Generator
+
+import cv2
+import numpy as np
+import pytest
+
+from src.combiner import VideoCombiner
+from src.encoders import (
+    AudioSource,
+    EncoderOptions,
+    FFmpegEncoder,
+    OpenCVEncoder,
+    audio_args,
+    create_encoder,
+    ffmpeg_command,
+)
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which('ffmpeg') is None, reason='ffmpeg not installed')
+
+
+class TestEncoders:
+    """Tests for encoder backends."""
+
+    @pytest.fixture
+    def temp_dir(self) -> Generator[str, None, None]:
+        """Create a temporary output folder."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    def _write_frames(self, encoder_options: EncoderOptions, path: str) -> None:
+        with create_encoder(encoder_options, path, 30.0, (320, 240)) as encoder:
+            for i in range(10):
+                frame = np.zeros((240, 320, 3), dtype=np.uint8)
+                frame[:, :] = [0, i * 20, 255]
+                encoder.write(frame)
+
+    def _frame_count(self, path: str) -> int:
+        cap = cv2.VideoCapture(path)
+        assert cap.isOpened()
+        count = 0
+        while cap.read()[0]:
+            count += 1
+        cap.release()
+        return count
+
+    def test_invalid_backend(self) -> None:
+        """Test error handling for an unknown backend."""
+        with pytest.raises(ValueError, match='Invalid encoder'):
+            EncoderOptions(backend='invalid')
+
+    def test_default_is_opencv(self) -> None:
+        """Test that the combiner defaults to the OpenCV writer."""
+        assert VideoCombiner().encoder == EncoderOptions()
+        assert EncoderOptions().backend == 'opencv'
+
+    @pytest.mark.parametrize('backend,extension', [('opencv', '.mp4'), ('mjpg', '.avi')])
+    def test_opencv_backends(self, temp_dir: str, backend: str, extension: str) -> None:
+        """Test writing frames with the OpenCV based backends."""
+        path = os.path.join(temp_dir, 'out' + extension)
+        self._write_frames(EncoderOptions(backend), path)
+        assert self._frame_count(path) == 10
+
+    def test_opencv_invalid_output(self, temp_dir: str) -> None:
+        """Test error handling when the writer cannot be opened."""
+        with pytest.raises(ValueError, match='Error opening video writer'):
+            OpenCVEncoder(os.path.join(temp_dir, 'missing', 'out.mp4'), 30.0, (320, 240))
+
+    def test_ffmpeg_command(self) -> None:
+        """Test the ffmpeg command line for raw BGR input."""
+        command = ffmpeg_command('out.mp4', 25.0, (320, 241), 'libx264', preset='fast', crf=20)
+        assert command[command.index('-pix_fmt') + 1] == 'bgr24'
+        assert command[command.index('-s') + 1] == '320x241'
+        assert command[command.index('-c:v') + 1] == 'libx264'
+        assert command[command.index('-preset') + 1] == 'fast'
+        assert command[command.index('-crf') + 1] == '20'
+        assert '-vf' in command  # odd height is padded for yuv420p
+        assert command[-1] == 'out.mp4'
+
+    def test_ffmpeg_command_lossless(self) -> None:
+        """Test that the lossless command omits lossy options."""
+        command = ffmpeg_command('out.mkv', 25.0, (320, 240), 'ffv1', pix_fmt='bgr0')
+        assert '-preset' not in command
+        assert '-crf' not in command
+        assert '-vf' not in command
+
+    def test_ffmpeg_command_yuv_input(self) -> None:
+        """Test that yuv420p frames are read as such and not converted by a filter."""
+        command = ffmpeg_command('out.mp4', 25.0, (320, 240), 'libx264', input_pix_fmt='yuv420p')
+        assert command[command.index('-pix_fmt') + 1] == 'yuv420p'
+        assert '-vf' not in command
+
+    @pytest.mark.parametrize('backend,extension', [('opencv', '.mp4'), ('mjpg', '.avi')])
+    def test_opencv_yuv_input(self, temp_dir: str, backend: str, extension: str) -> None:
+        """Test that the OpenCV backends accept I420 frames."""
+        path = os.path.join(temp_dir, 'out' + extension)
+        frame = cv2.cvtColor(np.full((240, 320, 3), [0, 128, 255], dtype=np.uint8), cv2.COLOR_BGR2YUV_I420)
+        with create_encoder(EncoderOptions(backend), path, 30.0, (320, 240), 'yuv420p') as encoder:
+            for _ in range(5):
+                encoder.write(frame)
+        cap = cv2.VideoCapture(path)
+        ok, decoded = cap.read()
+        cap.release()
+        assert ok
+        assert np.abs(decoded.astype(int).mean(axis=(0, 1)) - [0, 128, 255]).max() < 8
+
+    def test_invalid_input_pix_fmt(self, temp_dir: str) -> None:
+        """Test error handling for an unknown input pixel format."""
+        with pytest.raises(ValueError, match='Invalid input pixel format'):
+            OpenCVEncoder(os.path.join(temp_dir, 'out.mp4'), 30.0, (320, 240), input_pix_fmt='rgb24')
+
+    def test_ffmpeg_command_audio(self) -> None:
+        """Test that the audio of a source is added as a second input and copied."""
+        command = ffmpeg_command('out.mp4', 25.0, (320, 240), 'libx264', audio=AudioSource('in.mp4', 1.5, 2.0))
+        second = command.index('in.mp4')
+        assert command[second - 5:second] == ['-ss', '1.500000', '-t', '2.000000', '-i']
+        assert command.index('-i') < second < command.index('-c:v')
+        assert command[command.index('1:a:0?') - 1] == '-map'
+        assert command[command.index('-c:a') + 1] == 'copy'
+        assert '-shortest' not in command
+
+    def test_audio_args_until_end(self) -> None:
+        """Test that audio without a duration stops with the video."""
+        inputs, outputs = audio_args(AudioSource('in.mp4'))
+        assert inputs == ['-i', 'in.mp4']
+        assert outputs[-1] == '-shortest'
+
+    def test_audio_needs_ffmpeg(self, temp_dir: str, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that the OpenCV backends fail before writing anything when audio cannot be added."""
+        monkeypatch.setattr(shutil, 'which', lambda _: None)
+        with pytest.raises(RuntimeError, match='ffmpeg not found'):
+            create_encoder(EncoderOptions(), os.path.join(temp_dir, 'out.mp4'), 30.0, (320, 240),
+                           audio=AudioSource('in.mp4'))
+        assert os.listdir(temp_dir) == []
+
+    @needs_ffmpeg
+    @pytest.mark.parametrize('backend', ['opencv', 'ffmpeg'])
+    def test_audio_passthrough(self, temp_dir: str, backend: str) -> None:
+        """Test that a combined output carries the audio of its video and no hidden file is left."""
+        video_path = os.path.join(temp_dir, 'input.mp4')
+        subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-f', 'lavfi', '-i', 'testsrc=size=320x240:rate=30',
+                        '-f', 'lavfi', '-i', 'sine=frequency=440', '-t', '2', '-c:v', 'libx264', '-c:a', 'aac',
+                        video_path], check=True)
+        cv2.imwrite(os.path.join(temp_dir, 'image.png'), np.zeros((80, 320, 3), dtype=np.uint8))
+        output_path = os.path.join(temp_dir, 'out', 'output.mp4')
+        os.makedirs(os.path.dirname(output_path))
+
+        VideoCombiner(encoder=EncoderOptions(backend, preset='ultrafast'), audio=True).combine_single(
+            video_path, os.path.join(temp_dir, 'image.png'), output_path)
+
+        info = subprocess.run(['ffmpeg', '-i', output_path], capture_output=True, text=True).stderr
+        assert 'Audio: aac' in info
+        assert os.listdir(os.path.dirname(output_path)) == ['output.mp4']
+        assert self._frame_count(output_path) == 60
+
+    def test_ffmpeg_missing(self, temp_dir: str, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test error handling when ffmpeg is not installed."""
+        monkeypatch.setattr(shutil, 'which', lambda _: None)
+        with pytest.raises(RuntimeError, match='ffmpeg not found'):
+            FFmpegEncoder(os.path.join(temp_dir, 'out.mp4'), 30.0, (320, 240))
+
+    @needs_ffmpeg
+    @pytest.mark.parametrize('backend,extension', [('ffmpeg', '.mp4'), ('ffv1', '.mkv')])
+    def test_ffmpeg_backends(self, temp_dir: str, backend: str, extension: str) -> None:
+        """Test writing frames through an ffmpeg subprocess."""
+        path = os.path.join(temp_dir, 'out' + extension)
+        self._write_frames(EncoderOptions(backend, preset='ultrafast'), path)
+        assert self._frame_count(path) == 10
+
+    @needs_ffmpeg
+    def test_ffmpeg_error(self, temp_dir: str) -> None:
+        """Test that ffmpeg failures are raised with its error output."""
+        encoder = FFmpegEncoder(os.path.join(temp_dir, 'out.mp4'), 30.0, (320, 240), codec='no-such-codec')
+        with pytest.raises(RuntimeError, match='ffmpeg exited'):
+            for _ in range(100):
+                encoder.write(np.zeros((240, 320, 3), dtype=np.uint8))
+            encoder.release()
@@ -0,0 +1,195 @@
+"""Tests for src/frame_cache.py."""
+
+import os
+import tempfile
+import time
+from typing import Dict, Generator, List, Optional
+
+import cv2
+import numpy as np
+import pytest
+
+from src.asset import VideoAsset
+from src.combiner import VideoCombiner
+from src.frame_cache import CachedVideo, FrameCache
+from tests.conftest import gray_frames, write_video
+
+
+def _write_video(path: str, frame_count: int, width: int = 160, height: int = 120, offset: int = 0) -> None:
+    """Write an MJPG video whose frames each have their own gray level, with a blue left half."""
+    frames = list(gray_frames(frame_count, (width, height), offset))
+    for frame in frames:
+        frame[:, :width // 2, 0] = 255
+    write_video(path, frames)
+
+
+def _decode(path: str) -> List[np.ndarray]:
+    """Decode every frame of a video."""
+    video = VideoAsset(path)
+    try:
+        return [frame.copy() for frame in video.frames()]
+    finally:
+        video.release()
+
+
+def _no_decode(self: VideoAsset, dst: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+    raise AssertionError('video was decoded')
+
+
+class TestFrameCache:
+    """Tests for FrameCache class."""
+
+    @pytest.fixture
+    def temp_dir(self) -> Generator[str, None, None]:
+        """Create a temporary folder with an 8-frame test video."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _write_video(os.path.join(tmpdir, 'video.avi'), 8)
+            yield tmpdir
+
+    def _open(self, cache: FrameCache, path: str, **kwargs: object) -> Optional[CachedVideo]:
+        video = VideoAsset(path)
+        try:
+            return cache.open(video, **kwargs)  # type: ignore[arg-type]
+        finally:
+            video.release()
+
+    def test_hit_skips_decode(self, temp_dir: str, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that a later cache instance maps the frames without decoding."""
+        video_path = os.path.join(temp_dir, 'video.avi')
+        cache_dir = os.path.join(temp_dir, 'cache')
+        expected = _decode(video_path)
+        assert self._open(FrameCache(cache_dir), video_path) is not None
+
+        monkeypatch.setattr(VideoAsset, 'get_frame', _no_decode)
+        cached = self._open(FrameCache(cache_dir), video_path)
+        assert cached is not None
+        assert isinstance(cached.frames, np.memmap) and not cached.frames.flags.writeable
+        assert (cached.width, cached.height, cached.fps, cached.frame_count) == (160, 120, 10.0, 8)
+        assert all(np.array_equal(frame, expected_frame) for frame, expected_frame in zip(cached.frames, expected))
+
+    def test_reads_like_a_video(self, temp_dir: str) -> None:
+        """Test reading, skipping and seeking frames of a cached video."""
+        cached = self._open(FrameCache(os.path.join(temp_dir, 'cache')), os.path.join(temp_dir, 'video.avi'))
+        assert cached is not None
+        first = cached.get_frame()
+        assert first is not None and np.shares_memory(first, cached.frames)
+        assert cached.grab()
+        dst = np.empty((120, 160, 3), dtype=np.uint8)
+        assert cached.get_frame(dst) is dst and np.array_equal(dst, cached.frames[2])
+        cached.seek(7)
+        assert cached.get_frame() is not None
+        assert cached.get_frame() is None and not cached.grab()
+        cached.reset()
+        rewound = cached.get_frame()
+        assert rewound is not None and np.array_equal(rewound, first)
+
+    def test_scaled_and_cropped(self, temp_dir: str) -> None:
+        """Test that frames are stored cropped to source_height and scaled, each size in its own entry."""
+        video_path = os.path.join(temp_dir, 'video.avi')
+        cache = FrameCache(os.path.join(temp_dir, 'cache'))
+        cached = self._open(cache, video_path, size=(80, 50), source_height=100)
+        assert cached is not None and cached.frames.shape == (8, 50, 80, 3)
+        expected = cv2.resize(_decode(video_path)[3][:100], (80, 50))
+        assert np.array_equal(cached.frames[3], expected)
+
+        cropped = self._open(cache, video_path, source_height=100)
+        assert cropped is not None and cropped.frames.shape == (8, 100, 160, 3)
+        assert len([name for name in os.listdir(cache.cache_dir) if name.endswith('.frames')]) == 2
+
+    def test_changed_file_invalidates(self, temp_dir: str) -> None:
+        """Test that modifying the source video produces a fresh entry."""
+        video_path = os.path.join(temp_dir, 'video.avi')
+        cache = FrameCache(os.path.join(temp_dir, 'cache'))
+        assert self._open(cache, video_path) is not None
+
+        _write_video(video_path, 4, offset=100)
+        os.utime(video_path, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+        cached = self._open(cache, video_path)
+        assert cached is not None and len(cached.frames) == 4
+        assert np.array_equal(cached.frames[0], _decode(video_path)[0])
+
+    def test_truncated_entry_is_decoded_again(self, temp_dir: str) -> None:
+        """Test that an entry shorter than its header says is replaced."""
+        video_path = os.path.join(temp_dir, 'video.avi')
+        cache = FrameCache(os.path.join(temp_dir, 'cache'))
+        assert self._open(cache, video_path) is not None
+        entry = cache.entry_path(video_path, (160, 120), 120)
+        with open(entry, 'r+b') as f:
+            f.truncate(os.path.getsize(entry) - 1000)
+
+        assert self._open(cache.read_only(), video_path) is None
+        cached = self._open(cache, video_path)
+        assert cached is not None and len(cached.frames) == 8
+
+    def test_not_filled(self, temp_dir: str) -> None:
+        """Test that videos are not cached when they do not fit or filling is off."""
+        video_path = os.path.join(temp_dir, 'video.avi')
+        cache_dir = os.path.join(temp_dir, 'cache')
+        # Room for seven 160x120 frames but not eight
+        assert self._open(FrameCache(cache_dir, max_bytes=7 * 160 * 120 * 3 + 64), video_path) is None
+        assert self._open(FrameCache(cache_dir, fill=False), video_path) is None
+        assert not os.listdir(cache_dir)
+
+    def test_eviction(self, temp_dir: str) -> None:
+        """Test that the least recently used entries are evicted over the size cap."""
+        video_path = os.path.join(temp_dir, 'video.avi')
+        # Room for one entry of 80x60 frames but not two
+        cache = FrameCache(os.path.join(temp_dir, 'cache'), max_bytes=8 * 80 * 60 * 3 + 1000)
+        assert self._open(cache, video_path, size=(80, 60)) is not None
+        time.sleep(0.01)
+        assert self._open(cache, video_path, size=(80, 59)) is not None
+
+        entries = [name for name in os.listdir(cache.cache_dir) if name.endswith('.frames')]
+        assert entries == [os.path.basename(cache.entry_path(video_path, (80, 59), 120))]
+
+    def test_invalid_size(self, temp_dir: str) -> None:
+        """Test error handling for a negative size cap."""
+        with pytest.raises(ValueError, match='Invalid cache size'):
+            FrameCache(os.path.join(temp_dir, 'cache'), max_bytes=-1)
+
+
+class TestFrameCacheCombine:
+    """Tests for rendering with a frame cache."""
+
+    @pytest.fixture
+    def temp_folder(self) -> Generator[str, None, None]:
+        """Create a folder with an 8-frame and a 3-frame video and an image."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _write_video(os.path.join(tmpdir, '01_video.avi'), 8)
+            _write_video(os.path.join(tmpdir, '02_loop.avi'), 3, width=200, height=100, offset=50)
+            cv2.imwrite(os.path.join(tmpdir, '03_image.png'), np.full((40, 160, 3), 90, dtype=np.uint8))
+            yield tmpdir
+
+    def _render(self, folder: str, **options: object) -> List[np.ndarray]:
+        with VideoCombiner(**options).iter_composited_frames(folder) as stream:  # type: ignore[arg-type]
+            return [frame.copy() for frame in stream]
+
+    @pytest.mark.parametrize('options', [{}, {'max_width': 100}, {'yuv': True, 'start_time': 0.3}])
+    def test_frames_unchanged(self, temp_folder: str, monkeypatch: pytest.MonkeyPatch,
+                              options: Dict[str, object]) -> None:
+        """Test that renders from the cache equal decoded renders, and that a second render decodes nothing."""
+        cache_dir = os.path.join(temp_folder, 'cache')
+        options = dict(options, length='loop')
+        expected = self._render(temp_folder, **options)
+        filled = self._render(temp_folder, frame_cache=FrameCache(cache_dir), **options)
+
+        monkeypatch.setattr(VideoAsset, 'get_frame', _no_decode)
+        cached = self._render(temp_folder, frame_cache=FrameCache(cache_dir), **options)
+        assert len(cached) == len(filled) == len(expected)
+        assert all(np.array_equal(a, b) for a, b in zip(expected, filled))
+        assert all(np.array_equal(a, b) for a, b in zip(expected, cached))
+
+    def test_single(self, temp_folder: str) -> None:
+        """Test that legacy renders store the cropped video."""
+        cache = FrameCache(os.path.join(temp_folder, 'cache'))
+        video_path = os.path.join(temp_folder, '01_video.avi')
+        image_path = os.path.join(temp_folder, '03_image.png')
+        expected = VideoCombiner()
+        cached = VideoCombiner(frame_cache=cache)
+        with expected.iter_composited_single(video_path, image_path, crop_bottom=20) as stream:
+            frames = [frame.copy() for frame in stream]
+        with cached.iter_composited_single(video_path, image_path, crop_bottom=20) as stream:
+            rendered = [frame.copy() for frame in stream]
+        assert len(rendered) == len(frames) == 8
+        assert all(np.array_equal(a, b) for a, b in zip(frames, rendered))
+        assert os.path.isfile(cache.entry_path(video_path, (160, 100), 100))
@@ -0,0 +1,150 @@
+"""Tests for src/layout.py."""
+
+import os
+import tempfile
+from typing import Generator, List
+
+import cv2
+import numpy as np
+import pytest
+
+from src.combiner import VideoCombiner
+from src.encoders import EncoderOptions
+from src.layout import LayoutPlan, Rect, fit_layout, plan_layout
+from tests.conftest import gray_frames, write_video
+
+ENCODER = EncoderOptions(backend='mjpg')
+
+
+def _read_frames(path: str) -> List[np.ndarray]:
+    """Decode every frame of a rendered video."""
+    cap = cv2.VideoCapture(path, cv2.CAP_OPENCV_MJPEG)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+class TestPlanLayout:
+    """Tests for plan_layout function."""
+
+    def test_vstack_width(self) -> None:
+        """Test that a vertical stack scales every asset to the reference width."""
+        plan = plan_layout(((160, 120), (320, 80)), 0, 'vstack', 'width')
+        assert plan == LayoutPlan(160, 160, (Rect(0, 0, 160, 120), Rect(0, 120, 160, 40)))
+        assert plan.covered
+
+    def test_vstack_height_centers_narrow_assets(self) -> None:
+        """Test that the height constraint keeps the aspect ratio and centers narrower assets."""
+        plan = plan_layout(((160, 120), (60, 120)), 0, 'vstack', 'height')
+        assert plan.size == (160, 240)
+        assert plan.rects[1] == Rect(50, 120, 60, 120)
+        assert not plan.covered
+
+    def test_hstack_height(self) -> None:
+        """Test that a horizontal stack places assets left to right at the reference height."""
+        plan = plan_layout(((160, 120), (80, 40)), 0, 'hstack', 'height')
+        assert plan.rects == (Rect(0, 0, 160, 120), Rect(160, 0, 240, 120))
+        assert plan.size == (400, 120)
+
+    def test_grid(self) -> None:
+        """Test the default and explicit column counts of a grid."""
+        sizes = ((160, 120),) * 5
+        plan = plan_layout(sizes, 0, 'grid', 'width')
+        assert plan.size == (480, 240)
+        assert plan.rects[4] == Rect(160, 120, 160, 120)
+        assert plan_layout(sizes, 0, 'grid', 'width', columns=2).size == (320, 360)
+
+    def test_grid_rows_fit_tallest_asset(self) -> None:
+        """Test that a row is as tall as its tallest asset with the width constraint."""
+        plan = plan_layout(((160, 120), (160, 40), (160, 160)), 0, 'grid', 'width', columns=2)
+        assert plan.rects[1] == Rect(160, 40, 160, 40)
+        assert plan.size == (320, 280)
+
+    def test_plans_are_cached(self) -> None:
+        """Test that identical dimensions return the same plan."""
+        first = plan_layout(((160, 120), (320, 80)), 0, 'grid', 'width', 2)
+        assert plan_layout(((160, 120), (320, 80)), 0, 'grid', 'width', 2) is first
+
+    def test_invalid_options(self) -> None:
+        """Test error handling for invalid layouts, column counts and reference assets."""
+        with pytest.raises(ValueError, match='Invalid layout'):
+            plan_layout(((160, 120),), 0, 'diagonal')
+        with pytest.raises(ValueError, match='Invalid column count'):
+            plan_layout(((160, 120),), 0, 'grid', 'width', 0)
+        with pytest.raises(ValueError, match='Invalid reference asset'):
+            plan_layout(((160, 120),), 1)
+
+
+class TestFitLayout:
+    """Tests for fit_layout function."""
+
+    def test_scales_to_limit(self) -> None:
+        """Test that a plan is scaled down to the tighter limit and rectangles still touch."""
+        plan = plan_layout(((3840, 2160), (3840, 1080)), 0, 'vstack', 'width')
+        fitted = fit_layout(plan, 1920, 1920)
+        assert fitted.size == (1920, 1620)
+        assert fitted.rects == (Rect(0, 0, 1920, 1080), Rect(0, 1080, 1920, 540))
+        assert fitted.covered
+
+    def test_small_plan_unchanged(self) -> None:
+        """Test that a plan within the limits is returned as is."""
+        plan = plan_layout(((160, 120),), 0)
+        assert fit_layout(plan, 1920, None) is plan
+
+    def test_invalid_limit(self) -> None:
+        """Test error handling for an invalid maximum size."""
+        with pytest.raises(ValueError, match='Invalid maximum width'):
+            fit_layout(plan_layout(((160, 120),), 0), 0)
+
+
+class TestLayoutRender:
+    """Tests for rendering horizontal and grid layouts in VideoCombiner."""
+
+    @pytest.fixture
+    def temp_folder(self) -> Generator[str, None, None]:
+        """Create a folder with two videos and a half-height image."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_video(os.path.join(tmpdir, '01_video.avi'), gray_frames(10))
+            cv2.imwrite(os.path.join(tmpdir, '02_image.png'), np.full((60, 160, 3), 255, dtype=np.uint8))
+            write_video(os.path.join(tmpdir, '03_video.avi'), gray_frames(10))
+            os.makedirs(os.path.join(tmpdir, 'out'))
+            yield tmpdir
+
+    def test_invalid_layout(self) -> None:
+        """Test error handling for an invalid layout."""
+        with pytest.raises(ValueError, match='Invalid layout'):
+            VideoCombiner(layout='diagonal')
+
+    def test_hstack(self, temp_folder: str) -> None:
+        """Test that videos are decoded into their columns and the image is scaled to the video height."""
+        output_path = os.path.join(temp_folder, 'out', 'output.avi')
+        VideoCombiner(encoder=ENCODER, layout='hstack', constraint='height').combine_from_folder(
+            temp_folder, output_path)
+
+        frames = _read_frames(output_path)
+        assert len(frames) == 10
+        frame = frames[5].astype(int)
+        assert frame.shape == (120, 640, 3)
+        # Videos in the first and last column, the image in the middle
+        assert abs(frame[:, :160].mean() - 40) < 3
+        assert abs(frame[:, 480:].mean() - 40) < 3
+        assert frame[:, 170:470].mean() > 250
+
+    def test_grid_pipeline_matches_sequential(self, temp_folder: str) -> None:
+        """Test that the pipeline fills the same grid cells as the sequential renderer."""
+        paths = [os.path.join(temp_folder, 'out', name) for name in ('sequential.avi', 'pipeline.avi')]
+        for path, pipeline in zip(paths, (False, True)):
+            VideoCombiner(encoder=ENCODER, layout='grid', pipeline=pipeline).combine_from_folder(temp_folder, path)
+
+        sequential, threaded = (_read_frames(path) for path in paths)
+        assert sequential[0].shape == (240, 320, 3)
+        assert len(sequential) == len(threaded) == 10
+        for a, b in zip(sequential, threaded):
+            assert np.array_equal(a, b)
+        # The fourth cell has no asset and stays black
+        assert sequential[3][120:, 160:].max() < 8
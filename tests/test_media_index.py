@@ -0,0 +1,90 @@
+"""Tests for src/media_index.py."""
+
+import os
+import pickle
+import tempfile
+from typing import Generator, List
+
+import cv2
+import numpy as np
+import pytest
+
+import src.media_index
+from src.combiner import VideoCombiner
+from src.media_index import MediaIndex
+from src.probe import MediaInfo, probe
+
+
+class TestMediaIndex:
+    """Tests for MediaIndex class."""
+
+    @pytest.fixture
+    def temp_folder(self) -> Generator[str, None, None]:
+        """Create a folder with a 12-frame video and an image."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            out = cv2.VideoWriter(os.path.join(tmpdir, '01_video.mp4'), fourcc, 24.0, (160, 120))
+            for _ in range(12):
+                out.write(np.zeros((120, 160, 3), dtype=np.uint8))
+            out.release()
+            cv2.imwrite(os.path.join(tmpdir, '02_image.png'), np.zeros((40, 160, 3), dtype=np.uint8))
+            yield tmpdir
+
+    @pytest.fixture
+    def probed(self, monkeypatch: pytest.MonkeyPatch) -> List[str]:
+        """Record every file the index probes."""
+        paths: List[str] = []
+
+        def record(path: str) -> MediaInfo:
+            paths.append(os.path.basename(path))
+            return probe(path)
+
+        monkeypatch.setattr(src.media_index, 'probe', record)
+        return paths
+
+    def test_probes_only_changed_files(self, temp_folder: str, probed: List[str]) -> None:
+        """Test that files are probed once and again only after they change."""
+        paths = [os.path.join(temp_folder, name) for name in ('01_video.mp4', '02_image.png')]
+        index_path = os.path.join(temp_folder, 'index', 'media.sqlite')
+
+        with MediaIndex(index_path) as index:
+            first = index.probe_all(paths)
+        with MediaIndex(index_path) as index:
+            assert index.probe_all(paths) == first
+            assert probed == ['01_video.mp4', '02_image.png']
+
+            cv2.imwrite(paths[1], np.zeros((50, 160, 3), dtype=np.uint8))
+            os.utime(paths[1], ns=(0, 1))
+            assert index.probe(paths[1]).height == 50
+            assert probed[-1] == '02_image.png' and len(probed) == 3
+
+        assert first[0].frame_count == 12 and first[0].fps == pytest.approx(24.0)
+
+    def test_prune(self, temp_folder: str) -> None:
+        """Test that entries of deleted files are removed."""
+        path = os.path.join(temp_folder, '02_image.png')
+        with MediaIndex(os.path.join(temp_folder, 'media.sqlite')) as index:
+            index.probe(path)
+            os.unlink(path)
+            assert index.prune() == 1
+            assert index.prune() == 0
+
+    def test_pickle_and_shared(self, temp_folder: str) -> None:
+        """Test that an index can be sent to worker processes and is shared per process."""
+        index_path = os.path.join(temp_folder, 'media.sqlite')
+        index = MediaIndex(index_path)
+        index.probe(os.path.join(temp_folder, '02_image.png'))
+
+        copy = pickle.loads(pickle.dumps(index))
+        assert copy.probe(os.path.join(temp_folder, '02_image.png')).width == 160
+        assert MediaIndex.shared(index_path) is MediaIndex.shared(index_path)
+        index.close()
+        copy.close()
+
+    def test_combiner_timeline_from_index(self, temp_folder: str, probed: List[str]) -> None:
+        """Test that the combiner reads timelines and image sizes from the index."""
+        with MediaIndex(os.path.join(temp_folder, 'media.sqlite')) as index:
+            combiner = VideoCombiner(media_index=index)
+            assert combiner._timeline([os.path.join(temp_folder, '01_video.mp4')], 'first') == (24.0, 12)
+            assert combiner._open_image(os.path.join(temp_folder, '02_image.png')).height == 40
+            assert probed == ['01_video.mp4', '02_image.png']
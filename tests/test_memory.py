@@ -0,0 +1,103 @@
+"""Tests for src/memory.py."""
+
+import os
+import tempfile
+from typing import Generator
+
+import cv2
+import numpy as np
+import pytest
+
+from src.asset import ImageAsset, VideoAsset
+from src.combiner import VideoCombiner
+from src.encoders import EncoderOptions
+from src.memory import MB, MemoryEstimate, estimate_memory
+from src.pipeline import VideoRegion
+from src.timeline import TimedVideo
+
+ENCODER = EncoderOptions(backend='mjpg')
+
+
+@pytest.fixture
+def temp_folder() -> Generator[str, None, None]:
+    """Create a folder with a 320x240 video and a large image."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fourcc = cv2.VideoWriter_fourcc(*'MJPG')
+        out = cv2.VideoWriter(os.path.join(tmpdir, '01_video.avi'), cv2.CAP_OPENCV_MJPEG, fourcc, 10.0, (320, 240))
+        for i in range(5):
+            out.write(np.full((240, 320, 3), 8 * i, dtype=np.uint8))
+        out.release()
+        cv2.imwrite(os.path.join(tmpdir, '02_image.png'), np.full((1280, 2560, 3), 255, dtype=np.uint8))
+        os.makedirs(os.path.join(tmpdir, 'out'))
+        yield tmpdir
+
+
+class TestEstimateMemory:
+    """Tests for estimate_memory function."""
+
+    def test_sequential_and_pipeline(self, temp_folder: str) -> None:
+        """Test the canvas and decode buffers of both renderers."""
+        video = VideoAsset(os.path.join(temp_folder, '01_video.avi'))
+        image = ImageAsset(os.path.join(temp_folder, '02_image.png'))
+        try:
+            frame = 320 * 240 * 3
+            in_place = [VideoRegion(TimedVideo(video, 10.0), 0, 240, 240)]
+            sequential = estimate_memory((320, 400), in_place, [(image, (320, 160))])
+            assert sequential.canvas == 320 * 400 * 3
+            assert sequential.decode == 0
+            # The image is decoded at 1/8 of its size, which still covers 320x160
+            assert sequential.images == 320 * 160 * 3
+
+            pipeline = estimate_memory((320, 400), in_place, [], queue_size=4)
+            assert pipeline.canvas == 7 * 320 * 400 * 3
+            assert pipeline.decode == 6 * frame
+
+            scaled = [VideoRegion(TimedVideo(video, 10.0, size=(160, 120)), 0, 120, 120)]
+            assert estimate_memory((160, 200), scaled, [], queue_size=4).decode == frame + 6 * frame // 4
+
+            yuv = estimate_memory((320, 400), in_place, [], yuv=True)
+            assert yuv.canvas == 320 * 400 * 3 * 3 // 2
+            assert yuv.decode == frame + frame // 2
+        finally:
+            video.release()
+
+    def test_check(self) -> None:
+        """Test that an estimate above the budget fails with a breakdown."""
+        estimate = MemoryEstimate(canvas=3 * MB, decode=2 * MB, images=0, loop_cache=0)
+        estimate.check(5)
+        estimate.check(None)
+        with pytest.raises(ValueError, match=r'about 5 MB \(canvas 3 MB, decode 2 MB\), more than the memory budget'):
+            estimate.check(4)
+
+
+class TestMemoryBudget:
+    """Tests for the output size cap and memory budget of VideoCombiner."""
+
+    def test_invalid_budget(self) -> None:
+        """Test error handling for an invalid memory budget."""
+        with pytest.raises(ValueError, match='Invalid memory budget'):
+            VideoCombiner(memory_budget_mb=0)
+
+    def test_max_width(self, temp_folder: str) -> None:
+        """Test that the output is scaled down to the maximum width."""
+        output_path = os.path.join(temp_folder, 'out', 'output.avi')
+        VideoCombiner(encoder=ENCODER, max_width=160, pipeline=True).combine_from_folder(temp_folder, output_path)
+
+        cap = cv2.VideoCapture(output_path, cv2.CAP_OPENCV_MJPEG)
+        ret, frame = cap.read()
+        cap.release()
+        assert ret
+        assert frame.shape == (200, 160, 3)
+        assert abs(float(frame[:120].mean())) < 3
+        assert frame[125:].mean() > 250
+
+    def test_over_budget_fails_before_rendering(self, temp_folder: str) -> None:
+        """Test that a render over budget fails without writing an output."""
+        output_path = os.path.join(temp_folder, 'out', 'output.avi')
+        combiner = VideoCombiner(encoder=ENCODER, pipeline=True, queue_size=64, memory_budget_mb=1)
+        with pytest.raises(ValueError, match='more than the memory budget of 1 MB'):
+            combiner.combine_from_folder(temp_folder, output_path)
+        assert not os.path.exists(output_path)
+
+        VideoCombiner(encoder=ENCODER, max_width=64, memory_budget_mb=1).combine_from_folder(temp_folder, output_path)
+        assert os.path.exists(output_path)
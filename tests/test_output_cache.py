@@ -0,0 +1,146 @@
+"""Tests for src/output_cache.py."""
+
+import os
+import tempfile
+import time
+from typing import Any, Generator, List, Tuple
+
+import cv2
+import numpy as np
+import pytest
+
+from src.combiner import VideoCombiner
+from src.encoders import EncoderOptions
+from src.output_cache import OutputCache, code_version, library_versions
+
+
+class TestOutputCache:
+    """Tests for OutputCache class."""
+
+    @pytest.fixture
+    def temp_folder(self) -> Generator[str, None, None]:
+        """Create a folder with a video, an image and an output directory."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            inputs = os.path.join(tmpdir, 'inputs')
+            os.makedirs(inputs)
+            fourcc = cv2.VideoWriter_fourcc(*'MJPG')
+            out = cv2.VideoWriter(os.path.join(inputs, '01_video.avi'), cv2.CAP_OPENCV_MJPEG, fourcc, 30.0,
+                                  (160, 120))
+            for i in range(10):
+                out.write(np.full((120, 160, 3), 8 * i, dtype=np.uint8))
+            out.release()
+            cv2.imwrite(os.path.join(inputs, '02_image.png'), np.zeros((40, 160, 3), dtype=np.uint8))
+            os.makedirs(os.path.join(tmpdir, 'out'))
+            yield tmpdir
+
+    @pytest.fixture
+    def rendered(self, monkeypatch: pytest.MonkeyPatch) -> List[str]:
+        """Record the output path of every render."""
+        paths: List[str] = []
+        render = VideoCombiner._load_and_combine_assets
+
+        def recording_render(self: VideoCombiner, asset_info: List[Tuple[str, str]], path: str, *args: Any) -> None:
+            paths.append(path)
+            render(self, asset_info, path, *args)
+
+        monkeypatch.setattr(VideoCombiner, '_load_and_combine_assets', recording_render)
+        return paths
+
+    def _combiner(self, cache: OutputCache, constraint: str = 'width') -> VideoCombiner:
+        return VideoCombiner(constraint=constraint, encoder=EncoderOptions(backend='mjpg'), output_cache=cache)
+
+    def test_hit_skips_render(self, temp_folder: str, rendered: List[str]) -> None:
+        """Test that an identical job is placed from the cache instead of rendered."""
+        cache = OutputCache(os.path.join(temp_folder, 'cache'))
+        combiner = self._combiner(cache)
+        inputs = os.path.join(temp_folder, 'inputs')
+        first = os.path.join(temp_folder, 'out', 'first.avi')
+        second = os.path.join(temp_folder, 'out', 'second.avi')
+
+        combiner.combine_from_folder(inputs, first)
+        combiner.combine_from_folder(inputs, second)
+        assert rendered == [first]
+        with open(first, 'rb') as a, open(second, 'rb') as b:
+            assert a.read() == b.read()
+
+    def test_changes_miss(self, temp_folder: str, rendered: List[str]) -> None:
+        """Test that changed options, inputs or ordering render again."""
+        cache = OutputCache(os.path.join(temp_folder, 'cache'))
+        inputs = os.path.join(temp_folder, 'inputs')
+        output = os.path.join(temp_folder, 'out', 'output.avi')
+        self._combiner(cache).combine_from_folder(inputs, output)
+        self._combiner(cache, 'height').combine_from_folder(inputs, output)
+        assert len(rendered) == 2
+
+        os.rename(os.path.join(inputs, '02_image.png'), os.path.join(inputs, '00_image.png'))
+        self._combiner(cache).combine_from_folder(inputs, output)
+        assert len(rendered) == 3
+
+        image = os.path.join(inputs, '00_image.png')
+        cv2.imwrite(image, np.full((40, 160, 3), 255, dtype=np.uint8))
+        os.utime(image, ns=(time.time_ns(), time.time_ns() + 10**9))
+        self._combiner(cache).combine_from_folder(inputs, output)
+        assert len(rendered) == 4
+
+    def test_render_does_not_change_entry(self, temp_folder: str, rendered: List[str]) -> None:
+        """Test that rendering over a hard-linked output leaves the cached entry intact."""
+        cache = OutputCache(os.path.join(temp_folder, 'cache'))
+        inputs = os.path.join(temp_folder, 'inputs')
+        output = os.path.join(temp_folder, 'out', 'output.avi')
+        self._combiner(cache).combine_from_folder(inputs, output)
+        entry = os.path.join(cache.cache_dir, os.listdir(cache.cache_dir)[0])
+        with open(entry, 'rb') as f:
+            cached = f.read()
+
+        self._combiner(cache, 'height').combine_from_folder(inputs, output)
+        with open(entry, 'rb') as f:
+            assert f.read() == cached
+
+    def test_content_keys(self, temp_folder: str) -> None:
+        """Test that content keys ignore modification times."""
+        cache = OutputCache(os.path.join(temp_folder, 'cache'), hash_contents=True)
+        image = os.path.join(temp_folder, 'inputs', '02_image.png')
+        key = cache.key([image], {'constraint': 'width'})
+        os.utime(image, ns=(0, 0))
+        assert cache.key([image], {'constraint': 'width'}) == key
+        assert cache.key([image], {'constraint': 'height'}) != key
+        assert OutputCache(os.path.join(temp_folder, 'cache')).key([image], {'constraint': 'width'}) != key
+
+    def test_eviction(self, temp_folder: str) -> None:
+        """Test that the least recently used outputs are evicted beyond the size limit."""
+        cache = OutputCache(os.path.join(temp_folder, 'cache'), max_bytes=2500)
+        for i, name in enumerate(('a', 'b', 'c')):
+            path = os.path.join(temp_folder, 'out', name + '.bin')
+            with open(path, 'wb') as f:
+                f.write(bytes(1000))
+            cache.store(name, path)
+            os.utime(os.path.join(cache.cache_dir, name + '.bin'), ns=(i * 10**9, i * 10**9))
+            if name == 'b':
+                # Reading 'a' makes it more recent than 'b'
+                assert cache.fetch('a', os.path.join(temp_folder, 'out', 'copy.bin'))
+        assert sorted(os.listdir(cache.cache_dir)) == ['a.bin', 'c.bin']
+        assert not cache.fetch('b', os.path.join(temp_folder, 'out', 'copy.bin'))
+
+    def test_code_version(self) -> None:
+        """Test that the code version is a stable hash."""
+        assert code_version() == code_version()
+        assert len(code_version()) == 40
+
+    def test_library_versions_in_key(self, temp_folder: str, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that upgrading OpenCV changes every key."""
+        cache = OutputCache(os.path.join(temp_folder, 'cache'))
+        image = os.path.join(temp_folder, 'inputs', '02_image.png')
+        key = cache.key([image], {})
+        assert library_versions() == {'opencv': cv2.__version__, 'numpy': np.__version__}
+
+        monkeypatch.setattr(cv2, '__version__', '0.0.0')
+        library_versions.cache_clear()
+        try:
+            assert cache.key([image], {}) != key
+        finally:
+            library_versions.cache_clear()
+
+    def test_invalid_size(self, temp_folder: str) -> None:
+        """Test error handling for an invalid cache size."""
+        with pytest.raises(ValueError, match='Invalid cache size'):
+            OutputCache(os.path.join(temp_folder, 'cache'), max_bytes=-1)
@@ -0,0 +1,127 @@
+"""Tests for src/overlay_cache.py."""
+
+import os
+import tempfile
+import time
+from typing import Generator
+
+import cv2
+import numpy as np
+import pytest
+
+from src.combiner import VideoCombiner
+from src.encoders import EncoderOptions
+from src.overlay_cache import OverlayCache
+
+
+class TestOverlayCache:
+    """Tests for OverlayCache class."""
+
+    @pytest.fixture
+    def temp_dir(self) -> Generator[str, None, None]:
+        """Create a temporary folder with a test image."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            image = np.zeros((100, 400, 3), dtype=np.uint8)
+            image[:, :200] = [255, 0, 0]
+            cv2.imwrite(os.path.join(tmpdir, 'image.png'), image)
+            yield tmpdir
+
+    def test_hit_skips_decode(self, temp_dir: str, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that a later cache instance loads the resized array without decoding."""
+        image_path = os.path.join(temp_dir, 'image.png')
+        cache_dir = os.path.join(temp_dir, 'cache')
+
+        first = OverlayCache(cache_dir)
+        expected = first.get(first.open_image(image_path), (200, 50)).copy()
+
+        def no_decode(*args: object) -> None:
+            raise AssertionError('image was decoded')
+
+        monkeypatch.setattr(cv2, 'imread', no_decode)
+        second = OverlayCache(cache_dir)
+        image = second.open_image(image_path)
+        assert (image.width, image.height) == (400, 100)
+        cached = second.get(image, (200, 50))
+        assert isinstance(cached, np.memmap)
+        assert np.array_equal(cached, expected)
+        # In-memory layer returns the same array
+        assert second.get(image, (200, 50)) is cached
+
+    def test_key_includes_size(self, temp_dir: str) -> None:
+        """Test that different target sizes are cached separately."""
+        cache = OverlayCache(os.path.join(temp_dir, 'cache'))
+        image = cache.open_image(os.path.join(temp_dir, 'image.png'))
+        assert cache.get(image, (200, 50)).shape == (50, 200, 3)
+        assert cache.get(image, (100, 25)).shape == (25, 100, 3)
+
+    def test_changed_file_invalidates(self, temp_dir: str) -> None:
+        """Test that modifying the source image produces a fresh entry."""
+        image_path = os.path.join(temp_dir, 'image.png')
+        cache_dir = os.path.join(temp_dir, 'cache')
+        cache = OverlayCache(cache_dir)
+        cache.get(cache.open_image(image_path), (200, 50))
+
+        cv2.imwrite(image_path, np.full((50, 100, 3), 255, dtype=np.uint8))
+        os.utime(image_path, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+        fresh = OverlayCache(cache_dir)
+        image = fresh.open_image(image_path)
+        assert (image.width, image.height) == (100, 50)
+        assert fresh.get(image, (200, 100)).min() == 255
+
+    def test_eviction(self, temp_dir: str) -> None:
+        """Test that the least recently used arrays are evicted over the size cap."""
+        cache_dir = os.path.join(temp_dir, 'cache')
+        # Room for one 50x200 array (30000 bytes plus header) but not two
+        cache = OverlayCache(cache_dir, max_bytes=40000, memo_size=0)
+        image = cache.open_image(os.path.join(temp_dir, 'image.png'))
+        cache.get(image, (200, 50))
+        time.sleep(0.01)
+        cache.get(image, (200, 49))
+
+        arrays = [name for name in os.listdir(cache_dir) if name.endswith('.npy')]
+        assert len(arrays) == 1
+        assert np.load(os.path.join(cache_dir, arrays[0])).shape == (49, 200, 3)
+
+    def test_eviction_removes_stale_sizes(self, temp_dir: str) -> None:
+        """Test that the size files of images that changed are evicted with their arrays."""
+        cache_dir = os.path.join(temp_dir, 'cache')
+        image_path = os.path.join(temp_dir, 'image.png')
+        cache = OverlayCache(cache_dir, max_bytes=40000, memo_size=0)
+        cache.get(cache.open_image(image_path), (200, 50))
+        stale = [name for name in os.listdir(cache_dir) if name.endswith('.json')]
+
+        time.sleep(0.01)
+        os.utime(image_path, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+        cache.get(cache.open_image(image_path), (200, 50))
+
+        sizes = [name for name in os.listdir(cache_dir) if name.endswith('.json')]
+        assert len(sizes) == 1 and sizes != stale
+        assert len([name for name in os.listdir(cache_dir) if name.endswith('.npy')]) == 1
+
+    def test_invalid_size(self, temp_dir: str) -> None:
+        """Test error handling for a negative size cap."""
+        with pytest.raises(ValueError, match='Invalid cache size'):
+            OverlayCache(os.path.join(temp_dir, 'cache'), max_bytes=-1)
+
+    def test_combiner_output_unchanged(self, temp_dir: str) -> None:
+        """Test that rendering with the cache gives the same frames as without."""
+        video_path = os.path.join(temp_dir, 'video.mp4')
+        out = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'mp4v'), 30.0, (320, 240))
+        for _ in range(5):
+            out.write(np.full((240, 320, 3), 128, dtype=np.uint8))
+        out.release()
+
+        frames = []
+        cache_dir = os.path.join(temp_dir, 'cache')
+        for i, overlay_cache in enumerate((None, OverlayCache(cache_dir), OverlayCache(cache_dir))):
+            output_path = os.path.join(temp_dir, f'output_{i}.avi')
+            combiner = VideoCombiner(encoder=EncoderOptions('mjpg'), overlay_cache=overlay_cache)
+            combiner.combine_single(video_path, os.path.join(temp_dir, 'image.png'), output_path)
+            cap = cv2.VideoCapture(output_path)
+            ret, frame = cap.read()
+            cap.release()
+            assert ret
+            frames.append(frame)
+
+        assert np.array_equal(frames[0], frames[1])
+        assert np.array_equal(frames[0], frames[2])
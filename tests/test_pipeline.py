@@ -0,0 +1,196 @@
+"""Tests for src/pipeline.py."""
+
+import os
+import tempfile
+import threading
+from typing import Generator, List
+
+import cv2
+import numpy as np
+import pytest
+
+from src.asset import VideoAsset
+from src.combiner import VideoCombiner
+from src.pipeline import FrameFingerprint, FramePipeline, VideoRegion
+from src.stats import RenderStats
+from tests.conftest import write_video
+
+
+def _write_video(path: str, frame_count: int, size: tuple[int, int] = (320, 240)) -> None:
+    """Write an mp4v video whose frame i has the color (8 * i, 255 - 8 * i, 128)."""
+    def frames() -> Generator[np.ndarray, None, None]:
+        for i in range(frame_count):
+            frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+            frame[:, :] = [i * 8, 255 - i * 8, 128]
+            yield frame
+
+    write_video(path, frames(), 30.0, 'mp4v')
+
+
+class TestFramePipeline:
+    """Tests for FramePipeline class."""
+
+    @pytest.fixture
+    def temp_folder(self) -> Generator[str, None, None]:
+        """Create a temporary folder with a long and a short video."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _write_video(os.path.join(tmpdir, 'long.mp4'), 30)
+            _write_video(os.path.join(tmpdir, 'short.mp4'), 10, size=(160, 120))
+            yield tmpdir
+
+    def _render(self, folder: str, pipeline: bool, frame_count: int | None) -> List[np.ndarray]:
+        long_video = VideoAsset(os.path.join(folder, 'long.mp4'))
+        short_video = VideoAsset(os.path.join(folder, 'short.mp4'))
+        canvas = np.zeros((480, 320, 3), dtype=np.uint8)
+        regions = [VideoRegion(long_video, 0, 240, 240), VideoRegion(short_video, 240, 240, 120)]
+        frames: List[np.ndarray] = []
+        try:
+            combiner = VideoCombiner(pipeline=pipeline, queue_size=2)
+            combiner._render(canvas, regions, lambda frame: frames.append(frame.copy()), frame_count)
+        finally:
+            long_video.release()
+            short_video.release()
+        return frames
+
+    def test_matches_sequential(self, temp_folder: str) -> None:
+        """Test that the pipeline produces the same frames as the sequential loop."""
+        sequential = self._render(temp_folder, pipeline=False, frame_count=30)
+        pipelined = self._render(temp_folder, pipeline=True, frame_count=30)
+
+        assert len(pipelined) == len(sequential) == 30
+        for expected, actual in zip(sequential, pipelined):
+            assert np.array_equal(expected, actual)
+        # Short video has ended, its region is black
+        assert not pipelined[-1][240:].any()
+
+    def test_runs_until_all_videos_end(self, temp_folder: str) -> None:
+        """Test that without a frame count the pipeline stops after the longest video."""
+        frames = self._render(temp_folder, pipeline=True, frame_count=None)
+        assert len(frames) == 30
+
+    def test_writer_error_propagates(self, temp_folder: str) -> None:
+        """Test that an encoder error stops all stages and is re-raised."""
+        video = VideoAsset(os.path.join(temp_folder, 'long.mp4'))
+        written = []
+
+        def write(frame: np.ndarray) -> None:
+            written.append(1)
+            if len(written) == 3:
+                raise IOError('disk full')
+
+        try:
+            pipeline = FramePipeline(np.zeros((240, 320, 3), dtype=np.uint8),
+                                     [VideoRegion(video, 0, 240, 240)], write, queue_size=2)
+            with pytest.raises(IOError, match='disk full'):
+                pipeline.run()
+        finally:
+            video.release()
+
+        assert len(written) == 3
+        assert threading.active_count() == 1
+
+    def test_invalid_queue_size(self) -> None:
+        """Test error handling for an invalid queue size."""
+        with pytest.raises(ValueError, match='Invalid queue size'):
+            VideoCombiner(queue_size=0)
+
+    def test_combine_from_folder_pipelined(self, temp_folder: str) -> None:
+        """Test combining a folder with the pipeline enabled."""
+        output_path = os.path.join(temp_folder, 'output.mp4')
+        combiner = VideoCombiner(pipeline=True)
+        # Output sits in the input folder but is written after discovery
+        combiner.combine_from_folder(temp_folder, output_path)
+
+        cap = cv2.VideoCapture(output_path)
+        assert cap.isOpened()
+        assert cap.get(cv2.CAP_PROP_FRAME_COUNT) == 30
+        assert cap.get(cv2.CAP_PROP_FRAME_HEIGHT) == 480
+        cap.release()
+
+
+def _write_slides(path: str, frame_count: int, hold: int, size: tuple[int, int]) -> None:
+    """Write an MJPG video whose content changes every hold frames."""
+    def slides() -> Generator[np.ndarray, None, None]:
+        for i in range(frame_count):
+            frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+            cv2.putText(frame, str(i // hold), (10, size[1] // 2), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+            yield frame
+
+    write_video(path, slides(), 30.0)
+
+
+class TestDedup:
+    """Tests for FrameFingerprint and repeated-frame detection."""
+
+    @pytest.fixture
+    def temp_folder(self) -> Generator[str, None, None]:
+        """Create slide videos: one changing every 5 frames, a smaller one every 10."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _write_slides(os.path.join(tmpdir, 'slides.avi'), 20, 5, (320, 240))
+            _write_slides(os.path.join(tmpdir, 'small.avi'), 20, 10, (160, 120))
+            yield tmpdir
+
+    def _render(self, folder: str, pipeline: bool, dedup_stride: int | None) -> tuple[List[np.ndarray], int]:
+        videos = [VideoAsset(os.path.join(folder, name)) for name in ('slides.avi', 'small.avi')]
+        canvas = np.zeros((480, 320, 3), dtype=np.uint8)
+        # The small video is resized into its region
+        regions = [VideoRegion(videos[0], 0, 240, 240), VideoRegion(videos[1], 240, 240, 120)]
+        frames: List[np.ndarray] = []
+        stats = RenderStats()
+        try:
+            combiner = VideoCombiner(pipeline=pipeline, queue_size=2, stats=stats, dedup_stride=dedup_stride)
+            combiner._render(canvas, regions, lambda frame: frames.append(frame.copy()), 20)
+        finally:
+            for video in videos:
+                video.release()
+        return frames, stats.deduplicated
+
+    def test_fingerprint(self) -> None:
+        """Test that a changed sampled pixel is detected and an unchanged frame is not."""
+        fingerprint = FrameFingerprint(stride=4)
+        frame = np.zeros((16, 16, 3), dtype=np.uint8)
+        assert fingerprint.changed(frame)
+        assert not fingerprint.changed(frame.copy())
+        frame[8, 4] = 1
+        assert fingerprint.changed(frame)
+        # Pixels between samples are not compared
+        frame[9, 5] = 1
+        assert not fingerprint.changed(frame)
+        with pytest.raises(ValueError, match='Invalid dedup stride'):
+            FrameFingerprint(stride=0)
+
+    @pytest.mark.parametrize('pipeline', [False, True])
+    def test_matches_without_dedup(self, temp_folder: str, pipeline: bool) -> None:
+        """Test that dedup writes the same frames and counts frames where every video repeats."""
+        expected, _ = self._render(temp_folder, pipeline, None)
+        frames, deduplicated = self._render(temp_folder, pipeline, 1)
+
+        assert len(frames) == len(expected) == 20
+        for a, b in zip(expected, frames):
+            assert np.array_equal(a, b)
+        # The slides change on frames 0, 5, 10 and 15
+        assert deduplicated == 16
+
+    @pytest.mark.parametrize('pipeline', [False, True])
+    def test_repeated_frames_not_rescaled(self, temp_folder: str, monkeypatch: pytest.MonkeyPatch,
+                                          pipeline: bool) -> None:
+        """Test that a video scaled as it is decoded is not scaled again for repeated frames."""
+        static = os.path.join(temp_folder, 'static')
+        os.makedirs(static)
+        _write_slides(os.path.join(static, 'static.avi'), 12, 12, (320, 240))
+
+        resized = []
+        resize = cv2.resize
+
+        def counting(src: np.ndarray, *args: object, **kwargs: object) -> np.ndarray:
+            if src.shape[:2] == (240, 320):
+                resized.append(src.shape)
+            return resize(src, *args, **kwargs)  # type: ignore[call-overload, no-any-return]
+
+        monkeypatch.setattr(cv2, 'resize', counting)
+        for dedup_stride, expected in ((None, 12), (1, 1)):
+            resized.clear()
+            combiner = VideoCombiner(pipeline=pipeline, max_width=160, dedup_stride=dedup_stride)
+            with combiner.iter_composited_frames(static) as stream:
+                assert sum(1 for _ in stream) == 12
+            assert len(resized) == expected
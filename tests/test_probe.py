@@ -0,0 +1,98 @@
+"""Tests for src/probe.py."""
+
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Generator
+
+import cv2
+import numpy as np
+import pytest
+
+from src.asset import VideoAsset
+from src.probe import MediaInfo, probe, probe_folder, read_video_info
+from tests.conftest import gray_frames, write_video
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestProbe:
+    """Tests for reading media properties from headers."""
+
+    @pytest.fixture
+    def temp_folder(self) -> Generator[str, None, None]:
+        """Create a temporary folder."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.mark.parametrize('name,fourcc,fps,api', [
+        ('video.mp4', 'mp4v', 30.0, cv2.CAP_ANY),
+        ('video.mov', 'mp4v', 29.97, cv2.CAP_ANY),
+        ('video.avi', 'MJPG', 25.0, cv2.CAP_ANY),
+        ('video.avi', 'MJPG', 10.0, cv2.CAP_OPENCV_MJPEG),
+    ])
+    def test_headers_match_opencv(self, temp_folder: str, name: str, fourcc: str, fps: float, api: int) -> None:
+        """Test that header values match what OpenCV reports when it opens the video."""
+        path = os.path.join(temp_folder, name)
+        write_video(path, gray_frames(17, (161, 120)), fps, fourcc, api)
+
+        video = VideoAsset(path)
+        expected = (video.width, video.height, video.fps, video.frame_count)
+        video.release()
+        info = read_video_info(path)
+        assert info is not None
+        assert info[:2] == expected[:2] and info[3] == expected[3]
+        assert info[2] == pytest.approx(expected[2])
+
+    def test_unreadable_headers(self, temp_folder: str) -> None:
+        """Test that truncated or unknown containers give None."""
+        path = os.path.join(temp_folder, 'video.mp4')
+        with open(path, 'wb') as f:
+            f.write(b'\x00\x00\x00\x18ftypisom')
+        assert read_video_info(path) is None
+        assert read_video_info(os.path.join(temp_folder, 'missing.avi')) is None
+        assert read_video_info(os.path.join(temp_folder, 'video.mkv')) is None
+
+    def test_probe_folder(self, temp_folder: str) -> None:
+        """Test probing every media file of a folder in render order."""
+        write_video(os.path.join(temp_folder, '01_video.mp4'), gray_frames(17, (161, 120)), 30.0, 'mp4v')
+        cv2.imwrite(os.path.join(temp_folder, '02_image.png'), np.zeros((40, 160, 3), dtype=np.uint8))
+        with open(os.path.join(temp_folder, 'notes.txt'), 'w') as f:
+            f.write('not media')
+
+        video, image = probe_folder(temp_folder)
+
+        assert video.type == 'video' and video.frame_count == 17
+        assert video.duration == pytest.approx(17 / 30)
+        assert image == MediaInfo(os.path.join(temp_folder, '02_image.png'), 'image', 160, 40)
+
+    def test_probe_errors(self, temp_folder: str) -> None:
+        """Test error handling for unsupported and missing files."""
+        with pytest.raises(ValueError, match='Unsupported media file'):
+            probe(os.path.join(temp_folder, 'notes.txt'))
+        with pytest.raises(ValueError, match='Not a valid file'):
+            probe(os.path.join(temp_folder, 'missing.mp4'))
+
+
+class TestLazyImports:
+    """Tests that argument parsing, discovery and probing do not load OpenCV."""
+
+    def test_no_opencv(self) -> None:
+        """Test that the package, the CLI module and probing headers leave cv2 and numpy unloaded."""
+        code = (
+            "import sys, src, combine_video_image\n"
+            "from src import discover_assets, get_file_type, parse_args, probe_folder\n"
+            "parse_args(['--input', '.'])\n"
+            "get_file_type('a.mp4')\n"
+            "print('cv2' in sys.modules, 'numpy' in sys.modules)\n"
+        )
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+        assert result.stdout.split() == ['False', 'False']
+
+    def test_lazy_attributes(self) -> None:
+        """Test that heavy names are still importable from the package."""
+        import src
+        assert src.VideoCombiner.__name__ == 'VideoCombiner'
+        with pytest.raises(AttributeError):
+            src.missing  # noqa: B018
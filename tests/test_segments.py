@@ -0,0 +1,123 @@
+"""Tests for src/segments.py."""
+
+import os
+import shutil
+import tempfile
+from typing import Generator, List
+
+import cv2
+import numpy as np
+import pytest
+
+from src.combiner import VideoCombiner
+from src.encoders import EncoderOptions
+from src.segments import split_frames
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which('ffmpeg') is None, reason='ffmpeg not installed')
+
+
+def _read_frames(path: str) -> List[np.ndarray]:
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+class TestSplitFrames:
+    """Tests for split_frames function."""
+
+    def test_even_split(self) -> None:
+        """Test splitting into equal ranges."""
+        assert split_frames(90, 3) == [(0, 30), (30, 60), (60, 90)]
+
+    def test_uneven_split(self) -> None:
+        """Test that ranges are contiguous and cover every frame."""
+        ranges = split_frames(100, 7)
+        assert ranges[0][0] == 0
+        assert ranges[-1][1] == 100
+        assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+        assert max(end - start for start, end in ranges) - min(end - start for start, end in ranges) <= 1
+
+    def test_more_segments_than_frames(self) -> None:
+        """Test that no empty ranges are produced."""
+        assert split_frames(2, 8) == [(0, 1), (1, 2)]
+
+    def test_invalid_segment_count(self) -> None:
+        """Test error handling for an invalid segment count."""
+        with pytest.raises(ValueError, match='Invalid segment count'):
+            split_frames(10, 0)
+
+
+class TestSegmentedRender:
+    """Tests for segment-parallel rendering in VideoCombiner."""
+
+    @pytest.fixture
+    def temp_folder(self) -> Generator[str, None, None]:
+        """Create a folder with a changing video, a shorter video and an image."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            for name, count in (('01_video.mp4', 45), ('03_video.mp4', 20)):
+                out = cv2.VideoWriter(os.path.join(tmpdir, name), fourcc, 30.0, (320, 240))
+                for i in range(count):
+                    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+                    frame[:, :i * 7] = [255, 255, 255]
+                    out.write(frame)
+                out.release()
+            image = np.zeros((100, 320, 3), dtype=np.uint8)
+            image[:, :] = [255, 0, 0]
+            cv2.imwrite(os.path.join(tmpdir, '02_image.png'), image)
+            yield tmpdir
+
+    def test_invalid_segment_count(self) -> None:
+        """Test error handling for an invalid segment count."""
+        with pytest.raises(ValueError, match='Invalid segment count'):
+            VideoCombiner(segments=0)
+
+    def test_requires_ffmpeg(self, temp_folder: str, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that a missing ffmpeg is reported before rendering."""
+        monkeypatch.setattr(shutil, 'which', lambda _: None)
+        output_path = os.path.join(temp_folder, 'out', 'output.avi')
+        with pytest.raises(RuntimeError, match='ffmpeg not found'):
+            VideoCombiner(segments=3).combine_from_folder(temp_folder, output_path)
+
+    @needs_ffmpeg
+    def test_folder_matches_sequential(self, temp_folder: str) -> None:
+        """Test that a segmented folder render is frame-identical to a sequential one."""
+        output_dir = os.path.join(temp_folder, 'out')
+        os.makedirs(output_dir)
+        encoder = EncoderOptions('mjpg')
+        sequential_path = os.path.join(output_dir, 'sequential.avi')
+        segmented_path = os.path.join(output_dir, 'segmented.avi')
+        VideoCombiner(encoder=encoder).combine_from_folder(temp_folder, sequential_path)
+        VideoCombiner(encoder=encoder, segments=4).combine_from_folder(temp_folder, segmented_path)
+
+        sequential = _read_frames(sequential_path)
+        segmented = _read_frames(segmented_path)
+        assert len(sequential) == len(segmented) == 45
+        for expected, actual in zip(sequential, segmented):
+            assert np.array_equal(expected, actual)
+        # Segment files are removed after concatenation
+        assert sorted(os.listdir(output_dir)) == ['segmented.avi', 'sequential.avi']
+
+    @needs_ffmpeg
+    def test_single_matches_sequential(self, temp_folder: str) -> None:
+        """Test that a segmented legacy render is frame-identical to a sequential one."""
+        video_path = os.path.join(temp_folder, '01_video.mp4')
+        image_path = os.path.join(temp_folder, '02_image.png')
+        encoder = EncoderOptions('mjpg')
+        sequential_path = os.path.join(temp_folder, 'sequential.avi')
+        segmented_path = os.path.join(temp_folder, 'segmented.avi')
+        VideoCombiner(encoder=encoder).combine_single(video_path, image_path, sequential_path, crop_bottom=40)
+        VideoCombiner(encoder=encoder, segments=3).combine_single(video_path, image_path, segmented_path,
+                                                                  crop_bottom=40)
+
+        sequential = _read_frames(sequential_path)
+        segmented = _read_frames(segmented_path)
+        assert len(sequential) == len(segmented) == 45
+        for expected, actual in zip(sequential, segmented):
+            assert np.array_equal(expected, actual)
@@ -0,0 +1,136 @@
+"""Tests for src/shared_overlays.py."""
+
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Generator
+
+import cv2
+import numpy as np
+import pytest
+
+from src.asset import ImageAsset
+from src.batch import BatchJob, run_batch
+from src.combiner import VideoCombiner
+from src.shared_overlays import SharedOverlay, SharedOverlayPool, overlay_key
+
+
+def _paint(overlay: SharedOverlay) -> np.ndarray:
+    """Copy a shared overlay into a new array, in a worker process."""
+    target = np.empty((overlay.height, overlay.width, 3), dtype=np.uint8)
+    overlay.copy_to(target)
+    return target
+
+
+def _shared_blocks() -> list[str]:
+    """Return the names of shared memory blocks published by this process, where visible."""
+    return [name for name in os.listdir('/dev/shm') if name.startswith(f'cvi_{os.getpid()}_')]
+
+
+class TestSharedOverlayPool:
+    """Tests for SharedOverlayPool class."""
+
+    @pytest.fixture
+    def temp_folder(self) -> Generator[str, None, None]:
+        """Create a folder with a video and a gradient image."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fourcc = cv2.VideoWriter_fourcc(*'MJPG')
+            out = cv2.VideoWriter(os.path.join(tmpdir, '01_video.avi'), cv2.CAP_OPENCV_MJPEG, fourcc, 30.0,
+                                  (160, 120))
+            for _ in range(5):
+                out.write(np.zeros((120, 160, 3), dtype=np.uint8))
+            out.release()
+            gradient = np.tile(np.arange(256, dtype=np.uint8)[:, None, None], (1, 320, 3))
+            cv2.imwrite(os.path.join(tmpdir, '02_image.png'), gradient)
+            yield tmpdir
+
+    def test_publish_and_copy(self, temp_folder: str) -> None:
+        """Test that a published image matches a locally resized one in another process."""
+        path = os.path.join(temp_folder, '02_image.png')
+        with SharedOverlayPool() as pool:
+            overlay = pool.publish(path, (160, 128))
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as workers:
+                painted = workers.submit(_paint, overlay).result()
+        assert np.array_equal(painted, ImageAsset(path).get_scaled(160, 128))
+
+    def test_reference_counting(self, temp_folder: str) -> None:
+        """Test that a block lives until its last reference is released."""
+        path = os.path.join(temp_folder, '02_image.png')
+        pool = SharedOverlayPool()
+        first = pool.publish(path, (160, 128))
+        assert pool.publish(path, (160, 128)) == first
+        other = pool.publish(path, (80, 64))
+        assert len(pool) == 2
+        assert pool.nbytes == 160 * 128 * 3 + 80 * 64 * 3
+
+        pool.release(first)
+        _paint(first)
+        pool.release(first)
+        assert len(pool) == 1
+        with pytest.raises(FileNotFoundError):
+            _paint(first)
+
+        pool.close()
+        assert len(pool) == 0
+        with pytest.raises(FileNotFoundError):
+            _paint(other)
+
+    def test_invalid_size(self, temp_folder: str) -> None:
+        """Test error handling for empty overlays."""
+        with SharedOverlayPool() as pool:
+            with pytest.raises(ValueError, match='Invalid overlay size'):
+                pool.publish(os.path.join(temp_folder, '02_image.png'), (0, 10))
+
+    def test_combiner_paints_shared(self, temp_folder: str, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that a combiner paints planned overlays from shared memory without resizing them."""
+        with VideoCombiner().iter_composited_frames(temp_folder) as stream:
+            expected = next(stream).copy()
+
+        combiner = VideoCombiner()
+        plan = combiner.plan_overlays(temp_folder)
+        assert plan == [(os.path.join(temp_folder, '02_image.png'), (160, 128))]
+        with SharedOverlayPool() as pool:
+            combiner.shared_overlays = {overlay_key(path, size): pool.publish(path, size) for path, size in plan}
+            monkeypatch.setattr(ImageAsset, 'get_scaled', lambda *args, **kwargs: pytest.fail('image resized'))
+            with combiner.iter_composited_frames(temp_folder) as stream:
+                assert np.array_equal(next(stream), expected)
+
+    def test_plan_single_overlay(self, temp_folder: str) -> None:
+        """Test planning the image of a legacy job."""
+        plan = VideoCombiner().plan_single_overlay(os.path.join(temp_folder, '01_video.avi'),
+                                                   os.path.join(temp_folder, '02_image.png'))
+        assert plan == (os.path.join(temp_folder, '02_image.png'), (160, 128))
+
+    def test_run_batch_shared(self, temp_folder: str) -> None:
+        """Test a batch with shared overlays, freed once the batch is done."""
+        jobs = [BatchJob(input=temp_folder, output=os.path.join(temp_folder, 'out', f'{i}.avi'), encoder='mjpg')
+                for i in range(3)]
+        results = run_batch(jobs, workers=2, shared_overlays=True)
+        assert all(result.success for result in results)
+        if os.path.isdir('/dev/shm'):
+            assert _shared_blocks() == []
+
+    def test_run_batch_publishes_jobs_in_flight(self, temp_folder: str, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that only the images of jobs in flight are held in shared memory."""
+        images = []
+        for i in range(4):
+            images.append(os.path.join(temp_folder, f'image_{i}.png'))
+            cv2.imwrite(images[-1], np.full((40, 160, 3), i * 60, dtype=np.uint8))
+        jobs = [BatchJob(video=os.path.join(temp_folder, '01_video.avi'), image=image,
+                         output=os.path.join(temp_folder, 'out', f'{i}.avi'), encoder='mjpg')
+                for i, image in enumerate(images)]
+
+        peak = []
+        publish = SharedOverlayPool.publish
+
+        def counting(self: SharedOverlayPool, path: str, size: tuple[int, int]) -> SharedOverlay:
+            overlay = publish(self, path, size)
+            peak.append(len(self))
+            return overlay
+
+        monkeypatch.setattr(SharedOverlayPool, 'publish', counting)
+        results = run_batch(jobs, workers=1, shared_overlays=True)
+        assert all(result.success for result in results)
+        assert len(peak) == 4 and max(peak) == 1
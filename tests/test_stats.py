@@ -0,0 +1,86 @@
+"""Tests for src/stats.py."""
+
+import os
+import tempfile
+import time
+from typing import Generator, List
+
+import cv2
+import numpy as np
+import pytest
+
+from src.combiner import VideoCombiner
+from src.stats import Progress, RenderStats
+
+
+class TestRenderStats:
+    """Tests for RenderStats class."""
+
+    @pytest.fixture
+    def temp_folder(self) -> Generator[str, None, None]:
+        """Create a folder with a 30-frame video and an image."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            out = cv2.VideoWriter(os.path.join(tmpdir, '01_video.mp4'), fourcc, 30.0, (320, 240))
+            for _ in range(30):
+                out.write(np.zeros((240, 320, 3), dtype=np.uint8))
+            out.release()
+            cv2.imwrite(os.path.join(tmpdir, '02_image.png'), np.zeros((100, 160, 3), dtype=np.uint8))
+            os.makedirs(os.path.join(tmpdir, 'out'))
+            yield tmpdir
+
+    def test_timed_accumulates(self) -> None:
+        """Test that wrapped calls add up per stage and keep their results."""
+        def sleep_for(seconds: float) -> float:
+            time.sleep(seconds)
+            return seconds
+
+        stats = RenderStats()
+        sleep = stats.timed('sleep', sleep_for)
+        assert sleep(0.01) == 0.01
+        sleep(0.01)
+        with stats.measure('block'):
+            time.sleep(0.01)
+        assert stats.stages['sleep'] >= 0.02
+        assert stats.stages['block'] >= 0.01
+
+    def test_progress_and_eta(self) -> None:
+        """Test progress calls, throttling and the final call."""
+        seen: List[Progress] = []
+        stats = RenderStats(progress=seen.append, progress_interval=3600)
+        stats.start(total_frames=4)
+        write = stats.timed_writes('encode', lambda frame: None)
+        for _ in range(4):
+            write(None)
+        stats.finish()
+
+        # First frame and the last one; the interval suppresses the others
+        assert [p.frames for p in seen] == [1, 4]
+        assert seen[0].total_frames == 4
+        assert seen[0].eta is not None and seen[0].eta >= 0
+        assert seen[-1].eta == 0
+        data = stats.as_dict()
+        assert data['frames'] == 4
+        assert set(data['stages']) == {'encode'}
+
+    @pytest.mark.parametrize('pipeline', [False, True])
+    def test_combine_collects_stages(self, temp_folder: str, pipeline: bool) -> None:
+        """Test that a render records frames and per-stage times."""
+        stats = RenderStats()
+        combiner = VideoCombiner(pipeline=pipeline, stats=stats)
+        combiner.combine_from_folder(temp_folder, os.path.join(temp_folder, 'out', 'output.mp4'))
+
+        data = stats.as_dict()
+        assert data['frames'] == 30
+        assert data['seconds'] > 0
+        assert data['fps'] == pytest.approx(30 / data['seconds'])
+        assert {'images', 'decode', 'encode'} <= set(data['stages'])
+        assert data['peak_rss_mb'] is None or data['peak_rss_mb'] > 0
+
+    def test_single_total_frames(self, temp_folder: str) -> None:
+        """Test that legacy mode reports progress against the video length."""
+        seen: List[Progress] = []
+        combiner = VideoCombiner(stats=RenderStats(progress=seen.append))
+        combiner.combine_single(os.path.join(temp_folder, '01_video.mp4'), os.path.join(temp_folder, '02_image.png'),
+                                os.path.join(temp_folder, 'out', 'output.mp4'))
+        assert seen[-1].frames == seen[-1].total_frames == 30
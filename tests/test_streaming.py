@@ -0,0 +1,165 @@
+"""Tests for src/streaming.py."""
+
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from typing import Generator, List, Optional
+
+import cv2
+import numpy as np
+import pytest
+
+from src.combiner import VideoCombiner
+from src.streaming import FrameStream, write_stream, y4m_header
+from tests.conftest import gray_frames, write_video
+
+
+def _frames(count: int, width: int, height: int, released: Optional[List[bool]] = None) -> FrameStream:
+    """Return a stream of count solid frames with the given size."""
+    def frames() -> Generator[np.ndarray, None, None]:
+        for i in range(count):
+            yield np.full((height, width, 3), i, dtype=np.uint8)
+
+    calls: List[bool] = [] if released is None else released
+    return FrameStream(frames(), 25.0, (width, height), count, lambda: calls.append(True))
+
+
+class TestFrameStream:
+    """Tests for the frame generator API."""
+
+    @pytest.fixture
+    def temp_folder(self) -> Generator[str, None, None]:
+        """Create a folder with a 12-frame video and an image."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_video(os.path.join(tmpdir, '01_video.avi'), gray_frames(12), 30.0)
+            cv2.imwrite(os.path.join(tmpdir, '02_image.png'), np.full((40, 160, 3), 200, dtype=np.uint8))
+            yield tmpdir
+
+    @pytest.mark.parametrize('pipeline', [False, True])
+    def test_iter_folder(self, temp_folder: str, pipeline: bool) -> None:
+        """Test that the folder stream yields every composited frame in order."""
+        with VideoCombiner(pipeline=pipeline).iter_composited_frames(temp_folder) as stream:
+            assert (stream.width, stream.height, stream.fps, stream.frame_count) == (160, 160, 30.0, 12)
+            frames = [frame.copy() for frame in stream]
+
+        assert len(frames) == 12
+        for i, frame in enumerate(frames):
+            assert frame.shape == (160, 160, 3)
+            assert int(round(float(frame[:120].mean()) / 8)) == i
+            assert np.all(frame[120:] == 200)
+
+    def test_pipeline_matches_sequential(self, temp_folder: str) -> None:
+        """Test that the threaded generator yields the same frames as the sequential one."""
+        with VideoCombiner().iter_composited_frames(temp_folder) as stream:
+            expected = [frame.copy() for frame in stream]
+        with VideoCombiner(pipeline=True, queue_size=1).iter_composited_frames(temp_folder) as stream:
+            actual = [frame.copy() for frame in stream]
+        assert len(actual) == len(expected)
+        for a, b in zip(actual, expected):
+            assert np.array_equal(a, b)
+
+    def test_iter_single(self, temp_folder: str) -> None:
+        """Test that legacy mode streams until the video ends."""
+        stream = VideoCombiner().iter_composited_single(os.path.join(temp_folder, '01_video.avi'),
+                                                        os.path.join(temp_folder, '02_image.png'),
+                                                        crop_bottom=20, image_position='top')
+        with stream:
+            assert stream.frame_count is None
+            frames = [frame.copy() for frame in stream]
+        assert len(frames) == 12
+        assert frames[0].shape == (140, 160, 3)
+        assert np.all(frames[0][:40] == 200)
+
+    def test_early_close_stops_threads(self, temp_folder: str) -> None:
+        """Test that closing a pipelined stream early stops its threads."""
+        threads = threading.active_count()
+        stream = VideoCombiner(pipeline=True, queue_size=1).iter_composited_frames(temp_folder)
+        next(stream)
+        assert threading.active_count() > threads
+        stream.close()
+        assert threading.active_count() == threads
+        stream.close()
+
+    def test_missing_folder_assets(self) -> None:
+        """Test error handling for an empty folder."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with pytest.raises(ValueError, match='No media files found'):
+                VideoCombiner().iter_composited_frames(tmpdir)
+
+
+class TestWriteStream:
+    """Tests for write_stream function."""
+
+    def test_y4m(self) -> None:
+        """Test the YUV4MPEG2 header and frame sizes."""
+        out = io.BytesIO()
+        assert write_stream(_frames(3, 160, 120), out, 'y4m') == 3
+        data = out.getvalue()
+        header = b'YUV4MPEG2 W160 H120 F25:1 Ip A1:1 C420jpeg\n'
+        assert data.startswith(header)
+        frame_size = len(b'FRAME\n') + 160 * 120 * 3 // 2
+        assert len(data) == len(header) + 3 * frame_size
+        assert data[len(header) + frame_size:].startswith(b'FRAME\n')
+
+    def test_y4m_odd_size_padded(self) -> None:
+        """Test that odd dimensions are padded to even for 4:2:0 frames."""
+        out = io.BytesIO()
+        write_stream(_frames(1, 161, 119), out, 'y4m')
+        header = b'YUV4MPEG2 W162 H120 F25:1 Ip A1:1 C420jpeg\n'
+        assert out.getvalue().startswith(header + b'FRAME\n')
+        assert len(out.getvalue()) == len(header) + 6 + 162 * 120 * 3 // 2
+
+    def test_y4m_i420_frames(self) -> None:
+        """Test that I420 frames are written without converting them."""
+        def frames() -> Generator[np.ndarray, None, None]:
+            for i in range(2):
+                yield np.full((180, 160), i + 1, dtype=np.uint8)
+
+        out = io.BytesIO()
+        assert write_stream(FrameStream(frames(), 25.0, (160, 120), 2, lambda: None, 'yuv420p'), out, 'y4m') == 2
+        header = b'YUV4MPEG2 W160 H120 F25:1 Ip A1:1 C420jpeg\n'
+        data = out.getvalue()
+        assert data.startswith(header + b'FRAME\n\x01')
+        assert len(data) == len(header) + 2 * (6 + 160 * 180)
+        assert data[-1] == 2
+
+    def test_y4m_frame_rate(self) -> None:
+        """Test that NTSC rates are written as exact fractions."""
+        assert b' F30000:1001 ' in y4m_header(160, 120, 30000 / 1001)
+
+    def test_raw(self) -> None:
+        """Test that raw mode writes packed BGR24 frames without a header."""
+        out = io.BytesIO()
+        assert write_stream(_frames(2, 160, 120), out, 'raw') == 2
+        data = out.getvalue()
+        assert len(data) == 2 * 160 * 120 * 3
+        assert data[-1] == 1
+
+    def test_release_once(self) -> None:
+        """Test that the inputs are released when the stream ends and not again on close."""
+        released: List[bool] = []
+        stream = _frames(2, 16, 16, released)
+        assert len(list(stream)) == 2
+        assert released == [True]
+        stream.close()
+        assert released == [True]
+
+    def test_invalid_format(self) -> None:
+        """Test error handling for unknown formats."""
+        with pytest.raises(ValueError, match='Invalid stream format'):
+            write_stream(_frames(1, 16, 16), io.BytesIO(), 'mp4')
+
+    def test_cli_stdout(self) -> None:
+        """Test streaming raw frames from the command line into a pipe."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_video(os.path.join(tmpdir, '01_video.avi'), gray_frames(5), 30.0)
+            cv2.imwrite(os.path.join(tmpdir, '02_image.png'), np.zeros((40, 160, 3), dtype=np.uint8))
+            root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            result = subprocess.run([sys.executable, os.path.join(root, 'combine_video_image.py'),
+                                     '--input', tmpdir, '--output', '-', '--stream-format', 'raw'],
+                                    capture_output=True, cwd=root, check=True)
+        assert len(result.stdout) == 5 * 160 * 160 * 3
+        assert b'160x160 at 30 fps' in result.stderr
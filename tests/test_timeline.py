@@ -0,0 +1,285 @@
+"""Tests for src/timeline.py."""
+
+import os
+import tempfile
+from typing import Generator, List, Optional
+
+import cv2
+import numpy as np
+import pytest
+
+from src.asset import VideoAsset
+from src.combiner import VideoCombiner
+from src.encoders import EncoderOptions
+from src.pipeline import FrameFingerprint, VideoRegion
+from src.timeline import TimedVideo, timeline_length
+from tests.conftest import gray_frames, write_video
+
+
+def _index(frame: np.ndarray) -> int:
+    """Return the source frame index encoded in a frame by gray_frames."""
+    return int(round(float(frame.mean()) / 8))
+
+
+def _count_decodes(asset: VideoAsset, monkeypatch: pytest.MonkeyPatch) -> List[int]:
+    """Patch a video to record every frame it decodes; return the list it appends to."""
+    decoded: List[int] = []
+    get_frame = asset.get_frame
+
+    def counting_get_frame(dst: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        decoded.append(1)
+        return get_frame(dst)
+
+    monkeypatch.setattr(asset, 'get_frame', counting_get_frame)
+    return decoded
+
+
+class TestTimedVideo:
+    """Tests for TimedVideo class."""
+
+    @pytest.fixture
+    def temp_folder(self) -> Generator[str, None, None]:
+        """Create videos at 60, 10 and 30 fps."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_video(os.path.join(tmpdir, 'fast.avi'), gray_frames(24), 60.0)
+            write_video(os.path.join(tmpdir, 'slow.avi'), gray_frames(4), 10.0)
+            write_video(os.path.join(tmpdir, 'short.avi'), gray_frames(5), 30.0)
+            yield tmpdir
+
+    def _read(self, video: TimedVideo, count: int) -> List[np.ndarray]:
+        frames = []
+        for _ in range(count):
+            frame = video.get_frame()
+            if frame is None:
+                break
+            frames.append(frame)
+        return frames
+
+    def test_downsample_skips_with_grab(self, temp_folder: str, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that frames not shown at the output rate are grabbed, not decoded."""
+        asset = VideoAsset(os.path.join(temp_folder, 'fast.avi'))
+        decoded = _count_decodes(asset, monkeypatch)
+        try:
+            frames = self._read(TimedVideo(asset, 25.0), 20)
+        finally:
+            asset.release()
+
+        # 24 frames at 60 fps last 0.4 s, which is 10 frames at 25 fps
+        assert [_index(frame) for frame in frames] == [int(n * 2.4) for n in range(10)]
+        assert len(decoded) == 11
+
+    def test_upsample_repeats(self, temp_folder: str) -> None:
+        """Test that a slower video repeats frames without decoding them again."""
+        asset = VideoAsset(os.path.join(temp_folder, 'slow.avi'))
+        try:
+            frames = self._read(TimedVideo(asset, 30.0), 20)
+        finally:
+            asset.release()
+
+        assert [_index(frame) for frame in frames] == [n // 3 for n in range(12)]
+        assert frames[1] is frames[0] and frames[3] is not frames[0]
+
+    def test_start_offset(self, temp_folder: str) -> None:
+        """Test that reading can start at a later output frame."""
+        asset = VideoAsset(os.path.join(temp_folder, 'fast.avi'))
+        try:
+            frames = self._read(TimedVideo(asset, 30.0, start=5), 20)
+        finally:
+            asset.release()
+
+        assert [_index(frame) for frame in frames] == [2 * n for n in range(5, 12)]
+
+    def test_loop_reuses_decoded_frames(self, temp_folder: str, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that a looping video wraps around from memory."""
+        asset = VideoAsset(os.path.join(temp_folder, 'short.avi'))
+        decoded = _count_decodes(asset, monkeypatch)
+        try:
+            frames = self._read(TimedVideo(asset, 30.0, loop=True), 12)
+        finally:
+            asset.release()
+
+        assert [_index(frame) for frame in frames] == [n % 5 for n in range(12)]
+        assert len(decoded) == 5
+        assert not frames[5].flags.writeable
+
+    def test_loop_without_cache_seeks(self, temp_folder: str) -> None:
+        """Test that looping still works when the frames do not fit in memory."""
+        asset = VideoAsset(os.path.join(temp_folder, 'short.avi'))
+        try:
+            frames = self._read(TimedVideo(asset, 30.0, loop=True, cache_bytes=0), 12)
+            indices = [_index(frame) for frame in frames]
+        finally:
+            asset.release()
+
+        assert indices == [n % 5 for n in range(12)]
+
+    def test_scaled_decode(self, temp_folder: str) -> None:
+        """Test that frames are scaled as they are decoded, including cached loop frames."""
+        asset = VideoAsset(os.path.join(temp_folder, 'short.avi'))
+        try:
+            video = TimedVideo(asset, 30.0, loop=True, size=(80, 60), source_height=60)
+            assert (video.width, video.height) == (80, 60)
+            frames = self._read(video, 8)
+        finally:
+            asset.release()
+
+        assert all(frame.shape == (60, 80, 3) for frame in frames)
+        assert [_index(frame) for frame in frames] == [n % 5 for n in range(8)]
+        assert video._cached_bytes == 5 * 80 * 60 * 3
+
+    def test_loop_dedup_after_cache_hit(self, temp_folder: str) -> None:
+        """Test that a frame decoded after a seek is not taken for a repeat of the cached frame before it."""
+        # Frame 1 shows the same picture as the last frame, which is decoded just before the seek back to it
+        path = os.path.join(temp_folder, 'repeat.avi')
+        write_video(path, (np.full((120, 160, 3), level, dtype=np.uint8) for level in (0, 40, 80, 120, 40)), 30.0)
+
+        asset = VideoAsset(path)
+        try:
+            # Only the first frame fits in the loop cache
+            video = TimedVideo(asset, 30.0, loop=True, cache_bytes=80 * 60 * 3, size=(80, 60),
+                               dedup=FrameFingerprint(1).changed)
+            levels = [int(round(float(frame.mean()))) for frame in self._read(video, 10)]
+        finally:
+            asset.release()
+
+        assert levels == [0, 40, 80, 120, 40] * 2
+
+    def test_timeline_length(self, temp_folder: str) -> None:
+        """Test the output length of each length policy."""
+        videos = [VideoAsset(os.path.join(temp_folder, name)) for name in ('short.avi', 'fast.avi', 'slow.avi')]
+        try:
+            # Durations: 1/6 s, 0.4 s and 0.4 s
+            assert timeline_length(videos, 30.0, 'first') == 5
+            assert timeline_length(videos, 30.0, 'shortest') == 5
+            assert timeline_length(videos, 30.0, 'longest') == 12
+            assert timeline_length(videos, 30.0, 'loop') == 12
+            with pytest.raises(ValueError, match='Invalid length policy'):
+                timeline_length(videos, 30.0, 'middle')
+        finally:
+            for video in videos:
+                video.release()
+
+    def test_invalid_frame_rate(self) -> None:
+        """Test error handling for an invalid output frame rate."""
+        with pytest.raises(ValueError, match='Invalid frame rate'):
+            VideoCombiner(fps=0)
+        with pytest.raises(ValueError, match='Invalid length policy'):
+            VideoCombiner(length='middle')
+
+
+class TestTimelineCombine:
+    """Tests for combining videos with different lengths and frame rates."""
+
+    ENCODER = EncoderOptions(backend='mjpg')
+
+    @pytest.fixture
+    def temp_folder(self) -> Generator[str, None, None]:
+        """Create a folder with a 1 s 30 fps video and a 0.5 s 20 fps video."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_video(os.path.join(tmpdir, '01_main.avi'), gray_frames(30), 30.0)
+            write_video(os.path.join(tmpdir, '02_side.avi'), gray_frames(10), 20.0)
+            yield tmpdir
+
+    def _frames(self, path: str) -> List[np.ndarray]:
+        cap = cv2.VideoCapture(path)
+        frames = []
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        return frames
+
+    @pytest.mark.parametrize('length,fps,expected', [
+        ('first', None, 30),
+        ('shortest', None, 15),
+        ('longest', None, 30),
+        ('loop', None, 30),
+        ('first', 10.0, 10),
+    ])
+    def test_length_policy(self, temp_folder: str, length: str, fps: float, expected: int) -> None:
+        """Test the number of frames written for each policy and output rate."""
+        output_path = os.path.join(temp_folder, 'out', 'output.avi')
+        os.makedirs(os.path.dirname(output_path))
+        VideoCombiner(length=length, fps=fps, encoder=self.ENCODER).combine_from_folder(temp_folder, output_path)
+        assert len(self._frames(output_path)) == expected
+
+    def test_loop_and_black(self, temp_folder: str) -> None:
+        """Test that a short video loops under 'loop' and turns black under 'longest'."""
+        output_dir = os.path.join(temp_folder, 'out')
+        os.makedirs(output_dir)
+        for length in ('loop', 'longest'):
+            combiner = VideoCombiner(length=length, encoder=self.ENCODER)
+            combiner.combine_from_folder(temp_folder, os.path.join(output_dir, length + '.avi'))
+
+        looped = self._frames(os.path.join(output_dir, 'loop.avi'))
+        black = self._frames(os.path.join(output_dir, 'longest.avi'))
+        # Side video (rows 120-240) shows source frame 2 * n / 3 at 30 fps
+        assert _index(looped[3][130:230]) == 2
+        assert _index(looped[18][130:230]) == 2
+        assert _index(black[18][130:230]) == 0
+        assert _index(black[18][:120]) == 18
+
+    def test_trim_seeks(self, temp_folder: str, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that a time window is rendered by seeking, without reading the frames before it."""
+        reads: List[int] = []
+        get_frame = VideoAsset.get_frame
+
+        def counting(self: VideoAsset, dst: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+            reads.append(1)
+            return get_frame(self, dst)
+
+        monkeypatch.setattr(VideoAsset, 'get_frame', counting)
+        monkeypatch.setattr(VideoAsset, 'grab', lambda self: pytest.fail('decoded a skipped frame'))
+        output_path = os.path.join(temp_folder, 'out', 'output.avi')
+        os.makedirs(os.path.dirname(output_path))
+        combiner = VideoCombiner(start_time=0.5, end_time=0.8, encoder=self.ENCODER)
+        combiner.combine_from_folder(temp_folder, output_path)
+
+        frames = self._frames(output_path)
+        assert [_index(frame[:120]) for frame in frames] == list(range(15, 24))
+        # The side video has ended by 0.5 s and is shown black
+        assert _index(frames[0][130:230]) == 0
+        assert len(reads) <= 9 + 1
+
+    def test_trim_single_until_end(self, temp_folder: str) -> None:
+        """Test that a legacy render with only a start time runs until the video ends."""
+        cv2.imwrite(os.path.join(temp_folder, 'image.png'), np.zeros((40, 160, 3), dtype=np.uint8))
+        with VideoCombiner(start_time=0.9).iter_composited_single(
+                os.path.join(temp_folder, '01_main.avi'), os.path.join(temp_folder, 'image.png')) as stream:
+            assert [_index(frame[:120]) for frame in stream] == [27, 28, 29]
+
+    def test_invalid_window(self, temp_folder: str) -> None:
+        """Test error handling for windows outside the timeline."""
+        with pytest.raises(ValueError, match='Invalid end time'):
+            VideoCombiner(start_time=2.0, end_time=1.0)
+        with pytest.raises(ValueError, match='Invalid start time'):
+            VideoCombiner(start_time=-1.0)
+        with pytest.raises(ValueError, match='Invalid start time'):
+            VideoCombiner(start_time=5.0).iter_composited_frames(temp_folder)
+
+    def test_pipeline_matches_sequential(self, temp_folder: str) -> None:
+        """Test that the pipeline repeats and loops frames like the sequential loop."""
+        results = []
+        for pipeline in (False, True):
+            main = VideoAsset(os.path.join(temp_folder, '01_main.avi'))
+            side = VideoAsset(os.path.join(temp_folder, '02_side.avi'))
+            canvas = np.zeros((240, 160, 3), dtype=np.uint8)
+            regions = [
+                VideoRegion(TimedVideo(main, 30.0), 0, 120, 120),
+                VideoRegion(TimedVideo(side, 30.0, loop=True, cache_bytes=160 * 120 * 3 * 4), 120, 120, 120),
+            ]
+            frames: List[np.ndarray] = []
+            try:
+                combiner = VideoCombiner(pipeline=pipeline, queue_size=2)
+                combiner._render(canvas, regions, lambda frame: frames.append(frame.copy()), 40)
+            finally:
+                main.release()
+                side.release()
+            results.append(frames)
+
+        sequential, pipelined = results
+        assert len(sequential) == len(pipelined) == 40
+        for expected, actual in zip(sequential, pipelined):
+            assert np.array_equal(expected, actual)
@@ -4,9 +4,11 @@ import os
 import tempfile
 from typing import Generator
 
+import cv2
+import numpy as np
 import pytest
 
-from src.utils import discover_assets, get_file_type
+from src.utils import DiscoveryOptions, discover_assets, get_file_type, natural_key, read_image_size
 
 
 class TestGetFileType:
@@ -81,3 +83,73 @@ class TestDiscoverAssets:
         """Test error handling for invalid directory."""
         with pytest.raises(ValueError, match='Not a valid directory'):
             discover_assets('/nonexistent/path')
+
+    def test_natural_sort(self, temp_folder: str) -> None:
+        """Test that natural sort orders numbers by value."""
+        for name in ('clip10.mp4', 'Clip2.mp4', 'clip1.png'):
+            open(os.path.join(temp_folder, name), 'w').close()
+
+        result = discover_assets(temp_folder, DiscoveryOptions(natural_sort=True))
+
+        assert [os.path.basename(path) for path, _ in result] == ['clip1.png', 'Clip2.mp4', 'clip10.mp4']
+        assert natural_key('a10b') > natural_key('A9b')
+
+    def test_recursive_with_patterns(self, temp_folder: str) -> None:
+        """Test recursive discovery with include and exclude patterns, folder by folder."""
+        for relative in ('b.mp4', 'sub/a.mp4', 'sub/c.png', 'sub/deeper/d.mp4', 'skip/e.mp4', 'a/z.mp4'):
+            path = os.path.join(temp_folder, *relative.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, 'w').close()
+
+        assert [os.path.basename(p) for p, _ in discover_assets(temp_folder)] == ['b.mp4']
+
+        result = discover_assets(temp_folder, DiscoveryOptions(recursive=True, include=('*.mp4',),
+                                                               exclude=('skip', '*/deeper/*')))
+        found = [os.path.relpath(path, temp_folder).replace(os.sep, '/') for path, _ in result]
+        assert found == ['a/z.mp4', 'b.mp4', 'sub/a.mp4']
+
+    def test_symlinked_folders_not_followed(self, temp_folder: str) -> None:
+        """Test that recursion does not follow folder links, which could form cycles."""
+        open(os.path.join(temp_folder, 'video.mp4'), 'w').close()
+        os.symlink(temp_folder, os.path.join(temp_folder, 'loop'))
+
+        result = discover_assets(temp_folder, DiscoveryOptions(recursive=True))
+
+        assert [os.path.basename(path) for path, _ in result] == ['video.mp4']
+
+
+class TestReadImageSize:
+    """Tests for read_image_size function."""
+
+    @pytest.fixture
+    def temp_folder(self) -> Generator[str, None, None]:
+        """Create a temporary folder for testing."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.mark.parametrize('extension', ['.png', '.jpg', '.bmp', '.gif', '.webp'])
+    def test_header_size(self, temp_folder: str, extension: str) -> None:
+        """Test reading the size of images written by OpenCV."""
+        path = os.path.join(temp_folder, 'image' + extension)
+        cv2.imwrite(path, np.zeros((123, 457, 3), dtype=np.uint8))
+        assert read_image_size(path) == (457, 123)
+
+    def test_jpeg_with_exif(self, temp_folder: str) -> None:
+        """Test that JPEGs with EXIF data are not sized from the header."""
+        ret, encoded = cv2.imencode('.jpg', np.zeros((20, 40, 3), dtype=np.uint8))
+        assert ret
+        data = encoded.tobytes()
+        exif = b'Exif\x00\x00' + b'\x00' * 8
+        app1 = b'\xff\xe1' + (len(exif) + 2).to_bytes(2, 'big') + exif
+        path = os.path.join(temp_folder, 'exif.jpg')
+        with open(path, 'wb') as f:
+            f.write(data[:2] + app1 + data[2:])
+        assert read_image_size(path) is None
+
+    def test_unknown_or_missing(self, temp_folder: str) -> None:
+        """Test that unrecognised and missing files return None."""
+        path = os.path.join(temp_folder, 'notes.txt')
+        with open(path, 'w') as f:
+            f.write('not an image')
+        assert read_image_size(path) is None
+        assert read_image_size(os.path.join(temp_folder, 'missing.png')) is None
@@ -0,0 +1,192 @@
+"""Tests for src/yuv.py."""
+
+import os
+import tempfile
+from typing import Generator, List
+
+import cv2
+import numpy as np
+import pytest
+
+from src.combiner import VideoCombiner
+from src.yuv import I420Frame, I420Region, even_size, i420_planes
+
+
+def _noise(height: int, width: int, seed: int) -> np.ndarray:
+    """Return smooth BGR noise, so resizing and chroma subsampling both have detail to work on."""
+    rng = np.random.default_rng(seed)
+    return cv2.GaussianBlur(rng.integers(0, 256, (height, width, 3), dtype=np.uint8), (9, 9), 0)
+
+
+def _to_bgr(data: np.ndarray) -> np.ndarray:
+    """Convert a packed I420 frame to BGR."""
+    return cv2.cvtColor(data, cv2.COLOR_YUV2BGR_I420)
+
+
+class TestI420Frame:
+    """Tests for the I420Frame and I420Region classes."""
+
+    def test_planes(self) -> None:
+        """Test that the planes are views into one buffer in Y, U, V order."""
+        frame = I420Frame(8, 4)
+        assert frame.data.shape == (6, 8)
+        assert frame.y.shape == (4, 8) and frame.u.shape == (2, 4) and frame.v.shape == (2, 4)
+        frame.y[:] = 1
+        frame.u[:] = 2
+        frame.v[:] = 3
+        assert frame.data.reshape(-1).tolist() == [1] * 32 + [2] * 8 + [3] * 8
+        y, u, v = i420_planes(frame.data)
+        assert np.shares_memory(y, frame.y) and np.shares_memory(v, frame.v)
+
+    def test_invalid_size(self) -> None:
+        """Test error handling for sizes 4:2:0 cannot hold."""
+        with pytest.raises(ValueError, match='Invalid I420 frame size'):
+            I420Frame(7, 4)
+        with pytest.raises(ValueError, match='Invalid I420 frame size'):
+            I420Frame(0, 0)
+
+    def test_from_bgr_pads_odd_sizes(self) -> None:
+        """Test that odd sizes are padded with black and round-trip within tolerance."""
+        bgr = _noise(31, 41, 0)
+        frame = I420Frame.from_bgr(bgr)
+        assert (frame.width, frame.height) == even_size(41, 31) == (42, 32)
+        assert np.all(frame.y[31] == 16) and np.all(frame.y[:, 41] == 16)
+        assert np.abs(frame.to_bgr()[:31, :41].astype(int) - bgr).mean() < 6
+
+    def test_region_matches_full_frame_conversion(self) -> None:
+        """Test that converting a region equals converting the whole frame once it is in place."""
+        bgr = _noise(40, 60, 1)
+        canvas = np.zeros((40, 60, 3), dtype=np.uint8)
+        frame = I420Frame.from_bgr(canvas)
+        region = I420Region(frame, canvas, 10, 4, 40, 24)
+        region.put(bgr[4:24, 10:40])
+
+        expected = np.zeros_like(bgr)
+        expected[4:24, 10:40] = bgr[4:24, 10:40]
+        assert np.array_equal(frame.data, I420Frame.from_bgr(expected).data)
+
+    def test_region_with_odd_edges(self) -> None:
+        """Test that a region with odd edges matches the whole frame conversion once its edges are converted."""
+        bgr = _noise(20, 20, 4)
+        canvas = _noise(20, 20, 5)
+        frame = I420Frame.from_bgr(canvas)
+        region = I420Region(frame, canvas, 3, 5, 17, 11)
+        assert (region.width, region.height) == (14, 6)
+
+        region.put(cv2.resize(bgr, (14, 6)))
+        region.convert_edges()
+        expected = _noise(20, 20, 5)
+        expected[5:11, 3:17] = cv2.resize(bgr, (14, 6))
+        assert np.array_equal(canvas[5], expected[5]) and np.array_equal(canvas[:, 16], expected[:, 16])
+        assert np.array_equal(frame.data, I420Frame.from_bgr(expected).data)
+
+        region.clear()
+        region.convert_edges()
+        expected[5:11, 3:17] = 0
+        assert np.array_equal(frame.data, I420Frame.from_bgr(expected).data)
+
+    def test_region_leaves_neighbour_luma_untouched(self) -> None:
+        """Test that a region with odd edges writes no luma of the image painted next to it."""
+        canvas = np.full((20, 20, 3), 200, dtype=np.uint8)
+        frame = I420Frame.from_bgr(canvas)
+        before = frame.y.copy()
+        # Image rows 0-6 above the region and columns 15-19 to its right
+        region = I420Region(frame, canvas, 0, 7, 15, 20)
+        region.put(np.zeros((13, 15, 3), dtype=np.uint8))
+
+        assert np.array_equal(frame.y[:7], before[:7])
+        assert np.array_equal(frame.y[:, 15:], before[:, 15:])
+        assert np.all(frame.y[7:20, 0:15] == 16)
+        assert np.array_equal(frame.u[:3], i420_planes(I420Frame.from_bgr(canvas).data)[1][:3])
+
+    def test_empty_region(self) -> None:
+        """Test that an empty region ignores frames."""
+        canvas = np.zeros((4, 4, 3), dtype=np.uint8)
+        region = I420Region(I420Frame(4, 4), canvas, 1, 0, 1, 4)
+        assert region.width == 0
+        region.put(np.zeros((4, 1, 3), dtype=np.uint8))
+        region.convert_edges()
+
+
+class TestYUVCompositing:
+    """Tests that the YUV path renders what the BGR path does."""
+
+    @pytest.fixture
+    def temp_folder(self) -> Generator[str, None, None]:
+        """Create a folder with a 6-frame moving video and an image of a different width."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pattern = _noise(120, 320, 2)
+            fourcc = cv2.VideoWriter_fourcc(*'MJPG')
+            out = cv2.VideoWriter(os.path.join(tmpdir, '01_video.avi'), cv2.CAP_OPENCV_MJPEG, fourcc, 30.0,
+                                  (160, 120))
+            for i in range(6):
+                out.write(np.ascontiguousarray(pattern[:, i * 8:i * 8 + 160]))
+            out.release()
+            cv2.imwrite(os.path.join(tmpdir, '02_image.png'), _noise(50, 80, 3))
+            yield tmpdir
+
+    def _render(self, folder: str, **options: object) -> List[np.ndarray]:
+        with VideoCombiner(**options).iter_composited_frames(folder) as stream:  # type: ignore[arg-type]
+            return [frame.copy() for frame in stream]
+
+    @pytest.mark.parametrize('layout', ['vstack', 'hstack', 'grid'])
+    def test_matches_bgr(self, temp_folder: str, layout: str) -> None:
+        """Test that YUV frames equal the BGR frames converted to I420, within one level."""
+        bgr = self._render(temp_folder, layout=layout)
+        yuv = self._render(temp_folder, layout=layout, yuv=True)
+
+        assert len(yuv) == len(bgr) == 6
+        for expected, frame in zip(bgr, yuv):
+            assert frame.shape == (expected.shape[0] * 3 // 2, expected.shape[1])
+            difference = np.abs(frame.astype(int) - I420Frame.from_bgr(expected).data)
+            assert difference.max() <= 1
+            assert np.abs(_to_bgr(frame).astype(int) - expected).mean() < 3
+
+    @pytest.mark.parametrize('layout', ['vstack', 'hstack', 'grid'])
+    def test_odd_layout_matches_bgr(self, temp_folder: str, layout: str) -> None:
+        """Test that odd layouts are padded to even and match the BGR frames up to the region edges."""
+        bgr = self._render(temp_folder, layout=layout, max_width=151, max_height=111)
+        yuv = self._render(temp_folder, layout=layout, max_width=151, max_height=111, yuv=True)
+
+        height, width = bgr[0].shape[:2]
+        assert width % 2 == 1 or height % 2 == 1
+        assert yuv[0].shape == (even_size(width, height)[1] * 3 // 2, even_size(width, height)[0])
+        for expected, frame in zip(bgr, yuv):
+            difference = np.abs(frame.astype(int) - I420Frame.from_bgr(expected).data)
+            assert difference.max() <= 1
+
+    @pytest.mark.parametrize('image_position', ['top', 'bottom'])
+    def test_single_matches_bgr(self, temp_folder: str, image_position: str) -> None:
+        """Test that legacy YUV renders with odd region edges match the BGR frames."""
+        video_path = os.path.join(temp_folder, '01_video.avi')
+        image_path = os.path.join(temp_folder, '02_image.png')
+        frames = []
+        for yuv in (False, True):
+            combiner = VideoCombiner(yuv=yuv, max_width=151)
+            with combiner.iter_composited_single(video_path, image_path, 3, image_position) as stream:
+                frames.append([frame.copy() for frame in stream])
+
+        assert len(frames[1]) == len(frames[0]) == 6
+        for expected, frame in zip(*frames):
+            difference = np.abs(frame.astype(int) - I420Frame.from_bgr(expected).data)
+            assert difference.max() <= 1
+
+    def test_dedup(self, temp_folder: str) -> None:
+        """Test that deduplicated YUV renders match full ones."""
+        assert all(np.array_equal(a, b) for a, b in zip(self._render(temp_folder, yuv=True),
+                                                        self._render(temp_folder, yuv=True, dedup_stride=1)))
+
+    def test_write_video(self, temp_folder: str) -> None:
+        """Test encoding YUV frames with the OpenCV writer."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, 'output.mp4')
+            VideoCombiner(yuv=True).combine_from_folder(temp_folder, output_path)
+            cap = cv2.VideoCapture(output_path)
+            assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 6
+            assert int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) == 160
+            cap.release()
+
+    def test_not_with_pipeline(self) -> None:
+        """Test that the YUV path refuses the pipeline."""
+        with pytest.raises(ValueError, match='sequential renderer only'):
+            VideoCombiner(yuv=True, pipeline=True)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Compare encoder backends on the same input.
+
+Usage:
+    python tools/bench_encoders.py --input test/
+    python tools/bench_encoders.py --input test/ --encoders opencv mjpg --presets ultrafast medium
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.combiner import VideoCombiner  # noqa: E402
+from src.config import DEFAULTS, ENCODERS  # noqa: E402
+from src.encoders import BACKENDS, EncoderOptions  # noqa: E402
+
+EXTENSIONS = {
+    ENCODERS.OPENCV: '.mp4',
+    ENCODERS.FFMPEG: '.mp4',
+    ENCODERS.MJPG: '.avi',
+    ENCODERS.FFV1: '.mkv',
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark encoder backends on a folder of media files.')
+    parser.add_argument('--input', type=str, required=True, help='Folder containing media files')
+    parser.add_argument('--encoders', nargs='+', choices=BACKENDS, default=list(BACKENDS),
+                        help='Backends to compare (default: all)')
+    parser.add_argument('--presets', nargs='+', default=[DEFAULTS.FFMPEG_PRESET],
+                        help='ffmpeg presets to compare (default: %(default)s)')
+    parser.add_argument('--crf', type=int, default=DEFAULTS.FFMPEG_CRF,
+                        help='ffmpeg constant rate factor (default: %(default)s)')
+    args = parser.parse_args()
+
+    runs = []
+    for backend in args.encoders:
+        if backend == ENCODERS.FFMPEG:
+            runs += [(f'{backend} {preset}', EncoderOptions(backend, preset=preset, crf=args.crf))
+                     for preset in args.presets]
+        else:
+            runs.append((backend, EncoderOptions(backend)))
+
+    print(f"{'encoder':<20} {'seconds':>8} {'fps':>8} {'size MB':>8}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, options in runs:
+            output_path = os.path.join(tmpdir, name.replace(' ', '_') + EXTENSIONS[options.backend])
+            start = time.perf_counter()
+            try:
+                VideoCombiner(encoder=options).combine_from_folder(args.input, output_path)
+            except Exception as e:
+                print(f"{name:<20} failed: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+
+            cap = cv2.VideoCapture(output_path)
+            frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            cap.release()
+            size_mb = os.path.getsize(output_path) / 1e6
+            print(f"{name:<20} {elapsed:>8.2f} {frames / elapsed:>8.1f} {size_mb:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Measure combiner throughput and memory on generated inputs.
+
+Usage:
+    python tools/benchmark.py
+    python tools/benchmark.py --scenarios single_hd folder_hd --repeat 3 --output output/baseline.json
+    python tools/benchmark.py --compare output/baseline.json --tolerance 0.1
+    python tools/benchmark.py --encoder ffmpeg --yuv --compare output/baseline.json
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.benchmark import SCENARIOS, compare, load_results, run_scenario, write_results  # noqa: E402
+from src.config import DEFAULTS, ENCODERS  # noqa: E402
+from src.encoders import BACKENDS, EncoderOptions  # noqa: E402
+
+
+def main() -> None:
+    names = [scenario.name for scenario in SCENARIOS]
+    parser = argparse.ArgumentParser(description='Benchmark the combiner on synthetic inputs.')
+    parser.add_argument('--scenarios', nargs='+', choices=names, default=names,
+                        help='Scenarios to run (default: all)')
+    parser.add_argument('--list', action='store_true', help='List the scenarios and exit')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Runs per scenario, the fastest is reported (default: %(default)s)')
+    parser.add_argument('--pipeline', action='store_true', help='Combine with the threaded pipeline')
+    parser.add_argument('--yuv', action='store_true', help='Composite in planar YUV 4:2:0 instead of BGR')
+    parser.add_argument('--encoder', type=str, choices=BACKENDS, default=ENCODERS.OPENCV,
+                        help='Encoder backend (default: %(default)s)')
+    parser.add_argument('--media-dir', type=str, default=DEFAULTS.BENCH_MEDIA_DIR,
+                        help='Directory for generated inputs, reused between runs (default: %(default)s)')
+    parser.add_argument('--output', type=str, default=DEFAULTS.BENCH_RESULTS_PATH,
+                        help='Path for the JSON results (default: %(default)s)')
+    parser.add_argument('--compare', type=str, default=None,
+                        help='Baseline results to compare against; exits with status 1 on a regression')
+    parser.add_argument('--tolerance', type=float, default=DEFAULTS.BENCH_TOLERANCE,
+                        help='Allowed relative fps drop or peak RSS increase (default: %(default)s)')
+    args = parser.parse_args()
+
+    if args.list:
+        for scenario in SCENARIOS:
+            print(f"{scenario.name:<20} {scenario.mode:<7} {scenario.media_key}")
+        return
+
+    baseline = load_results(args.compare) if args.compare else None
+    options = {'pipeline': args.pipeline, 'yuv': args.yuv, 'encoder': EncoderOptions(args.encoder)}
+
+    results = []
+    print(f"{'scenario':<20} {'frames':>7} {'seconds':>8} {'fps':>8} {'peak MB':>8}")
+    for scenario in SCENARIOS:
+        if scenario.name not in args.scenarios:
+            continue
+        result = run_scenario(scenario, args.media_dir, args.repeat, options)
+        results.append(result)
+        rss = f"{result.peak_rss_mb:>8.0f}" if result.peak_rss_mb is not None else f"{'n/a':>8}"
+        print(f"{result.name:<20} {result.frames:>7} {result.seconds:>8.2f} {result.fps:>8.1f} {rss}")
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    write_results(results, args.output)
+    print(f"Results saved to: {args.output}")
+
+    if baseline is not None:
+        regressions = compare(baseline, results, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression.name} {regression.metric}: "
+                  f"{regression.baseline:.1f} -> {regression.current:.1f} ({regression.change:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()